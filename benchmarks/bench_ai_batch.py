@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Fix All Errors throughput benchmark.
+Generates a project where some modules miss a colon, then runs the batch
+fix against a local stand-in for the chat completions endpoint that takes
+as long as a model would to answer, one request at a time and with a few
+in flight, with and without the rate limit, and checks that every applied
+fix makes its file compile again.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PyQt6.QtWidgets import QApplication
+
+import ide
+
+
+BUG = "if total > limit\n"
+FIX = "if total > limit:\n"
+LATENCY = 0.2
+
+
+def make_module(index, functions, broken):
+    """Generate a module, with a missing colon in its middle function if broken"""
+    parts = ["import os\nimport json\n\n"]
+    for i in range(functions):
+        condition = BUG if broken and i == functions // 2 else FIX
+        parts.append(
+            f"def func_{index}_{i}(data, limit=10):\n"
+            f"    total = sum(data)\n"
+            f"    {condition}"
+            f"        total = limit\n"
+            f"    return total\n\n"
+        )
+    return "".join(parts)
+
+
+class MockCompletionsHandler(BaseHTTPRequestHandler):
+    """Answers with the code it was sent with the colon put back, after a model's latency"""
+
+    # Requests being answered right now, and the most at once
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def do_POST(self):
+        """Answer with the fixed code as server-sent events"""
+        with MockCompletionsHandler.lock:
+            MockCompletionsHandler.in_flight += 1
+            MockCompletionsHandler.peak = max(MockCompletionsHandler.peak, MockCompletionsHandler.in_flight)
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        prompt = json.loads(body)["messages"][-1]["content"]
+        code = prompt.split("Code with error:\n", 1)[1].split("\n\nError message:", 1)[0]
+        time.sleep(LATENCY)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunk = {"choices": [{"delta": {"content": (code + "\n").replace(BUG, FIX)}}]}
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode())
+        with MockCompletionsHandler.lock:
+            MockCompletionsHandler.in_flight -= 1
+
+    def log_message(self, format, *args):
+        """Keep the benchmark output clean"""
+
+
+def run_batch(app, window, paths, concurrent, rate):
+    """Fix paths with at most concurrent requests and rate requests a second, returns the dialog and seconds"""
+    service = window.batch_fix_service
+    service.MAX_CONCURRENT = concurrent
+    service.limiter = ide.VSCodeRateLimiter(rate)
+    MockCompletionsHandler.peak = 0
+    dialog = ide.VSCodeBatchFixDialog(service, window)
+    start = time.perf_counter()
+    dialog.start(paths)
+    while dialog.generation is not None and time.perf_counter() - start < 300:
+        app.processEvents()
+        time.sleep(0.001)
+    return dialog, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark"""
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    app = QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as directory:
+        ide.VSCodeProjectIndex.CACHE_DIR = os.path.join(directory, "cache")
+        paths = []
+        for index in range(files * 2):
+            path = os.path.join(directory, "project", f"module_{index}.py")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(make_module(index, 40, index % 2 == 0))
+            paths.append(path)
+        print(f"📊 {len(paths)} modules, {files} with a syntax error, {LATENCY * 1000:.0f} ms per request")
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), MockCompletionsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        window = ide.VSCodeMainWindow()
+        window.ai_fixer.api_key = "test"
+        window.ai_fixer.api_url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+        # Every run has to reach the endpoint
+        window.ai_fixer.cache = None
+
+        start = time.perf_counter()
+        items = window.batch_fix_service.check(paths)
+        print(f"  checking:                  {(time.perf_counter() - start) * 1000:7.1f} ms, "
+              f"{len(items)} files fail to compile")
+        assert len(items) == files
+
+        for concurrent, rate in [(1, 1000.0), (4, 1000.0), (8, 1000.0), (8, 10.0)]:
+            dialog, elapsed = run_batch(app, window, paths, concurrent, rate)
+            ready = sum(item.state == 'ready' for item in dialog.items)
+            assert ready == files, [item.message for item in dialog.items if item.state != 'ready']
+            limit = f"{rate:.0f}/s" if rate < 1000 else "no limit"
+            print(f"  {concurrent} at a time, {limit:<9} {elapsed:7.2f} s, {files / elapsed:5.1f} fixes/s, "
+                  f"{MockCompletionsHandler.peak} requests in flight at most")
+
+        dialog.apply_all_ready()
+        while dialog.savers:
+            app.processEvents()
+            time.sleep(0.001)
+        for path in paths:
+            with open(path) as f:
+                compile(f.read(), path, 'exec')
+        assert not window.batch_fix_service.check(paths)
+        print(f"  ✅ applied {files} fixes, every module compiles")
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+AI Fix context trimming benchmark.
+Runs a generated module with a bug deep inside it to get a real traceback,
+then fixes it through a local stand-in for the chat completions endpoint
+whose answer time grows with the code it has to send back, once with the
+whole file and once with only the failing function, and checks that the
+fix is spliced back into the right lines.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PyQt6.QtWidgets import QApplication
+
+import ide
+
+
+BUG = "return total / (limit - limit)"
+FIX = "return total / (limit or 1)"
+TOKEN_SIZE = 16
+TOKEN_DELAY = 0.0005
+
+
+def make_module(functions):
+    """Generate a module whose middle function divides by zero"""
+    parts = ["import os\nimport json\nfrom collections import defaultdict\n\n"]
+    for i in range(functions):
+        result = BUG if i == functions // 2 else "return total"
+        parts.append(
+            f"def func_{i}(data, limit=10):\n"
+            f"    total = 0\n"
+            f"    for item in data:\n"
+            f"        if item > limit:\n"
+            f"            total += item * {i}\n"
+            f"    {result}\n\n"
+        )
+    parts.append(f"\nfunc_{functions // 2}([1, 20])\n")
+    return "".join(parts)
+
+
+class MockCompletionsHandler(BaseHTTPRequestHandler):
+    """Streams back the code it was sent with the bug fixed, as fast as a model would type it"""
+
+    # Bytes of the last request body
+    request_size = 0
+
+    def do_POST(self):
+        """Answer with the fixed code as server-sent events"""
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        MockCompletionsHandler.request_size = len(body)
+        prompt = json.loads(body)["messages"][-1]["content"]
+        code = prompt.split("Code with error:\n", 1)[1].split("\n\nError message:", 1)[0]
+        fixed = code.replace(BUG, FIX)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i in range(0, len(fixed), TOKEN_SIZE):
+            time.sleep(TOKEN_DELAY)
+            chunk = {"choices": [{"delta": {"content": fixed[i:i + TOKEN_SIZE]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, format, *args):
+        """Keep the benchmark output clean"""
+
+
+def fix(app, window, editor, path, code, traceback):
+    """Run AI Fix on the editor, returns seconds until the fix can be applied"""
+    editor.file_path = path
+    editor.setPlainText(code)
+    window.terminal.terminal_output.setPlainText(f"$ python {path}\n{traceback}")
+    start = time.perf_counter()
+    window.ai_fix_code()
+    preview = window.ai_fix_preview
+    while not preview.apply_button.isEnabled() and time.perf_counter() - start < 120:
+        app.processEvents()
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    preview.apply_fix()
+    return elapsed, preview.region
+
+
+def main():
+    """Run the benchmark"""
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    app = QApplication(sys.argv)
+    directory = tempfile.mkdtemp()
+    ide.VSCodeProjectIndex.CACHE_DIR = os.path.join(directory, "cache")
+    path = os.path.join(directory, "big.py")
+    code = make_module(functions)
+    with open(path, 'w') as f:
+        f.write(code)
+    traceback = subprocess.run([sys.executable, path], capture_output=True, text=True).stderr
+    expected = code.replace(BUG, FIX)
+    print(f"📊 {code.count(chr(10)):,} line module, failing in func_{functions // 2}")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockCompletionsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    window = ide.VSCodeMainWindow()
+    window.ai_fixer.api_key = "test"
+    window.ai_fixer.api_url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    editor = window.create_editor_tab("big.py", path)
+
+    # Without a file path nothing in the traceback matches the editor, the whole file is sent
+    elapsed, region = fix(app, window, editor, None, code, traceback)
+    assert editor.toPlainText() == expected
+    print(f"  whole file:    request {MockCompletionsHandler.request_size:9,} bytes, "
+          f"fixed after {elapsed * 1000:8.1f} ms")
+
+    elapsed, region = fix(app, window, editor, path, code, traceback)
+    assert editor.toPlainText() == expected
+    print(f"  failing code:  request {MockCompletionsHandler.request_size:9,} bytes, "
+          f"fixed after {elapsed * 1000:8.1f} ms, lines {region.start + 1}-{region.end} "
+          f"with {len(region.imports.splitlines())} imports")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
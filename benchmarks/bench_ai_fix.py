@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+AI Fix responsiveness benchmark.
+Runs a local stand-in for the chat completions endpoint that streams its
+answer token by token, and compares the old blocking fix with the streamed
+preview: how long the GUI thread is stalled, how soon the first part of the
+fix is shown, and how quickly a cancelled request is dropped. Then times
+the same fix answered by the response cache.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+
+import ide
+
+
+BROKEN = "def total(values):\n    result = 0\n    for value in values\n        result += value\n    return result\n" * 20
+FIXED = BROKEN.replace("in values\n", "in values:\n")
+TOKEN_DELAY = 0.01
+TOKEN_SIZE = 8
+
+
+class MockCompletionsHandler(BaseHTTPRequestHandler):
+    """Answers chat completions with FIXED, streamed when asked to"""
+
+    # Set when a client goes away in the middle of a stream
+    disconnected = threading.Event()
+
+    def do_POST(self):
+        """Send the fix as server-sent events or as one JSON body"""
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        tokens = [FIXED[i:i + TOKEN_SIZE] for i in range(0, len(FIXED), TOKEN_SIZE)]
+        if not request.get("stream"):
+            time.sleep(TOKEN_DELAY * len(tokens))
+            body = json.dumps({"choices": [{"message": {"content": FIXED}, "finish_reason": "stop"}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        try:
+            for token in tokens:
+                time.sleep(TOKEN_DELAY)
+                chunk = {"choices": [{"delta": {"content": token}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            chunk = {"choices": [{"delta": {}, "finish_reason": "stop"}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode())
+        except (BrokenPipeError, ConnectionResetError):
+            self.disconnected.set()
+
+    def log_message(self, format, *args):
+        """Keep the benchmark output clean"""
+
+
+def wait(app, condition, timeout=30):
+    """Process events until condition holds, returns the longest event loop stall in seconds"""
+    ticks = [time.perf_counter()]
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(5)
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    timer.stop()
+    ticks.append(time.perf_counter())
+    return max(b - a for a, b in zip(ticks, ticks[1:]))
+
+
+def main():
+    """Run the benchmark"""
+    app = QApplication(sys.argv)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockCompletionsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    cache_dir = tempfile.TemporaryDirectory()
+    ide.VSCodeProjectIndex.CACHE_DIR = cache_dir.name
+    print(f"📊 Fix of {len(FIXED):,} characters streamed in {TOKEN_SIZE}-character tokens "
+          f"every {TOKEN_DELAY * 1000:.0f} ms")
+
+    window = ide.VSCodeMainWindow()
+    window.ai_fixer.api_key = "test"
+    window.ai_fixer.api_url = url
+    editor = window.create_editor_tab("broken.py", "broken.py")
+    editor.setPlainText(BROKEN)
+    window.terminal.terminal_output.append("SyntaxError: expected ':'")
+
+    # The blocking request the GUI thread used to make, without the cache
+    start = time.perf_counter()
+    assert ide.AIFixer("test", url).fix_code(BROKEN, "SyntaxError: expected ':'") == FIXED.strip()
+    print(f"  blocking fix:   GUI stalled {(time.perf_counter() - start) * 1000:7.1f} ms")
+
+    start = time.perf_counter()
+    window.ai_fix_code()
+    preview = window.ai_fix_preview
+    started = time.perf_counter() - start
+    stall = wait(app, lambda: preview.diff_view.toPlainText())
+    first = time.perf_counter() - start
+    stall = max(stall, wait(app, lambda: preview.apply_button.isEnabled()))
+    done = time.perf_counter() - start
+    print(f"  streamed fix:   GUI stalled {max(started, stall) * 1000:7.1f} ms, "
+          f"first change shown after {first * 1000:.1f} ms, complete after {done * 1000:.1f} ms")
+    preview.apply_fix()
+    assert editor.toPlainText() == FIXED
+    editor.undo()
+    assert editor.toPlainText() == BROKEN
+
+    # Another error makes another request, the cache cannot answer it
+    window.terminal.terminal_output.append("SyntaxError: invalid syntax")
+    window.ai_fix_code()
+    preview = window.ai_fix_preview
+    wait(app, lambda: preview.pieces)
+    start = time.perf_counter()
+    preview.reject()
+    cancelled = time.perf_counter() - start
+    wait(app, MockCompletionsHandler.disconnected.is_set, 5)
+    print(f"  cancel:         {cancelled * 1000:7.1f} ms on the GUI thread, connection dropped after "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # The completed streamed fix above is cached, asking again skips the network
+    window.terminal.terminal_output.append("SyntaxError: expected ':'")
+    window.ai_fix_code()
+    preview = window.ai_fix_preview
+    start = time.perf_counter()
+    wait(app, lambda: preview.apply_button.isEnabled())
+    print(f"  cached fix:     complete after {(time.perf_counter() - start) * 1000:7.1f} ms, "
+          f"{preview.cache_label.text()}")
+    cache = window.ai_fixer.cache
+    timings = []
+    for _ in range(100):
+        start = time.perf_counter()
+        window.ai_fixer.fix_code(BROKEN, "SyntaxError: expected ':'")
+        timings.append(time.perf_counter() - start)
+    print(f"  cache lookup:   mean {sum(timings) / len(timings) * 1000:7.3f} ms, "
+          f"worst {max(timings) * 1000:.3f} ms, {cache.describe()}")
+
+    # Fill a small cache far past its budget, the newest fixes must survive
+    small = ide.VSCodeAIFixCache(os.path.join(cache_dir.name, "small.sqlite3"))
+    small.MAX_BYTES = 100 * len(FIXED)
+    start = time.perf_counter()
+    for i in range(1000):
+        small.put(small.key({"messages": [i]}), FIXED)
+    put = (time.perf_counter() - start) / 1000
+    kept = small.connect().execute("SELECT COUNT(*), SUM(size) FROM fixes").fetchone()
+    assert small.get(small.key({"messages": [999]})) == FIXED and small.get(small.key({"messages": [0]})) is None
+    print(f"  eviction:       {put * 1000:.3f} ms per insert, {kept[0]} fixes / {kept[1]:,} bytes kept")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+AI Fix connection pooling benchmark.
+Runs a local OpenAI-compatible stand-in over TLS with keep-alive, and times
+sequential fixes made with a fresh connection each (module-level
+requests.post) against AIFixer's pooled session, plain and streamed. Also
+checks that a rate limited request is retried after its Retry-After delay.
+"""
+
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import requests
+
+import ide
+
+
+FIXED = "def total(values):\n    return sum(values)\n"
+
+
+class MockCompletionsHandler(BaseHTTPRequestHandler):
+    """Answers chat completions at once over keep-alive connections"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes, Nagle's algorithm would hold the body back for a delayed ACK
+    disable_nagle_algorithm = True
+    connections = 0
+    # Requests to answer with 429 before succeeding
+    rate_limited = 0
+
+    def setup(self):
+        """Count connections, every request on a reused connection shares one"""
+        super().setup()
+        MockCompletionsHandler.connections += 1
+
+    def do_POST(self):
+        """Send FIXED as one JSON body or as chunked server-sent events"""
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if MockCompletionsHandler.rate_limited:
+            MockCompletionsHandler.rate_limited -= 1
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if not request.get("stream"):
+            body = json.dumps({"choices": [{"message": {"content": FIXED}, "finish_reason": "stop"}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = [f"data: {json.dumps({'choices': [{'delta': {'content': line}}]})}\n\n"
+                  for line in FIXED.splitlines(True)]
+        events += [f"data: {json.dumps({'choices': [{'delta': {}, 'finish_reason': 'stop'}]})}\n\n",
+                   "data: [DONE]\n\n"]
+        for event in events:
+            data = event.encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        """Keep the benchmark output clean"""
+
+
+def make_certificate(directory):
+    """Create a self-signed certificate for 127.0.0.1, returns (cert, key) or None without openssl"""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    try:
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1",
+                        "-addext", "subjectAltName=IP:127.0.0.1"],
+                       check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return cert, key
+
+
+def time_requests(count, request):
+    """Run request count times, returns mean and worst seconds"""
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        request()
+        timings.append(time.perf_counter() - start)
+    return sum(timings) / count, max(timings)
+
+
+def report(label, timings, connections):
+    """Print timings and how many new connections they opened"""
+    mean, worst = timings
+    print(f"  {label:<26} mean {mean * 1000:6.2f} ms, worst {worst * 1000:6.2f} ms, {connections} new connections")
+
+
+def main():
+    """Run the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    directory = tempfile.mkdtemp()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockCompletionsHandler)
+    certificate = make_certificate(directory)
+    scheme = "http"
+    if certificate:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*certificate)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+        # requests lets this override a session's verify setting, so both clients trust the certificate this way
+        os.environ["REQUESTS_CA_BUNDLE"] = certificate[0]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"{scheme}://127.0.0.1:{server.server_port}/v1/chat/completions"
+    print(f"📊 {count} sequential fixes against a local {scheme.upper()} server")
+
+    fixer = ide.AIFixer("test", url)
+    headers, data = fixer._create_request("def total(values)", "SyntaxError", "python")
+
+    def unpooled():
+        response = requests.post(url, headers=headers, json=data, timeout=30)
+        assert response.json()['choices'][0]['message']['content'] == FIXED
+
+    MockCompletionsHandler.connections = 0
+    report("requests.post:", time_requests(count, unpooled), MockCompletionsHandler.connections)
+
+    MockCompletionsHandler.connections = 0
+    report("pooled session:", time_requests(count, lambda: fixer.fix_code("def total(values)", "SyntaxError")),
+           MockCompletionsHandler.connections)
+
+    MockCompletionsHandler.connections = 0
+    report("pooled session, streamed:",
+           time_requests(count, lambda: ''.join(fixer.stream_fix("def total(values)", "SyntaxError"))),
+           MockCompletionsHandler.connections)
+
+    MockCompletionsHandler.rate_limited = 1
+    start = time.perf_counter()
+    fixed = fixer.fix_code("def total(values)", "SyntaxError")
+    print(f"  429 with Retry-After: 1:   fixed after {time.perf_counter() - start:.2f}s, "
+          f"{'ok' if fixed == FIXED.strip() else fixed}")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
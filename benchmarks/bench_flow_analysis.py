@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Visual Code Flow analysis benchmark.
+Compares the single-pass VSCodeFlowAnalyzer with the previous recursive
+process_ast on a large generated module and on deeply nested functions.
+"""
+
+import ast
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import ide
+
+
+def legacy_process_ast(node, variables, functions, counter):
+    """The recursive walk VSCodeVisualFlow used before, kept here for comparison"""
+    counter[0] += 1
+    if isinstance(node, ast.FunctionDef):
+        functions[node.name] = {'node': node, 'variables': set(), 'calls': []}
+        # Function bodies were walked here and again through iter_child_nodes below
+        for stmt in node.body:
+            legacy_process_ast(stmt, variables, functions, counter)
+    elif isinstance(node, ast.Assign):
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                variables[target.id] = {'value': 'assigned', 'type': 'variable'}
+    elif isinstance(node, ast.Call):
+        if isinstance(node.func, ast.Name) and node.func.id in functions:
+            functions[node.func.id]['calls'].append(node)
+    for child in ast.iter_child_nodes(node):
+        legacy_process_ast(child, variables, functions, counter)
+
+
+def make_module(functions):
+    """Generate a module with classes, nested helpers and calls between functions"""
+    parts = []
+    for i in range(functions):
+        parts.append(
+            f"def func_{i}(data, limit=10):\n"
+            f"    total = 0\n"
+            f"    def step(value):\n"
+            f"        return value * {i} + func_{max(i - 1, 0)}(value, limit)\n"
+            f"    for item in data:\n"
+            f"        if item > limit:\n"
+            f"            total += step(item)\n"
+            f"    return total\n\n"
+        )
+        if i % 10 == 0:
+            parts.append(
+                f"class Worker{i}:\n"
+                f"    def run(self, data):\n"
+                f"        return self.finish(func_{i}(data))\n"
+                f"    def finish(self, result):\n"
+                f"        return result\n\n"
+            )
+    return "".join(parts)
+
+
+def make_nested(depth):
+    """Generate functions nested depth levels deep"""
+    lines = []
+    for level in range(depth):
+        lines.append("    " * level + f"def level_{level}():")
+    lines.append("    " * depth + "return 1")
+    return "\n".join(lines) + "\n"
+
+
+def compare(label, code):
+    """Time both walks over the same parsed tree"""
+    tree = ast.parse(code)
+    node_count = sum(1 for _ in ast.walk(tree))
+
+    start = time.perf_counter()
+    counter = [0]
+    legacy_process_ast(tree, {}, {}, counter)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyzer = ide.VSCodeFlowAnalyzer().visit(tree)
+    current = time.perf_counter() - start
+    edges = sum(len(callees) for callees in analyzer.call_graph.values())
+
+    print(f"{label}: {node_count:,} AST nodes")
+    print(f"  recursive process_ast: {legacy * 1000:8.1f} ms, {counter[0]:,} visits")
+    print(f"  VSCodeFlowAnalyzer:    {current * 1000:8.1f} ms, {analyzer.visited:,} visits, "
+          f"{len(analyzer.functions):,} functions, {edges:,} call edges")
+
+
+def main():
+    """Run the benchmark"""
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    code = make_module(functions)
+    print(f"📊 Module of {code.count(chr(10)):,} lines")
+    compare("Large module", code)
+    compare("Functions nested 16 deep", make_nested(16))
+
+    # The recursive walk can't handle this at all
+    tree = ast.parse(make_nested(90))
+    start = time.perf_counter()
+    analyzer = ide.VSCodeFlowAnalyzer().visit(tree)
+    print(f"Functions nested 90 deep: {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"{analyzer.visited} visits")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
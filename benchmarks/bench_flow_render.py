@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Visual Code Flow rendering benchmark.
+Lays out and draws a generated module with N functions (10,000 by default)
+calling each other, then times repaints while panning and zooming.
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PyQt6.QtWidgets import QApplication
+
+import ide
+
+
+def make_module(functions):
+    """Generate functions that each call two others and read a module variable"""
+    random.seed(1)
+    parts = ["LIMIT = 10\n"]
+    for i in range(functions):
+        parts.append(f"def func_{i}(x):\n"
+                     f"    return func_{random.randrange(functions)}(x) + "
+                     f"func_{random.randrange(functions)}(x) + LIMIT\n")
+    return "".join(parts)
+
+
+def frame_ms(view):
+    """Repaint the whole viewport, return milliseconds taken"""
+    start = time.perf_counter()
+    view.viewport().grab()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    """Run the benchmark"""
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = QApplication(sys.argv)
+
+    start = time.perf_counter()
+    analysis = ide.VSCodeCodeAnalysis(None, make_module(functions))
+    print(f"📊 {len(analysis.nodes):,} nodes, {len(analysis.edges):,} edges")
+    print(f"Analysis and layout (worker thread): {time.perf_counter() - start:.2f}s")
+
+    view = ide.VSCodeVisualFlow()
+    view.resize(1000, 800)
+    view.show()
+    start = time.perf_counter()
+    view.show_analysis(analysis)
+    print(f"Building the scene:                  {time.perf_counter() - start:.2f}s")
+    print(f"Whole graph, before the overview:    {frame_ms(view):.1f} ms")
+    start = time.perf_counter()
+    while view.graph_item.overview is None:
+        app.processEvents()
+        time.sleep(0.001)
+    print(f"Overview image (worker thread):      {time.perf_counter() - start:.2f}s")
+    print(f"Whole graph, first frame:            {frame_ms(view):.1f} ms")
+    print(f"Whole graph, next frame:             {frame_ms(view):.1f} ms")
+
+    x, y = analysis.positions[len(analysis.positions) // 2]
+    for scale in (1.0, 0.5, 0.25, 0.1):
+        view.resetTransform()
+        view.scale(scale, scale)
+        view.centerOn(x, y)
+        view.update_level_of_detail()
+        zoom = frame_ms(view)
+        pans = []
+        for _ in range(10):
+            view.horizontalScrollBar().setValue(view.horizontalScrollBar().value() + 40)
+            pans.append(frame_ms(view))
+        print(f"Zoom {scale:4.2f}: {zoom:6.1f} ms after zooming, "
+              f"{sum(pans) / len(pans):5.1f} ms per pan step")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Live Code Health latency benchmark.
+Types into a large Python module with the health dock closed and open and
+reports how much the live, debounced metrics add to each keystroke, how
+long the debounce callback holds the GUI thread, and how long the worker
+takes for an incremental update compared to measuring the whole file.
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PyQt6.QtCore import QEvent, Qt
+from PyQt6.QtGui import QKeyEvent, QTextCursor
+from PyQt6.QtWidgets import QApplication
+
+import ide
+
+
+def make_module(functions):
+    """Generate a module of branchy functions"""
+    return "".join(
+        f"def func_{i}(data, limit=10):\n"
+        f"    total = 0\n"
+        f"    for item in data:\n"
+        f"        if item > limit and item % {i + 2}:\n"
+        f"            total += item * {i}\n"
+        f"    return total\n\n"
+        for i in range(functions))
+
+
+def type_keys(app, editor, count, settle=0.0):
+    """Type count characters, returns per-keystroke seconds"""
+    timings = []
+    for _ in range(count):
+        event = QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_A, Qt.KeyboardModifier.NoModifier, "a")
+        start = time.perf_counter()
+        app.sendEvent(editor, event)
+        timings.append(time.perf_counter() - start)
+        deadline = time.perf_counter() + settle
+        while True:
+            app.processEvents()
+            if time.perf_counter() >= deadline:
+                break
+            time.sleep(0.002)
+    return timings
+
+
+def report(label, timings):
+    """Print mean and worst of some timings"""
+    print(f"  {label:<38} mean {sum(timings) / len(timings) * 1000:7.3f} ms, "
+          f"worst {max(timings) * 1000:7.3f} ms")
+
+
+def main():
+    """Run the benchmark"""
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    app = QApplication(sys.argv)
+    window = ide.VSCodeMainWindow()
+    window.show()
+    editor = window.create_editor_tab("big.py", "big.py")
+    code = make_module(functions)
+    editor.setPlainText(code)
+    # Type inside a function in the middle of the file
+    cursor = editor.textCursor()
+    cursor.setPosition(code.index(f"    return total\n\ndef func_{functions // 2}("))
+    cursor.movePosition(QTextCursor.MoveOperation.EndOfLine)
+    editor.setTextCursor(cursor)
+    print(f"📊 Typing into a module of {code.count(chr(10)):,} lines")
+
+    window.health_dock.hide()
+    app.processEvents()
+    report("health dock closed:", type_keys(app, editor, 200))
+
+    window.health_dock.show()
+    app.processEvents()
+    report("health dock open, fast typing:", type_keys(app, editor, 200))
+
+    # Time the debounce callback, the only GUI-thread work besides restarting the timer
+    callbacks = []
+    for _ in range(20):
+        window.schedule_health_update(editor)
+        window.health_timer.stop()
+        start = time.perf_counter()
+        window.refresh_live_health()
+        callbacks.append(time.perf_counter() - start)
+    report("debounce callback (copy document):", callbacks)
+
+    # Pauses long enough for every keystroke to trigger a measurement
+    delay = window.HEALTH_DEBOUNCE_MS / 1000 + 0.1
+    report("keystrokes while measurements run:", type_keys(app, editor, 10, delay))
+    print(f"  worker, incremental update:           {window.health_monitor.last_duration * 1000:7.1f} ms")
+
+    start = time.perf_counter()
+    ide.VSCodeMetricsEngine().measure_module(editor.toPlainText())
+    print(f"  worker, whole file measured cold:     {(time.perf_counter() - start) * 1000:7.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
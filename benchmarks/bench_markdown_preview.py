@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Markdown preview benchmark.
+Compares a full render with a cold block cache against re-rendering after a
+single-character edit, which only re-renders the touched block.
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import ide
+
+
+def build_corpus(sections):
+    """Generate a large Markdown document with every block kind"""
+    parts = []
+    for i in range(sections):
+        parts.append(f"## Section {i}\n\n"
+                     f"Some **bold** text, some *italic* text and `inline_code({i})`.\n"
+                     f"A [link](https://example.com/{i}) on a second line.\n\n"
+                     f"- first item {i}\n- second item with __emphasis__\n\n"
+                     f"```python\ndef f_{i}(x):\n    return x ** {i}\n```\n\n"
+                     f"> quoted line {i}\n")
+    return '\n'.join(parts)
+
+
+def timed(func, repeat=5):
+    """Return the best wall time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Run the benchmark"""
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    text = build_corpus(sections)
+    lines = text.count('\n') + 1
+    print(f"📊 Markdown corpus: {lines:,} lines, {len(text) / 1e6:.1f} MB")
+
+    # Big enough to hold every block so the incremental case stays warm
+    renderer = ide.VSCodeMarkdownRenderer(max_cached_blocks=sections * 8)
+    full = timed(lambda: ide.VSCodeMarkdownRenderer().render(text))
+    print(f"Full render (cold cache):     {full * 1000:8.1f} ms")
+
+    renderer.render(text)
+    middle = len(text) // 2
+    edited = [text[:middle] + 'x' + text[middle:], text]
+    state = {'turn': 0}
+
+    def render_edit():
+        renderer.render(edited[state['turn'] % 2])
+        state['turn'] += 1
+
+    renderer.hits = renderer.misses = 0
+    incremental = timed(render_edit)
+    print(f"Re-render after one edit:     {incremental * 1000:8.1f} ms "
+          f"({renderer.misses} blocks re-rendered, {renderer.hits} reused)")
+    print(f"Speedup: {full / incremental:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Code Health metrics benchmark.
+Measures a large generated module cold, again after editing a single
+function, and a whole directory through VSCodeProjectMetrics cold and
+from its per-file cache.
+"""
+
+import ast
+import glob
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import ide
+
+
+def make_module(functions):
+    """Generate a module of branchy functions and classes"""
+    parts = []
+    for i in range(functions):
+        parts.append(
+            f"def func_{i}(data, limit=10):\n"
+            f"    total = 0\n"
+            f"    for item in data:\n"
+            f"        if item > limit and item % {i + 2}:\n"
+            f"            total += item * {i}\n"
+            f"        elif item < 0:\n"
+            f"            total -= 1\n"
+            f"    return [x for x in data if x] or total\n\n"
+        )
+        if i % 10 == 0:
+            parts.append(
+                f"class Worker{i}:\n"
+                f"    def run(self, data):\n"
+                f"        return func_{i}(data) if data else None\n\n"
+            )
+    return "".join(parts)
+
+
+def time_module(engine, code):
+    """Measure a module, returns (seconds, result)"""
+    start = time.perf_counter()
+    result = engine.measure_module(code)
+    return time.perf_counter() - start, result
+
+
+def main():
+    """Run the benchmark"""
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    code = make_module(functions)
+    print(f"📊 Module of {code.count(chr(10)):,} lines")
+
+    engine = ide.VSCodeMetricsEngine()
+    cold, result = time_module(engine, code)
+    print(f"  cold:                 {cold * 1000:8.1f} ms, {len(result['functions']):,} functions")
+    misses = engine.misses
+    edited = code.replace("total -= 1\n", "total -= 2\n", 1)
+    warm, result = time_module(engine, edited)
+    start = time.perf_counter()
+    ast.parse(edited)
+    parse = time.perf_counter() - start
+    print(f"  one function edited:  {warm * 1000:8.1f} ms, {engine.hits:,} reused, "
+          f"{engine.misses - misses:,} measured again ({parse * 1000:.1f} ms of it parsing)")
+
+    root = sys.argv[2] if len(sys.argv) > 2 else os.path.dirname(os.__file__)
+    paths = glob.glob(os.path.join(root, '**', '*.py'), recursive=True)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        ide.VSCodeProjectIndex.CACHE_DIR = cache_dir
+        project = ide.VSCodeProjectMetrics(root)
+        start = time.perf_counter()
+        project.update(paths)
+        cold = time.perf_counter() - start
+        project.save_cache()
+
+        project = ide.VSCodeProjectMetrics(root)
+        start = time.perf_counter()
+        project.load_cache()
+        project.update(paths)
+        warm = time.perf_counter() - start
+    print(f"📁 {len(paths):,} files under {root}")
+    print(f"  cold:                 {cold * 1000:8.1f} ms")
+    print(f"  cached:               {warm * 1000:8.1f} ms, {project.reused:,} files unchanged")
+    print(f"  quality {project.quality_score()}/100, "
+          f"worst {project.worst_functions()[0][1]['name'] if project.worst_functions() else '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Go to File benchmark.
+Builds a path index of synthetic project paths, types a query one
+character at a time the way the palette does, and reports the cost of each
+keystroke on the GUI thread, how long the worker takes to publish its
+first and final results, and how long each ranking tier takes to scan.
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PyQt6.QtWidgets import QApplication
+
+import ide
+
+
+WORDS = ["core", "utils", "models", "views", "api", "tests", "handlers", "widgets",
+         "storage", "network", "parser", "render", "config", "plugins", "events"]
+QUERIES = ["vwrend", "modelsparser", "testsapi_handler"]
+
+
+def make_paths(count):
+    """Generate nested project-relative paths"""
+    paths = []
+    for i in range(count):
+        depth = 2 + i % 4
+        parts = [WORDS[(i // 7 ** level) % len(WORDS)] for level in range(depth)]
+        parts.append(f"{WORDS[i % 13]}_{WORDS[i % 11]}_{i}.py")
+        paths.append("/".join(parts))
+    return sorted(paths)
+
+
+def wait(app, service, generation, started, timings):
+    """Process events until the query finishes, recording first and final results"""
+    first = None
+    done = []
+
+    def on_results(result_generation, results, finished):
+        nonlocal first
+        if result_generation == generation:
+            if first is None:
+                first = time.perf_counter() - started
+            if finished:
+                done.append(time.perf_counter() - started)
+
+    service.results.connect(on_results)
+    while not done:
+        app.processEvents()
+        time.sleep(0.001)
+    service.results.disconnect(on_results)
+    timings.append((first, done[0]))
+
+
+def main():
+    """Run the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    app = QApplication(sys.argv)
+    paths = make_paths(count)
+    start = time.perf_counter()
+    index = ide.VSCodePathIndex("/project", paths)
+    print(f"📊 {count:,} paths, index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    service = ide.VSCodeQuickOpenService()
+    service.path_index = index
+    for query in QUERIES:
+        keystrokes = []
+        timings = []
+        for length in range(1, len(query) + 1):
+            start = time.perf_counter()
+            generation = service.query(query[:length])
+            keystrokes.append(time.perf_counter() - start)
+            wait(app, service, generation, start, timings)
+        first = [t[0] for t in timings]
+        final = [t[1] for t in timings]
+        print(f"  {query!r:<20} keystroke worst {max(keystrokes) * 1000:6.3f} ms, "
+              f"first results worst {max(first) * 1000:6.1f} ms, "
+              f"final results worst {max(final) * 1000:6.1f} ms")
+
+    # Scans of the whole index for a literal and for a fuzzy tier
+    for query in ("handlers_api", "vwrend"):
+        for tier, best, matches in index.tiers(query):
+            start = time.perf_counter()
+            found = sum(len(ids) for ids in matches)
+            print(f"  {query!r:<16} tier {tier:>4}: {(time.perf_counter() - start) * 1000:6.1f} ms, "
+                  f"{found:,} paths")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Find in Files benchmark.
+Copies the standard library into a temporary project until it has about a
+million lines, builds the trigram index cold, reloads it from disk, and
+times warm queries including the mtime check of every file.
+"""
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import ide
+
+
+QUERIES = [
+    ("literal, rare", "getrecursionlimit", False),
+    ("literal, common", "return self", False),
+    ("regex", r"raise \w+Error\(.*not supported", True),
+    ("regex, no literal", r"\bx\d\b", True),
+]
+
+
+def make_project(directory, target_lines):
+    """Copy stdlib modules into directory until it holds target_lines lines"""
+    sources = sorted(glob.glob(os.path.join(os.path.dirname(os.__file__), '*.py')))
+    paths = []
+    lines = 0
+    copy = 0
+    while lines < target_lines:
+        for source in sources:
+            path = os.path.join(directory, f"copy{copy}", os.path.basename(source))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copyfile(source, path)
+            with open(path, 'rb') as f:
+                lines += f.read().count(b'\n')
+            paths.append(path)
+            if lines >= target_lines:
+                break
+        copy += 1
+    return paths, lines
+
+
+def main():
+    """Run the benchmark"""
+    target_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as directory:
+        ide.VSCodeProjectIndex.CACHE_DIR = os.path.join(directory, "cache")
+        root = os.path.join(directory, "project")
+        paths, lines = make_project(root, target_lines)
+        print(f"📊 {len(paths):,} files, {lines:,} lines")
+
+        index = ide.VSCodeSearchIndex(root)
+        start = time.perf_counter()
+        index.update(paths)
+        print(f"Cold index build:   {time.perf_counter() - start:.2f}s, {len(index.postings):,} trigrams")
+        start = time.perf_counter()
+        index.save_cache()
+        print(f"Save:               {time.perf_counter() - start:.2f}s, "
+              f"{os.path.getsize(index.cache_path()) / 1e6:.1f} MB")
+
+        index = ide.VSCodeSearchIndex(root)
+        start = time.perf_counter()
+        index.load_cache()
+        print(f"Load:               {time.perf_counter() - start:.2f}s")
+
+        service = ide.VSCodeSearchService()
+        results = []
+        service.search_finished.connect(lambda *args: results.append(args))
+        for label, pattern, regex in QUERIES:
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                index.update(paths)
+                compiled, literals = service.compile_query(pattern, regex)
+                candidates = len(index.candidates(literals))
+                service.run_search(index, service.generation, compiled, literals)
+                timings.append(time.perf_counter() - start)
+            _, searched, total, _ = results[-1]
+            print(f"Warm {label:<18} {min(timings) * 1000:7.1f} ms, {candidates:,} candidate files, "
+                  f"{total:,} matching lines")
+
+        # Without the index every file has to be read
+        start = time.perf_counter()
+        compiled, _ = service.compile_query("getrecursionlimit")
+        for path in paths:
+            with open(path, 'rb') as f:
+                compiled.search(f.read().decode('utf-8', errors='replace'))
+        print(f"Reading every file: {(time.perf_counter() - start) * 1000:7.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,70 +14,226 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QTextBrowser, QDockWidget, QPlainTextEdit,
                              QInputDialog, QComboBox, QProgressBar, QSlider,
                              QGraphicsView, QGraphicsScene, QGraphicsItem,
-                             QGraphicsEllipseItem, QGraphicsLineItem, QGraphicsTextItem)
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QThread, QProcess, QUrl, QRectF
+                             QGraphicsEllipseItem, QGraphicsLineItem, QGraphicsTextItem,
+                             QAbstractScrollArea, QSpinBox, QCompleter, QCheckBox,
+                             QDialog, QListWidget, QListWidgetItem)
+from PyQt6.QtCore import (Qt, QTimer, pyqtSignal, QThread, QProcess, QUrl, QRectF,
+                          QObject, QFileSystemWatcher, QEvent, QSocketNotifier, QLineF)
 from PyQt6.QtGui import (QFont, QPalette, QColor, QIcon, QAction, QTextCursor, 
                          QSyntaxHighlighter, QTextCharFormat, QFontDatabase,
-                         QTextBlockFormat, QTextOption, QPen, QBrush, QPainter)
+                         QTextBlockFormat, QTextOption, QPen, QBrush, QPainter, QImage)
 import subprocess
 import tempfile
 import json
+import hashlib
+import mmap
+import struct
+import concurrent.futures
+import multiprocessing
+import bisect
+import heapq
 import requests
 import re
 import webbrowser
 import venv
 import ast
+import sqlite3
+import email.utils
+import difflib
+import math
 import time
 import threading
-from collections import defaultdict
+import signal
+import socket
+import codecs
+import shutil
+import shlex
+try:
+    import pty
+    import termios
+    import fcntl
+except ImportError:  # Pseudo-terminals are not available on Windows
+    pty = None
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque, OrderedDict
+from array import array
+from itertools import accumulate, compress
+from html import escape as html_escape
 
 class AIFixer:
-    """AI-powered code fixing using OpenAI GPT-4o"""
+    """AI-powered code fixing using OpenAI GPT-4o or any OpenAI-compatible server"""
     
-    def __init__(self):
-        self.api_key = os.getenv('OPENAI_API_KEY')
-        self.api_url = "https://api.openai.com/v1/chat/completions"
-        
-    def fix_code(self, code: str, error_message: str, language: str = "python") -> str:
+    # Rate limits and transient server errors are retried with exponential backoff
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    MAX_RETRIES = 3
+    BACKOFF = 0.5
+    MAX_BACKOFF = 20.0
+    TIMEOUT = 30
+    # Connections kept alive per host, enough for a batch of fixes running at once
+    POOL_SIZE = 8
+    
+    def __init__(self, api_key=None, api_url=None, cache=None, model=None, max_retries=None):
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.api_url = api_url or os.getenv('OPENAI_API_URL') or "https://api.openai.com/v1/chat/completions"
+        self.model = model or os.getenv('OPENAI_MODEL') or "gpt-4o"
+        self.max_retries = self.MAX_RETRIES if max_retries is None else max_retries
+        # Optional VSCodeAIFixCache, answers the same request without the network
+        self.cache = cache
+        # Shared by every request so connections and TLS sessions are reused
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+    def fix_code(self, code: str, error_message: str, language: str = "python", context: str = "") -> str:
         """Fix code using AI based on error message"""
         if not self.api_key:
             return "Error: OpenAI API key not found. Please set OPENAI_API_KEY environment variable."
         
         try:
-            prompt = self._create_prompt(code, error_message, language)
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "model": "gpt-4o",
-                "messages": [
-                    {"role": "system", "content": "You are an expert programmer. Fix the code based on the error message. Return only the corrected code, no explanations."},
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 2000,
-                "temperature": 0.1
-            }
+            headers, data = self._create_request(code, error_message, language, context)
+            key = self.cache.key(data) if self.cache is not None else None
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                return cached.strip()
             
-            response = requests.post(self.api_url, headers=headers, json=data, timeout=30)
+            response = self._post(headers, data)
             
             if response.status_code == 200:
-                result = response.json()
-                fixed_code = result['choices'][0]['message']['content'].strip()
+                choice = response.json()['choices'][0]
+                content = choice['message']['content']
+                # An answer cut off by max_tokens is not worth keeping
+                if key and choice.get('finish_reason') == 'stop':
+                    self.cache.put(key, content)
+                fixed_code = content.strip()
                 return fixed_code
             else:
                 return f"API Error: {response.status_code} - {response.text}"
                 
         except Exception as e:
             return f"Error: {str(e)}"
+            
+    def stream_fix(self, code: str, error_message: str, language: str = "python", on_response=None,
+                   context: str = "", on_finish=None, cancel: threading.Event = None):
+        """Yield the fixed code piece by piece as the API streams it, raises on failure.
+        on_finish gets the finish_reason once the stream ends, "length" means the fix was cut off.
+        Setting cancel stops waiting to retry."""
+        if not self.api_key:
+            raise RuntimeError("Error: OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
+            
+        headers, data = self._create_request(code, error_message, language, context, stream=True)
+        key = self.cache.key(data) if self.cache is not None else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            yield cached
+            if on_finish is not None:
+                on_finish('stop')
+            return
+            
+        response = self._post(headers, data, stream=True, cancel=cancel)
+        # Closing the response from another thread cancels the request
+        if on_response is not None:
+            on_response(response)
+        with response:
+            if response.status_code != 200:
+                raise RuntimeError(f"API Error: {response.status_code} - {response.text}")
+            # Server-sent events, one "data: {json}" line per chunk
+            pieces = []
+            done = False
+            finish_reason = None
+            for line in response.iter_lines():
+                # Lines after [DONE] are still read, a response read to its end frees its connection for reuse
+                if done or not line.startswith(b'data:'):
+                    continue
+                payload = line[5:].strip()
+                if payload == b'[DONE]':
+                    # Only a complete answer is cached, not one cut short by a cancel, a dropped
+                    # connection or max_tokens
+                    if key and finish_reason == 'stop':
+                        self.cache.put(key, ''.join(pieces))
+                    done = True
+                    continue
+                # Usage chunks and some compatible servers send no choices
+                choices = json.loads(payload).get('choices') or []
+                if not choices:
+                    continue
+                finish_reason = choices[0].get('finish_reason') or finish_reason
+                content = (choices[0].get('delta') or {}).get('content')
+                if content:
+                    pieces.append(content)
+                    yield content
+        if on_finish is not None:
+            on_finish(finish_reason)
+                    
+    def _post(self, headers: dict, data: dict, stream: bool = False,
+              cancel: threading.Event = None) -> requests.Response:
+        """POST a request on the pooled session, retrying rate limits and server errors"""
+        # Never set, for callers that can't cancel
+        cancel = cancel or threading.Event()
+        for attempt in range(self.max_retries + 1):
+            if cancel.is_set():
+                raise RuntimeError("Error: Cancelled")
+            try:
+                response = self.session.post(self.api_url, headers=headers, json=data,
+                                             timeout=self.TIMEOUT, stream=stream)
+            except requests.ConnectionError as e:
+                # A failed certificate check will fail again
+                if attempt == self.max_retries or isinstance(e, requests.exceptions.SSLError):
+                    raise
+                delay = self._retry_delay(attempt)
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                response.close()
+            cancel.wait(delay)
+            
+    def _retry_delay(self, attempt: int, retry_after: str = None) -> float:
+        """Seconds to wait before retrying, as asked by the server or doubling with each attempt"""
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                # Retry-After may also be an HTTP date
+                try:
+                    delay = email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.MAX_BACKOFF)
+        return min(self.BACKOFF * 2 ** attempt, self.MAX_BACKOFF)
+        
+    def _create_request(self, code: str, error_message: str, language: str, context: str = "",
+                        stream: bool = False) -> tuple:
+        """Create headers and body of a chat completions request"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        data = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are an expert programmer. Fix the code based on the error message. Return only the corrected code, no explanations."},
+                {"role": "user", "content": self._create_prompt(code, error_message, language, context)}
+            ],
+            "max_tokens": 2000,
+            "temperature": 0.1
+        }
+        if stream:
+            data["stream"] = True
+        return headers, data
     
-    def _create_prompt(self, code: str, error_message: str, language: str) -> str:
-        """Create prompt for AI code fixing"""
+    def _create_prompt(self, code: str, error_message: str, language: str, context: str = "") -> str:
+        """Create prompt for AI code fixing, context is other code of the file that is not to be returned"""
+        if context:
+            context = f"""
+Context from the same file, for reference only:
+{context}
+"""
         return f"""
 Language: {language}
-
+{context}
 Code with error:
 {code}
 
@@ -87,6 +243,991 @@ Error message:
 Please fix the code and return only the corrected version:
 """
 
+class VSCodeTraceback:
+    """The last Python traceback in some terminal output"""
+    
+    HEADER = "Traceback (most recent call last):"
+    FRAME = re.compile(r'\s+File "([^"]+)", line (\d+)')
+    # The line naming the exception that ends a traceback, e.g. "ValueError: bad value"
+    EXCEPTION = re.compile(r'[A-Za-z_][\w.]*(Error|Exception|Exit|Interrupt|Iteration|Warning)\b(:.*)?$')
+    # Longer tracebacks lose their middle, the innermost frames matter most
+    MAX_LINES = 60
+    HEAD_LINES = 10
+    
+    def __init__(self, lines, frames):
+        self.lines = lines
+        # (path, line number) of each frame, outermost first
+        self.frames = frames
+        
+    @classmethod
+    def parse(cls, output):
+        """Find the last traceback in terminal output, returns None without one"""
+        lines = output.splitlines()
+        for end in range(len(lines) - 1, -1, -1):
+            if cls.EXCEPTION.match(lines[end]):
+                break
+        else:
+            return None
+            
+        # Frames, their source lines and carets are indented, a syntax error has no header
+        start = end
+        while start > 0 and lines[start - 1][:1] in (' ', '\t'):
+            start -= 1
+        if start > 0 and lines[start - 1].startswith(cls.HEADER):
+            start -= 1
+        frames = [(match.group(1), int(match.group(2)))
+                  for match in map(cls.FRAME.match, lines[start:end]) if match]
+        if not frames:
+            return None
+        return cls(lines[start:end + 1], frames)
+        
+    def text(self):
+        """The traceback as sent to the AI"""
+        lines = self.lines
+        if len(lines) > self.MAX_LINES:
+            lines = lines[:self.HEAD_LINES] + ["  ..."] + lines[self.HEAD_LINES - self.MAX_LINES:]
+        return '\n'.join(lines)
+        
+    def line_in(self, file_path):
+        """Line number of the innermost frame in a file, or None"""
+        real_path = os.path.realpath(file_path)
+        for path, line in reversed(self.frames):
+            if os.path.realpath(path) == real_path or (not os.path.isabs(path) and
+                                                       real_path.endswith(os.sep + os.path.normpath(path))):
+                return line
+        return None
+        
+class VSCodeFixRegion:
+    """Lines of a file sent to AIFixer, the code around a failing line and the imports it uses"""
+    
+    DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    DEFINITION_LINE = re.compile(r'(\s*)(async\s+def|def|class)\b')
+    IMPORT_LINE = re.compile(r'(import|from)\s')
+    # Failing module-level code is sent with this many lines either side
+    WINDOW_LINES = 20
+    
+    def __init__(self, code, start, end, imports=""):
+        # Lines start to end, zero-based and exclusive, of the split code
+        self.start = start
+        self.end = end
+        self.code = '\n'.join(code.split('\n')[start:end])
+        self.imports = imports
+        
+    @classmethod
+    def whole(cls, code):
+        """Region covering all of the code"""
+        return cls(code, 0, code.count('\n') + 1)
+        
+    @classmethod
+    def around(cls, code, line):
+        """Region of the innermost function or class enclosing a one-based line"""
+        lines = code.split('\n')
+        if not 1 <= line <= len(lines):
+            return cls.whole(code)
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            tree = None
+        if tree is not None:
+            start, end = cls.enclosing_node(tree, line)
+            imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+        else:
+            start, end = cls.enclosing_block(lines, line)
+            imports = []
+            # Single-line imports at the top level are found without a parse of the whole file
+            for number, text in enumerate(lines, 1):
+                if cls.IMPORT_LINE.match(text):
+                    try:
+                        node = ast.parse(text).body[0]
+                    except SyntaxError:
+                        continue
+                    node.lineno = node.end_lineno = number
+                    imports.append(node)
+        if start is None:
+            start = max(0, line - 1 - cls.WINDOW_LINES)
+            end = min(len(lines), line + cls.WINDOW_LINES)
+            
+        # Only imports binding a name the region uses, or a star import, are worth sending
+        names = set(re.findall(r'\w+', '\n'.join(lines[start:end])))
+        used = []
+        for node in imports:
+            if start < node.lineno <= end:
+                continue
+            bound = [(alias.asname or alias.name).split('.')[0] for alias in node.names]
+            if '*' in bound or names.intersection(bound):
+                used.append('\n'.join(lines[node.lineno - 1:node.end_lineno]))
+        return cls(code, start, end, '\n'.join(used))
+        
+    @classmethod
+    def enclosing_node(cls, tree, line):
+        """Line range of the innermost definition around a line, or of the statements near it"""
+        best = None
+        for node in ast.walk(tree):
+            if isinstance(node, cls.DEFINITIONS):
+                first = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+                if first <= line <= node.end_lineno and (best is None or first > best[0]):
+                    best = (first, node.end_lineno)
+        if best is None:
+            # Module-level code, whole statements within the window around the line
+            near = [node for node in tree.body if node.lineno - cls.WINDOW_LINES <= line <= node.end_lineno + cls.WINDOW_LINES]
+            if not near:
+                return None, None
+            best = (min(node.lineno for node in near), max(node.end_lineno for node in near))
+        return best[0] - 1, best[1]
+        
+    @classmethod
+    def enclosing_block(cls, lines, line):
+        """Line range of the innermost def or class around a line of code that does not parse, by indentation"""
+        def indentation(text):
+            return len(text) - len(text.lstrip())
+            
+        limit = indentation(lines[line - 1]) + 1
+        start = None
+        for number in range(line - 1, -1, -1):
+            text = lines[number]
+            if not text.strip():
+                continue
+            match = cls.DEFINITION_LINE.match(text)
+            if match and len(match.group(1)) < limit:
+                start = number
+                break
+            # Leaving a nested block, only a definition outside it can enclose the line
+            limit = min(limit, indentation(text))
+            if limit == 0:
+                return None, None
+        if start is None:
+            return None, None
+            
+        base = indentation(lines[start])
+        end = start + 1
+        for number in range(start + 1, len(lines)):
+            text = lines[number]
+            if text.strip():
+                if indentation(text) <= base:
+                    break
+                end = number + 1
+        while start > 0 and lines[start - 1].lstrip().startswith('@'):
+            start -= 1
+        return start, end
+        
+    def diff_html(self, fixed_lines, partial=False):
+        """Render a fix of the region as a colored unified diff, a partial fix against as many lines"""
+        original = self.code.splitlines()
+        if partial:
+            original = original[:len(fixed_lines)]
+        colors = {'+': '#89d185', '-': '#f48771', '@': '#569cd6'}
+        html = []
+        for line in difflib.unified_diff(original, fixed_lines, "original", "fixed", lineterm=""):
+            if line.startswith('@@') and self.start:
+                # Hunks count from the start of the region, show line numbers of the file
+                line = re.sub(r'([-+])(\d+)', lambda match: f"{match.group(1)}{int(match.group(2)) + self.start}", line)
+            color = colors.get(line[:1], '#d4d4d4')
+            html.append(f'<span style="color: {color};">{html_escape(line)}</span>')
+        return f'<pre>{chr(10).join(html)}</pre>'
+        
+    def splice(self, code, fixed_code):
+        """The code with the region's lines replaced by a fix"""
+        lines = code.split('\n')
+        return '\n'.join(lines[:self.start] + [fixed_code] + lines[self.end:])
+        
+    def replace_in(self, document, fixed_code):
+        """Replace the region's lines of a document with a fix, as one undoable edit"""
+        first = document.findBlockByNumber(self.start)
+        last = document.findBlockByNumber(self.end - 1)
+        cursor = QTextCursor(document)
+        cursor.setPosition(first.position())
+        cursor.setPosition(last.position() + last.length() - 1, QTextCursor.MoveMode.KeepAnchor)
+        cursor.insertText(fixed_code)
+        
+    def fit(self, fixed_code):
+        """Give a fix the region's trailing newlines, and its indentation if it came back dedented"""
+        def first_indentation(text):
+            for line in text.split('\n'):
+                if line.strip():
+                    return line[:len(line) - len(line.lstrip())]
+            return ""
+            
+        code = self.code.rstrip('\n')
+        fixed_code = fixed_code.rstrip('\n')
+        indent = first_indentation(code)
+        current = first_indentation(fixed_code)
+        if len(current) < len(indent):
+            prefix = indent[len(current):]
+            fixed_code = '\n'.join(prefix + line if line.strip() else line for line in fixed_code.split('\n'))
+        return fixed_code + self.code[len(code):]
+        
+class VSCodeAIFixCache:
+    """Persistent LRU cache of AI fixes, keyed by the request that produced them"""
+    
+    # Least recently used fixes are evicted beyond this many bytes
+    MAX_BYTES = 20 * 1024 * 1024
+    # Fixes older than this are requested again
+    TTL = 7 * 24 * 3600
+    
+    def __init__(self, path=None):
+        self.path = path or os.path.join(VSCodeProjectIndex.CACHE_DIR, "ai-fixes.sqlite3")
+        # Fixes stream on several threads, they share one connection
+        self.lock = threading.Lock()
+        self.connection = None
+        self.hits = 0
+        self.misses = 0
+        
+    @staticmethod
+    def key(data):
+        """Hash everything in a chat completions request that shapes its answer"""
+        shaping = {name: data.get(name) for name in ("model", "messages", "temperature", "max_tokens")}
+        return hashlib.sha256(json.dumps(shaping, sort_keys=True).encode('utf-8')).hexdigest()
+        
+    def connect(self):
+        """Open the database on first use, returns None if it cannot be opened"""
+        if self.connection is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                connection = sqlite3.connect(self.path, timeout=1, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                with connection:
+                    connection.execute("CREATE TABLE IF NOT EXISTS fixes (key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                                       "size INTEGER NOT NULL, created REAL NOT NULL, used REAL NOT NULL)")
+                    connection.execute("CREATE INDEX IF NOT EXISTS fixes_used ON fixes (used)")
+                self.connection = connection
+            except (OSError, sqlite3.Error):
+                pass
+        return self.connection
+        
+    def get(self, key):
+        """Get a fresh cached fix, or None"""
+        with self.lock:
+            response = None
+            connection = self.connect()
+            if connection is not None:
+                now = time.time()
+                try:
+                    with connection:
+                        row = connection.execute("SELECT response FROM fixes WHERE key = ? AND created > ?",
+                                                 (key, now - self.TTL)).fetchone()
+                        if row is not None:
+                            response = row[0]
+                            connection.execute("UPDATE fixes SET used = ? WHERE key = ?", (now, key))
+                except sqlite3.Error:
+                    pass
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+            
+    def put(self, key, response):
+        """Cache a fix, evicting expired and then least recently used fixes"""
+        with self.lock:
+            connection = self.connect()
+            if connection is None:
+                return
+            now = time.time()
+            try:
+                with connection:
+                    connection.execute("INSERT OR REPLACE INTO fixes VALUES (?, ?, ?, ?, ?)",
+                                       (key, response, len(response.encode('utf-8')), now, now))
+                    connection.execute("DELETE FROM fixes WHERE created <= ?", (now - self.TTL,))
+                    total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM fixes").fetchone()[0]
+                    if total > self.MAX_BYTES:
+                        evicted = []
+                        for old_key, size in connection.execute("SELECT key, size FROM fixes ORDER BY used"):
+                            if total <= self.MAX_BYTES:
+                                break
+                            evicted.append((old_key,))
+                            total -= size
+                        connection.executemany("DELETE FROM fixes WHERE key = ?", evicted)
+            except sqlite3.Error:
+                pass
+                
+    def describe(self):
+        """Hit and miss counts of this session, for the UI"""
+        return f"AI cache: {self.hits} hit{'s' if self.hits != 1 else ''}, {self.misses} miss{'es' if self.misses != 1 else ''}"
+        
+class VSCodeAIFixService(QObject):
+    """Streams AI fixes on worker threads so the GUI never waits for the network"""
+    
+    # request generation, piece of fixed code
+    received = pyqtSignal(int, str)
+    # request generation, whole fixed code, finish reason ("length" if cut off by max_tokens)
+    finished = pyqtSignal(int, str, str)
+    # request generation, error message
+    failed = pyqtSignal(int, str)
+    
+    def __init__(self, fixer, parent=None):
+        super().__init__(parent)
+        self.fixer = fixer
+        self.lock = threading.Lock()
+        self.generation = 0
+        # Response of the request in flight, its socket is shut down to cancel it
+        self.response = None
+        # Set to cancel the request in flight while it waits to be retried
+        self.cancelled = threading.Event()
+        
+    def fix(self, code, error_message, language="python", context=""):
+        """Start fixing code, cancelling any request in flight, returns its generation"""
+        self.cancel()
+        with self.lock:
+            generation = self.generation
+            self.cancelled = threading.Event()
+        # A cancelled request may still be blocked reading, its own thread keeps it from delaying this one
+        threading.Thread(target=self.run, args=(generation, code, error_message, language, context,
+                                                self.cancelled),
+                         daemon=True).start()
+        return generation
+        
+    def cancel(self):
+        """Cancel the request in flight, if any"""
+        with self.lock:
+            self.generation += 1
+            response, self.response = self.response, None
+            self.cancelled.set()
+        if response is not None:
+            self.abort(response)
+            
+    @staticmethod
+    def abort(response):
+        """Wake a worker blocked reading a response, it closes the response itself"""
+        # Closing would wait for the worker's read to return, shutting the socket down ends it at once
+        sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+                
+    def on_response(self, generation, response):
+        """Remember the response of a request so it can be cancelled"""
+        with self.lock:
+            if generation == self.generation:
+                self.response = response
+                return
+        self.abort(response)
+        
+    def run(self, generation, code, error_message, language, context, cancelled):
+        """Stream one fix, dropping everything once it is cancelled"""
+        pieces = []
+        finish_reasons = [None]
+        try:
+            for piece in self.fixer.stream_fix(code, error_message, language,
+                                               lambda response: self.on_response(generation, response),
+                                               context=context, on_finish=finish_reasons.append,
+                                               cancel=cancelled):
+                if generation != self.generation:
+                    return
+                pieces.append(piece)
+                self.received.emit(generation, piece)
+        except Exception as e:
+            # stream_fix words its own failures, anything else is a network or protocol error
+            if generation == self.generation:
+                self.failed.emit(generation, str(e) if isinstance(e, RuntimeError) else f"Error: {str(e)}")
+            return
+        finally:
+            with self.lock:
+                if generation == self.generation:
+                    self.response = None
+        if generation == self.generation:
+            # Blank lines around the fix go, the indentation of its first line stays
+            self.finished.emit(generation, re.sub(r'\A(?:[ \t]*\n)+', '', ''.join(pieces).rstrip()),
+                               finish_reasons[-1] or "")
+            
+class VSCodeAIFixPreview(QDialog):
+    """Shows an AI fix as a diff while it streams in, and applies it on request"""
+    
+    # fixed code
+    applied = pyqtSignal(str)
+    
+    # Streamed pieces are batched into one diff refresh this often
+    REFRESH_MS = 100
+    
+    def __init__(self, service, editor, code, region=None, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self.editor = editor
+        # The whole document when the fix was requested, and the VSCodeFixRegion of it being fixed
+        self.code = code
+        self.region = region or VSCodeFixRegion.whole(code)
+        self.pieces = []
+        self.fixed_code = None
+        self.generation = None
+        self.service.received.connect(self.on_received)
+        self.service.finished.connect(self.on_finished)
+        self.service.failed.connect(self.on_failed)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh_diff)
+        self.setWindowTitle("AI Fix")
+        self.resize(800, 600)
+        self.setup_preview()
+        
+    def setup_preview(self):
+        """Setup the diff view and buttons"""
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #252526;
+            }
+            QLabel {
+                color: #cccccc;
+            }
+            QTextEdit {
+                background-color: #1e1e1e;
+                color: #d4d4d4;
+                border: 1px solid #3e3e42;
+                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+            }
+            QPushButton {
+                background-color: #0e639c;
+                color: white;
+                border: none;
+                padding: 6px 14px;
+            }
+            QPushButton:disabled {
+                background-color: #3c3c3c;
+                color: #808080;
+            }
+        """)
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel("🤖 AI is analyzing and fixing the code...")
+        layout.addWidget(self.status_label)
+        self.diff_view = QTextEdit()
+        self.diff_view.setReadOnly(True)
+        self.diff_view.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        layout.addWidget(self.diff_view)
+        buttons = QHBoxLayout()
+        self.cache_label = QLabel()
+        buttons.addWidget(self.cache_label)
+        buttons.addStretch()
+        self.apply_button = QPushButton("Apply")
+        self.apply_button.setEnabled(False)
+        self.apply_button.clicked.connect(self.apply_fix)
+        buttons.addWidget(self.apply_button)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.reject)
+        buttons.addWidget(self.cancel_button)
+        layout.addLayout(buttons)
+        
+    def start(self, error_message, language):
+        """Request the fix"""
+        self.generation = self.service.fix(self.region.code, error_message, language, self.region.imports)
+        if self.region.code != self.code:
+            self.status_label.setText(f"🤖 AI is fixing lines {self.region.start + 1}-{self.region.end}...")
+        self.show_cache_stats()
+        
+    def show_cache_stats(self):
+        """Show how often the fixer's cache answered"""
+        if self.service.fixer.cache is not None:
+            self.cache_label.setText(self.service.fixer.cache.describe())
+        
+    def on_received(self, generation, piece):
+        """Collect a streamed piece, the diff catches up on the next refresh"""
+        if generation != self.generation:
+            return
+        self.pieces.append(piece)
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start(self.REFRESH_MS)
+            
+    def on_finished(self, generation, fixed_code, finish_reason):
+        """Show the whole fix and let it be applied"""
+        if generation != self.generation:
+            return
+        self.generation = None
+        self.fixed_code = self.region.fit(fixed_code)
+        self.refresh_timer.stop()
+        self.refresh_diff()
+        self.show_cache_stats()
+        if finish_reason == 'length':
+            # Applying it would replace the code with the start of the fix
+            self.status_label.setText("⚠️ The fix was cut off at the AI's length limit and can't be applied, "
+                                      "the code to fix is too long")
+        elif self.fixed_code.strip() == self.region.code.strip():
+            self.status_label.setText("The AI made no changes")
+        else:
+            self.status_label.setText("✅ Review the fix, then apply it")
+            self.apply_button.setEnabled(True)
+        self.cancel_button.setText("Close")
+        
+    def on_failed(self, generation, message):
+        """Show why the fix failed"""
+        if generation != self.generation:
+            return
+        self.generation = None
+        self.refresh_timer.stop()
+        self.status_label.setText(f"❌ {message}")
+        self.show_cache_stats()
+        self.cancel_button.setText("Close")
+        
+    def refresh_diff(self):
+        """Render the diff between the code and the fix received so far"""
+        if self.fixed_code is not None:
+            self.diff_view.setHtml(self.region.diff_html(self.fixed_code.splitlines()))
+        else:
+            # Only complete lines are compared, the rest has not arrived yet
+            fixed = ''.join(self.pieces).splitlines()
+            if fixed and not self.pieces[-1].endswith('\n'):
+                fixed.pop()
+            self.diff_view.setHtml(self.region.diff_html(fixed, partial=True))
+        
+    def apply_fix(self):
+        """Replace the fixed lines of the editor's code, as one undoable edit"""
+        if self.editor.toPlainText() != self.code:
+            self.status_label.setText("The code changed since the fix was requested, run AI Fix again")
+            self.apply_button.setEnabled(False)
+            return
+        self.region.replace_in(self.editor.document(), self.fixed_code)
+        self.applied.emit(self.fixed_code)
+        self.accept()
+        
+    def reject(self):
+        """Cancel a fix still streaming and close"""
+        if self.generation is not None:
+            self.service.cancel()
+            self.generation = None
+        super().reject()
+        
+class VSCodeRateLimiter:
+    """Spaces out calls from any number of threads to at most a rate per second"""
+    
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+        
+    def wait(self, cancel=None):
+        """Block until the caller may go ahead, returns False if cancel, a threading.Event, is set first"""
+        cancel = cancel or threading.Event()
+        with self.lock:
+            # A cancelled caller must not hold up the ones after it
+            if cancel.is_set():
+                return False
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+        if slot > now and cancel.wait(slot - now):
+            with self.lock:
+                if self.next_time == slot + self.interval:
+                    self.next_time = slot
+            return False
+        return True
+            
+class VSCodeBatchFixItem:
+    """A file that does not compile, and the AI fix it got"""
+    
+    def __init__(self, path, traceback, code, newline, region):
+        self.path = path
+        self.error = traceback.text()
+        self.line = traceback.frames[-1][1]
+        # The file when it was checked, fixes are only applied to that version
+        self.code = code
+        self.newline = newline
+        self.region = region
+        self.fixed_code = None
+        self.message = ""
+        # queued, fixing, ready, failed, saving, applied or skipped
+        self.state = 'queued'
+        
+class VSCodeBatchFixService(QObject):
+    """Finds the files of a project that do not compile and fixes them with AIFixer, a few at a time"""
+    
+    # batch generation, [VSCodeBatchFixItem]
+    found = pyqtSignal(int, list)
+    # batch generation, item index, new state, fixed code or error message
+    updated = pyqtSignal(int, int, str, str)
+    # batch generation, error message if the files could not be checked
+    finished = pyqtSignal(int, str)
+    
+    MAX_CONCURRENT = 4
+    REQUESTS_PER_SECOND = 5.0
+    # Run by the interpreter to compile paths read from stdin without writing bytecode,
+    # printing each syntax error the way the interpreter reports it
+    CHECK_SCRIPT = (
+        "import sys, traceback\n"
+        "for path in sys.stdin.read().split('\\n'):\n"
+        "    try:\n"
+        "        with open(path, 'rb') as f:\n"
+        "            compile(f.read(), path, 'exec', dont_inherit=True)\n"
+        "    except SyntaxError as e:\n"
+        "        sys.stdout.write(''.join(traceback.format_exception_only(type(e), e)) + '\\0')\n"
+        "    except (OSError, ValueError):\n"
+        "        pass\n"
+    )
+    
+    def __init__(self, fixer, parent=None):
+        super().__init__(parent)
+        self.fixer = fixer
+        self.limiter = VSCodeRateLimiter(self.REQUESTS_PER_SECOND)
+        self.lock = threading.Lock()
+        self.generation = 0
+        # Responses of the requests in flight and the index of their item, their sockets
+        # are shut down to cancel the batch or skip the item
+        self.responses = {}
+        # One event per item of the batch, set when the item is skipped or the batch cancelled,
+        # it also stops the item's request waiting for its turn or to be retried
+        self.skipped = []
+        
+    def start(self, paths):
+        """Check and fix paths, cancelling any batch in progress, returns its generation"""
+        self.cancel()
+        with self.lock:
+            generation = self.generation
+        threading.Thread(target=self.run, args=(generation, paths), daemon=True).start()
+        return generation
+        
+    def cancel(self):
+        """Cancel the batch in progress, if any"""
+        with self.lock:
+            self.generation += 1
+            for skipped in self.skipped:
+                skipped.set()
+            responses, self.responses = self.responses, {}
+        for response in responses:
+            VSCodeAIFixService.abort(response)
+            
+    def skip(self, generation, index):
+        """Stop fixing one item of a batch"""
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.skipped[index].set()
+            responses = [response for response, item_index in self.responses.items() if item_index == index]
+            for response in responses:
+                del self.responses[response]
+        for response in responses:
+            VSCodeAIFixService.abort(response)
+            
+    def check(self, paths):
+        """Compile paths in another interpreter, returns an item for each file with a syntax error"""
+        environment = dict(os.environ, PYTHONIOENCODING='utf-8')
+        result = subprocess.run([sys.executable, '-c', self.CHECK_SCRIPT], input='\n'.join(paths),
+                                capture_output=True, text=True, encoding='utf-8', errors='replace',
+                                env=environment)
+        items = []
+        for report in result.stdout.split('\0'):
+            traceback = VSCodeTraceback.parse(report)
+            if traceback is None:
+                continue
+            path, line = traceback.frames[-1]
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    code = f.read()
+                    newline = f.newlines if isinstance(f.newlines, str) else '\n'
+            except (OSError, UnicodeDecodeError):
+                continue
+            items.append(VSCodeBatchFixItem(path, traceback, code, newline, VSCodeFixRegion.around(code, line)))
+        return items
+        
+    def run(self, generation, paths):
+        """Check the paths, then fix the failing files on a bounded pool"""
+        try:
+            items = self.check(paths)
+        except Exception as e:
+            if generation == self.generation:
+                self.finished.emit(generation, f"Could not check the files: {str(e)}")
+            return
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.skipped = [threading.Event() for item in items]
+            skipped = self.skipped
+        self.found.emit(generation, items)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT) as executor:
+            for index, item in enumerate(items):
+                executor.submit(self.fix_item, generation, index, item, skipped[index])
+        if generation == self.generation:
+            self.finished.emit(generation, "")
+            
+    def fix_item(self, generation, index, item, skipped):
+        """Fix one file unless skipped is set, items are only changed on the GUI thread through updated"""
+        if not self.limiter.wait(skipped) or generation != self.generation:
+            return
+        self.updated.emit(generation, index, 'fixing', "")
+        responses = []
+        
+        def remember(response):
+            with self.lock:
+                if generation == self.generation and not skipped.is_set():
+                    self.responses[response] = index
+                    responses.append(response)
+                    return
+            VSCodeAIFixService.abort(response)
+            
+        finish_reasons = [None]
+        try:
+            fixed_code = ''.join(self.fixer.stream_fix(item.region.code, item.error, "python", remember,
+                                                       context=item.region.imports,
+                                                       on_finish=finish_reasons.append, cancel=skipped))
+        except Exception as e:
+            if generation == self.generation and not skipped.is_set():
+                self.updated.emit(generation, index, 'failed',
+                                  str(e) if isinstance(e, RuntimeError) else f"Error: {str(e)}")
+            return
+        finally:
+            with self.lock:
+                for response in responses:
+                    self.responses.pop(response, None)
+        if generation != self.generation or skipped.is_set():
+            return
+        if finish_reasons[-1] == 'length':
+            self.updated.emit(generation, index, 'failed',
+                              "The fix was cut off at the AI's length limit, the code to fix is too long")
+            return
+        fixed_code = re.sub(r'\A(?:[ \t]*\n)+', '', fixed_code.rstrip())
+        self.updated.emit(generation, index, 'ready', item.region.fit(fixed_code))
+            
+class VSCodeBatchFixDialog(QDialog):
+    """Review queue of the fixes of a batch, each applied or skipped after looking at its diff"""
+    
+    STATE_ICONS = {'queued': '⏳', 'fixing': '🤖', 'ready': '📝', 'failed': '❌', 'saving': '💾',
+                   'applied': '✅', 'skipped': '⏭'}
+    
+    def __init__(self, service, main_window):
+        super().__init__(main_window)
+        self.service = service
+        self.main_window = main_window
+        self.items = []
+        self.generation = None
+        self.started = None
+        # VSCodeFileSaver threads writing applied fixes
+        self.savers = set()
+        self.service.found.connect(self.on_found)
+        self.service.updated.connect(self.on_updated)
+        self.service.finished.connect(self.on_finished)
+        self.setWindowTitle("Fix All Errors")
+        self.resize(1000, 650)
+        self.setup_queue()
+        
+    def setup_queue(self):
+        """Setup the file list, diff view and buttons"""
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #252526;
+            }
+            QLabel {
+                color: #cccccc;
+            }
+            QListWidget {
+                background-color: #252526;
+                color: #cccccc;
+                border: 1px solid #3e3e42;
+            }
+            QListWidget::item:selected {
+                background-color: #094771;
+            }
+            QTextEdit {
+                background-color: #1e1e1e;
+                color: #d4d4d4;
+                border: 1px solid #3e3e42;
+                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+            }
+            QPushButton {
+                background-color: #0e639c;
+                color: white;
+                border: none;
+                padding: 6px 14px;
+            }
+            QPushButton:disabled {
+                background-color: #3c3c3c;
+                color: #808080;
+            }
+        """)
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.item_list = QListWidget()
+        self.item_list.currentRowChanged.connect(self.show_item)
+        splitter.addWidget(self.item_list)
+        self.diff_view = QTextEdit()
+        self.diff_view.setReadOnly(True)
+        self.diff_view.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        splitter.addWidget(self.diff_view)
+        splitter.setSizes([300, 700])
+        layout.addWidget(splitter)
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        self.apply_button = QPushButton("Apply")
+        self.apply_button.clicked.connect(self.apply_selected)
+        buttons.addWidget(self.apply_button)
+        self.skip_button = QPushButton("Skip")
+        self.skip_button.clicked.connect(self.skip_selected)
+        buttons.addWidget(self.skip_button)
+        self.apply_all_button = QPushButton("Apply All Ready")
+        self.apply_all_button.clicked.connect(self.apply_all_ready)
+        buttons.addWidget(self.apply_all_button)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.reject)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+        self.update_buttons()
+        
+    def start(self, paths):
+        """Check paths and fix the files that fail"""
+        self.items = []
+        self.item_list.clear()
+        self.started = time.perf_counter()
+        self.status_label.setText(f"Checking {len(paths)} files...")
+        self.generation = self.service.start(paths)
+        
+    def on_found(self, generation, items):
+        """List the files that failed to compile"""
+        if generation != self.generation:
+            return
+        self.items = items
+        for item in items:
+            list_item = QListWidgetItem()
+            list_item.setToolTip(item.error)
+            self.item_list.addItem(list_item)
+        for index in range(len(items)):
+            self.show_state(index)
+        if items:
+            self.item_list.setCurrentRow(0)
+            self.status_label.setText(f"🤖 Fixing {len(items)} files...")
+        else:
+            self.status_label.setText("No syntax errors found")
+            
+    def on_updated(self, generation, index, state, text):
+        """Record the progress of one file's fix"""
+        if generation != self.generation:
+            return
+        item = self.items[index]
+        # The user's decision stands over the worker's late updates
+        if item.state in ('skipped', 'saving', 'applied'):
+            return
+        item.state = state
+        if state == 'ready':
+            item.fixed_code = text
+        else:
+            item.message = text
+        self.show_state(index)
+        if index == self.item_list.currentRow():
+            self.show_item(index)
+            
+    def on_finished(self, generation, error):
+        """Summarize the batch"""
+        if generation != self.generation:
+            return
+        self.generation = None
+        if error:
+            self.status_label.setText(f"❌ {error}")
+            self.update_buttons()
+            return
+        elapsed = time.perf_counter() - self.started
+        ready = sum(item.state == 'ready' for item in self.items)
+        failed = sum(item.state == 'failed' for item in self.items)
+        self.status_label.setText(f"{ready} fixes ready for review, {failed} failed, "
+                                  f"{len(self.items)} files in {elapsed:.1f}s")
+        self.update_buttons()
+        
+    def show_state(self, index):
+        """Refresh the list entry of an item"""
+        item = self.items[index]
+        root = self.main_window.sidebar.root_path
+        path = os.path.relpath(item.path, root) if root else item.path
+        self.item_list.item(index).setText(f"{self.STATE_ICONS[item.state]} {path}:{item.line}")
+        
+    def show_item(self, index):
+        """Show the diff, or the error, of the selected item"""
+        if 0 <= index < len(self.items):
+            item = self.items[index]
+            if item.fixed_code is not None and item.state != 'failed':
+                self.diff_view.setHtml(item.region.diff_html(item.fixed_code.splitlines()))
+            else:
+                text = item.error if not item.message else f"{item.error}\n\n{item.message}"
+                self.diff_view.setHtml(f'<pre>{html_escape(text)}</pre>')
+        self.update_buttons()
+        
+    def update_buttons(self):
+        """Enable the buttons that apply to the selection"""
+        row = self.item_list.currentRow()
+        item = self.items[row] if 0 <= row < len(self.items) else None
+        self.apply_button.setEnabled(item is not None and item.state == 'ready')
+        self.skip_button.setEnabled(item is not None and item.state in ('queued', 'fixing', 'ready', 'failed'))
+        self.apply_all_button.setEnabled(any(item.state == 'ready' for item in self.items))
+        
+    def apply_item(self, index):
+        """Apply a ready fix to the open editor of its file, or save it to the file in the background"""
+        item = self.items[index]
+        editor = self.main_window.find_editor(item.path)
+        if editor is not None:
+            if editor.toPlainText() != item.code:
+                item.message = "Not applied, the file changed since it was checked"
+            else:
+                item.region.replace_in(editor.document(), item.fixed_code)
+                item.message = "Applied in the editor, not saved yet"
+                item.state = 'applied'
+            self.show_state(index)
+            return
+            
+        try:
+            with open(item.path, 'r', encoding='utf-8') as f:
+                current = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            item.message = f"Not applied: {str(e)}"
+            return
+        if current != item.code:
+            item.message = "Not applied, the file changed since it was checked"
+            return
+        # Saved like an editor, atomically and keeping the file's mode and owner
+        saver = VSCodeFileSaver(item.path, item.region.splice(item.code, item.fixed_code), parent=self,
+                                newline=item.newline)
+        saver.saved.connect(lambda *args: self.on_fix_saved(saver, index, ""))
+        saver.save_failed.connect(lambda path, message: self.on_fix_saved(saver, index, message))
+        self.savers.add(saver)
+        item.state = 'saving'
+        self.show_state(index)
+        saver.start()
+        
+    def on_fix_saved(self, saver, index, error):
+        """Record the outcome of writing a fix to its file"""
+        self.savers.discard(saver)
+        saver.deleteLater()
+        item = self.items[index]
+        if error:
+            item.state = 'ready'
+            item.message = f"Not applied: {error}"
+        else:
+            item.state = 'applied'
+            item.message = ""
+        self.show_state(index)
+        if index == self.item_list.currentRow():
+            self.show_item(index)
+        if not self.savers:
+            applied = sum(item.state == 'applied' for item in self.items)
+            self.status_label.setText(f"✅ {applied} fixes applied")
+            
+    def apply_selected(self):
+        """Apply the selected fix"""
+        row = self.item_list.currentRow()
+        if 0 <= row < len(self.items) and self.items[row].state == 'ready':
+            self.apply_item(row)
+            self.show_item(row)
+            
+    def skip_selected(self):
+        """Leave the selected file as it is"""
+        row = self.item_list.currentRow()
+        if 0 <= row < len(self.items):
+            if self.generation is not None:
+                self.service.skip(self.generation, row)
+            self.items[row].state = 'skipped'
+            self.show_state(row)
+            self.show_item(row)
+            
+    def apply_all_ready(self):
+        """Apply every fix waiting for review"""
+        for index, item in enumerate(self.items):
+            if item.state == 'ready':
+                self.apply_item(index)
+        self.show_item(self.item_list.currentRow())
+        
+    def reject(self):
+        """Cancel a batch still running and close"""
+        if self.generation is not None:
+            self.service.cancel()
+            self.generation = None
+        # Fixes being written finish first, their threads belong to the dialog
+        for saver in list(self.savers):
+            saver.wait()
+        super().reject()
+        
 class VSCodeFileIcons:
     """Custom file type icons for VS Code-like appearance"""
     
@@ -261,6 +1402,8 @@ class VSCodeVirtualEnvManager:
                 
             if os.path.exists(activate_script):
                 self.current_venv = venv_path
+                # Source the script in the shell session so PATH and VIRTUAL_ENV persist
+                self.terminal.run_in_session(f'. "{activate_script}"')
                 self.terminal.terminal_output.append(f"✅ Activated virtual environment: {venv_path}")
                 return True
             else:
@@ -273,6 +1416,7 @@ class VSCodeVirtualEnvManager:
     def deactivate_venv(self):
         """Deactivate current virtual environment"""
         if self.current_venv:
+            self.terminal.run_in_session('type deactivate >/dev/null 2>&1 && deactivate')
             self.terminal.terminal_output.append(f"✅ Deactivated virtual environment: {self.current_venv}")
             self.current_venv = None
         else:
@@ -293,17 +1437,12 @@ class VSCodeVirtualEnvManager:
             cmd = f'"{pip_path}" install {package_name}'
             self.terminal.terminal_output.append(f"$ {cmd}")
             
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=60)
-            
-            if result.stdout:
-                self.terminal.terminal_output.append(result.stdout)
-            if result.stderr:
-                self.terminal.terminal_output.append(f"Error: {result.stderr}")
-            if result.returncode != 0:
-                self.terminal.terminal_output.append(f"Command exited with code {result.returncode}")
-            else:
-                self.terminal.terminal_output.append(f"✅ Successfully installed {package_name}")
-                
+            def report(exit_code):
+                if exit_code == 0:
+                    self.terminal.terminal_output.append(f"✅ Successfully installed {package_name}")
+                    
+            # Runs in the background so long installs don't freeze the IDE
+            self.terminal.run_command(cmd, report)
             return True
         except Exception as e:
             self.terminal.terminal_output.append(f"❌ Failed to install package: {str(e)}")
@@ -312,6 +1451,23 @@ class VSCodeVirtualEnvManager:
 class VSCodeSyntaxHighlighter(QSyntaxHighlighter):
     """Advanced syntax highlighter for VS Code-like highlighting"""
     
+    # Block states carried across lines for multi-line constructs
+    STATE_NORMAL = 0
+    STATE_TRIPLE_DOUBLE = 1
+    STATE_TRIPLE_SINGLE = 2
+    STATE_BLOCK_COMMENT = 3
+    STATE_TEMPLATE = 4
+    STATE_CODE_FENCE = 5
+    
+    # Closing delimiter for each multi-line state
+    STATE_CLOSERS = {
+        STATE_TRIPLE_DOUBLE: '"""',
+        STATE_TRIPLE_SINGLE: "'''",
+        STATE_BLOCK_COMMENT: '*/',
+        STATE_TEMPLATE: '`',
+        STATE_CODE_FENCE: '```',
+    }
+    
     def __init__(self, parent=None, language="python"):
         super().__init__(parent)
         self.language = language
@@ -365,101 +1521,368 @@ class VSCodeSyntaxHighlighter(QSyntaxHighlighter):
         self.italic_format.setFontItalic(True)
         
     def setup_rules(self):
-        """Setup language-specific highlighting rules"""
-        self.rules = []
+        """Setup the single-pass tokenizer for the current language"""
+        # Identifiers are classified with set lookups instead of one regex per word
+        self.keywords = set()
+        self.builtins = set()
+        # Keywords whose following identifier is a definition name
+        self.definers = {}
+        # Token groups that open a multi-line construct
+        self.state_openers = {}
+        self.token_formats = {
+            'comment': self.comment_format,
+            'string': self.string_format,
+            'number': self.number_format,
+        }
         
         if self.language == "python":
-            # Python keywords
-            python_keywords = [
+            self.keywords = {
                 'and', 'as', 'assert', 'break', 'class', 'continue', 'def',
                 'del', 'elif', 'else', 'except', 'finally', 'for', 'from',
                 'global', 'if', 'import', 'in', 'is', 'lambda', 'nonlocal',
                 'not', 'or', 'pass', 'raise', 'return', 'try', 'while',
                 'with', 'yield', 'True', 'False', 'None', 'self'
-            ]
-            
-            for word in python_keywords:
-                pattern = f'\\b{word}\\b'
-                self.rules.append((re.compile(pattern), self.keyword_format))
-            
-            # Python functions
-            python_functions = [
+            }
+            self.builtins = {
                 'print', 'len', 'range', 'str', 'int', 'float', 'list',
                 'dict', 'set', 'tuple', 'open', 'close', 'read', 'write'
-            ]
+            }
+            self.definers = {'def': self.function_format, 'class': self.class_format}
+            self.state_openers = {
+                'triple_double': self.STATE_TRIPLE_DOUBLE,
+                'triple_single': self.STATE_TRIPLE_SINGLE,
+            }
+            self.token_pattern = re.compile(r'''
+                (?P<comment>\#.*)
+                |(?P<triple_double>[rRbBuUfF]{0,2}""")
+                |(?P<triple_single>[rRbBuUfF]{0,2}\'\'\')
+                |(?P<string>[rRbBuUfF]{0,2}(?:"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?))
+                |(?P<number>\b\d+(?:\.\d+)?\b)
+                |(?P<ident>[A-Za-z_]\w*)
+            ''', re.VERBOSE)
             
-            for word in python_functions:
-                pattern = f'\\b{word}\\b'
-                self.rules.append((re.compile(pattern), self.function_format))
-                
         elif self.language == "javascript":
-            # JavaScript keywords
-            js_keywords = [
+            self.keywords = {
                 'break', 'case', 'catch', 'class', 'const', 'continue',
                 'debugger', 'default', 'delete', 'do', 'else', 'export',
                 'extends', 'finally', 'for', 'function', 'if', 'import',
                 'in', 'instanceof', 'let', 'new', 'return', 'super',
                 'switch', 'this', 'throw', 'try', 'typeof', 'var', 'void',
                 'while', 'with', 'yield', 'true', 'false', 'null', 'undefined'
-            ]
+            }
+            self.definers = {'function': self.function_format, 'class': self.class_format}
+            self.state_openers = {
+                'block_comment': self.STATE_BLOCK_COMMENT,
+                'template': self.STATE_TEMPLATE,
+            }
+            self.token_pattern = re.compile(r'''
+                (?P<comment>//.*)
+                |(?P<block_comment>/\*)
+                |(?P<template>`)
+                |(?P<string>"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?)
+                |(?P<number>\b\d+(?:\.\d+)?\b)
+                |(?P<ident>[A-Za-z_$][\w$]*)
+            ''', re.VERBOSE)
             
-            for word in js_keywords:
-                pattern = f'\\b{word}\\b'
-                self.rules.append((re.compile(pattern), self.keyword_format))
-                
         elif self.language == "markdown":
-            # Markdown headers
-            self.rules.append((re.compile(r'^#{1,6}\s+.*$', re.MULTILINE), self.header_format))
+            self.state_openers = {'code_fence': self.STATE_CODE_FENCE}
+            self.token_formats.update({
+                'header': self.header_format,
+                'code': self.string_format,
+                'bold': self.bold_format,
+                'italic': self.italic_format,
+                'link': self.function_format,
+            })
+            self.token_pattern = re.compile(r'''
+                (?P<code_fence>^\s*```)
+                |(?P<header>^\#{1,6}\s+.*)
+                |(?P<code>`[^`]*`)
+                |(?P<bold>\*\*.*?\*\*|__.*?__)
+                |(?P<italic>\*[^*]+\*|_[^_]+_)
+                |(?P<link>\[[^\]]+\]\([^)]+\))
+            ''', re.VERBOSE)
+            
+        else:
+            # Generic highlighting for plain text and unknown languages
+            self.state_openers = {'block_comment': self.STATE_BLOCK_COMMENT}
+            self.token_pattern = re.compile(r'''
+                (?P<comment>(?:\#|//).*)
+                |(?P<block_comment>/\*)
+                |(?P<string>"[^"]*"|'[^']*')
+                |(?P<number>\b\d+(?:\.\d+)?\b)
+            ''', re.VERBOSE)
             
-            # Markdown bold
-            self.rules.append((re.compile(r'\*\*(.*?)\*\*'), self.bold_format))
-            self.rules.append((re.compile(r'__(.*?)__'), self.bold_format))
+    def state_format(self, state):
+        """Get the format used for the body of a multi-line construct"""
+        if state == self.STATE_BLOCK_COMMENT:
+            return self.comment_format
+        return self.string_format
+        
+    def highlightBlock(self, text):
+        """Highlight a block of text in a single pass.
+        
+        Multi-line strings and comments are tracked through the block state, so
+        Qt only re-highlights following blocks when the carried state changes.
+        """
+        state = self.previousBlockState()
+        pos = 0
+        length = len(text)
+        
+        # Finish a construct left open by the previous block
+        if state > self.STATE_NORMAL:
+            close = text.find(self.STATE_CLOSERS[state])
+            if close == -1:
+                self.setFormat(0, length, self.state_format(state))
+                self.setCurrentBlockState(state)
+                return
+            pos = close + len(self.STATE_CLOSERS[state])
+            self.setFormat(0, pos, self.state_format(state))
             
-            # Markdown italic
-            self.rules.append((re.compile(r'\*(.*?)\*'), self.italic_format))
-            self.rules.append((re.compile(r'_(.*?)_'), self.italic_format))
+        pending_definition = None
+        while pos < length:
+            match = self.token_pattern.search(text, pos)
+            if not match:
+                break
+            kind = match.lastgroup
+            start, end = match.span()
             
-            # Markdown code blocks
-            self.rules.append((re.compile(r'`(.*?)`'), self.string_format))
-            self.rules.append((re.compile(r'```.*?```', re.DOTALL), self.string_format))
+            if kind in self.state_openers:
+                # Look for the closing delimiter on the same line
+                new_state = self.state_openers[kind]
+                close = text.find(self.STATE_CLOSERS[new_state], end)
+                if close == -1:
+                    self.setFormat(start, length - start, self.state_format(new_state))
+                    self.setCurrentBlockState(new_state)
+                    return
+                end = close + len(self.STATE_CLOSERS[new_state])
+                self.setFormat(start, end - start, self.state_format(new_state))
+            elif kind == 'ident':
+                word = match.group()
+                if pending_definition is not None:
+                    self.setFormat(start, end - start, pending_definition)
+                    pending_definition = None
+                elif word in self.keywords:
+                    self.setFormat(start, end - start, self.keyword_format)
+                    pending_definition = self.definers.get(word)
+                elif word in self.builtins:
+                    self.setFormat(start, end - start, self.function_format)
+            else:
+                self.setFormat(start, end - start, self.token_formats[kind])
+                pending_definition = None
+                
+            pos = end if end > start else start + 1
             
-            # Markdown links
-            self.rules.append((re.compile(r'\[([^\]]+)\]\([^)]+\)'), self.function_format))
-        
-        # Common patterns for all languages
-        # Strings (single and double quotes)
-        self.rules.append((re.compile(r'"[^"]*"'), self.string_format))
-        self.rules.append((re.compile(r"'[^']*'"), self.string_format))
+        self.setCurrentBlockState(self.STATE_NORMAL)
+
+class VSCodeFileLoader(QThread):
+    """Reads a large file through a memory map in chunks for progressive loading"""
+    
+    # text, bytes read so far
+    chunk_loaded = pyqtSignal(str, int)
+    load_failed = pyqtSignal(str)
+    
+    # A small first chunk gets the first screen up quickly
+    FIRST_CHUNK_SIZE = 256 * 1024
+    CHUNK_SIZE = 1024 * 1024
+    # Chunks read ahead of the GUI, bounds memory held in queued signals
+    MAX_CHUNKS_IN_FLIGHT = 2
+    
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.credits = threading.Semaphore(self.MAX_CHUNKS_IN_FLIGHT)
+        self.cancelled = False
+        # Set once every chunk was emitted, a failed or cancelled load stays incomplete
+        self.complete = False
+        
+    def acknowledge(self):
+        """Tell the loader the GUI consumed a chunk"""
+        self.credits.release()
+        
+    def cancel(self):
+        """Stop loading after the current chunk"""
+        self.cancelled = True
+        self.credits.release()
+        
+    def run(self):
+        """Decode the mapped file chunk by chunk"""
+        try:
+            with open(self.file_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                size = len(mapped)
+                decoder = codecs.getincrementaldecoder('utf-8')('replace')
+                pos = 0
+                chunk_size = self.FIRST_CHUNK_SIZE
+                carry = ""
+                while pos < size:
+                    self.credits.acquire()
+                    if self.cancelled:
+                        return
+                    data = mapped[pos:pos + chunk_size]
+                    pos += len(data)
+                    chunk_size = self.CHUNK_SIZE
+                    
+                    text = carry + decoder.decode(data, final=pos >= size)
+                    carry = ""
+                    # Keep a trailing \r until we know whether \n follows
+                    if text.endswith('\r') and pos < size:
+                        carry = '\r'
+                        text = text[:-1]
+                    self.chunk_loaded.emit(text.replace('\r\n', '\n'), pos)
+            self.complete = True
+        except (OSError, ValueError) as e:
+            self.load_failed.emit(str(e))
+            
+class VSCodeFileSaver(QThread):
+    """Writes a document snapshot to disk atomically in the background"""
+    
+    # path, content hash, file stat, whether the write was skipped, seconds taken
+    saved = pyqtSignal(str, str, object, bool, float)
+    # path, error message
+    save_failed = pyqtSignal(str, str)
+    
+    # New files get the usual permissions, the umask can only be read by setting it
+    UMASK = os.umask(0o022)
+    os.umask(UMASK)
+    
+    def __init__(self, file_path, text, saved_hash=None, saved_stat=None, parent=None, newline=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.text = text
+        self.saved_hash = saved_hash
+        self.saved_stat = saved_stat
+        # Line ending written for each \n, the platform's unless the file has its own
+        self.newline = newline or os.linesep
         
-        # Comments
-        self.rules.append((re.compile(r'#.*$'), self.comment_format))
-        self.rules.append((re.compile(r'//.*$'), self.comment_format))
-        self.rules.append((re.compile(r'/\*.*?\*/', re.DOTALL), self.comment_format))
+    @staticmethod
+    def encode_text(text, newline=os.linesep):
+        """Encode text the way it is written to disk"""
+        if newline != '\n':
+            text = text.replace('\n', newline)
+        return text.encode('utf-8')
         
-        # Numbers
-        self.rules.append((re.compile(r'\b\d+\b'), self.number_format))
-        self.rules.append((re.compile(r'\b\d+\.\d+\b'), self.number_format))
+    @staticmethod
+    def content_hash(data):
+        """Hash encoded document content"""
+        return hashlib.sha1(data).hexdigest()
         
-        # Function definitions
-        self.rules.append((re.compile(r'\bdef\s+(\w+)'), self.function_format))
-        self.rules.append((re.compile(r'\bfunction\s+(\w+)'), self.function_format))
+    @staticmethod
+    def file_stat(file_path):
+        """Identify the on-disk version of a file"""
+        st = os.stat(file_path)
+        return (st.st_mtime_ns, st.st_size)
+        
+    def is_unchanged(self, digest):
+        """Check the content and the file on disk still match the last save"""
+        if digest != self.saved_hash:
+            return False
+        try:
+            return self.file_stat(self.file_path) == self.saved_stat
+        except OSError:
+            return False
+            
+    @staticmethod
+    def copy_owner(temp_path, existing):
+        """Give the new file the owner of the one it replaces, returns False if not allowed"""
+        temp = os.stat(temp_path)
+        if (temp.st_uid, temp.st_gid) == (existing.st_uid, existing.st_gid) or not hasattr(os, 'chown'):
+            return True
+        try:
+            os.chown(temp_path, existing.st_uid, existing.st_gid)
+        except PermissionError:
+            return False
+        return True
         
-        # Class definitions
-        self.rules.append((re.compile(r'\bclass\s+(\w+)'), self.class_format))
+    @staticmethod
+    def write_in_place(target, data):
+        """Overwrite a file through its own inode, keeping its owner"""
+        with open(target, 'r+b') as f:
+            f.write(data)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            
+    def run(self):
+        """Encode, hash and atomically replace the target file"""
+        start = time.perf_counter()
+        data = self.encode_text(self.text, self.newline)
+        self.text = None
+        digest = self.content_hash(data)
+        if self.is_unchanged(digest):
+            self.saved.emit(self.file_path, digest, self.saved_stat, True,
+                            time.perf_counter() - start)
+            return
+            
+        # Replace the file a symlink points to, not the link
+        target = os.path.realpath(self.file_path)
+        directory = os.path.dirname(target)
+        temp_path = None
+        try:
+            try:
+                existing = os.stat(target)
+            except FileNotFoundError:
+                existing = None
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".basicide-",
+                                             suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # Keep the permissions and owner of the file being replaced
+            if existing is None:
+                os.chmod(temp_path, 0o666 & ~self.UMASK)
+            else:
+                os.chmod(temp_path, existing.st_mode & 0o7777)
+                if not self.copy_owner(temp_path, existing):
+                    # Only the owner can hand a file over, write in place instead
+                    os.remove(temp_path)
+                    temp_path = None
+                    self.write_in_place(target, data)
+            if temp_path is not None:
+                os.replace(temp_path, target)
+                temp_path = None
+            # Make the rename itself durable
+            if hasattr(os, 'O_DIRECTORY'):
+                dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            stat = self.file_stat(self.file_path)
+        except OSError as e:
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            self.save_failed.emit(self.file_path, str(e))
+            return
+            
+        self.saved.emit(self.file_path, digest, stat, False, time.perf_counter() - start)
         
-    def highlightBlock(self, text):
-        """Highlight a block of text"""
-        for pattern, format in self.rules:
-            for match in pattern.finditer(text):
-                start, end = match.span()
-                self.setFormat(start, end - start, format)
-
 class VSCodeEditor(QPlainTextEdit):
     """VS Code-like text editor with line numbers"""
     
-    def __init__(self, parent=None, file_path=None):
+    # bytes loaded, total bytes
+    loading_progress = pyqtSignal(int, int)
+    loading_finished = pyqtSignal()
+    
+    def __init__(self, parent=None, file_path=None, large_file=False):
         super().__init__(parent)
         self.file_path = file_path
+        # Large files load progressively and are not syntax highlighted
+        self.large_file = large_file
+        self.loading = False
+        self.loader = None
+        # Set when a progressive load stopped early, the document is only the start of the file
+        self.partial = False
+        # Content hash and file stat of the last load or save, to skip no-op saves
+        self.saved_hash = None
+        self.saved_stat = None
+        self.saver = None
+        self.save_pending = None
+        # Document revision and content hash of the last analysis request
+        self.analysis_revision = None
         self.setup_editor()
         
     def setup_editor(self):
@@ -497,27 +1920,719 @@ class VSCodeEditor(QPlainTextEdit):
         else:
             language = "text"
             
-        self.highlighter = VSCodeSyntaxHighlighter(self.document(), language)
+        if self.large_file:
+            self.highlighter = None
+        else:
+            self.highlighter = VSCodeSyntaxHighlighter(self.document(), language)
         
         # Set tab width
         self.setTabStopDistance(self.fontMetrics().horizontalAdvance(' ') * 4)
+        
+    def load_progressively(self):
+        """Load the file in chunks from a background reader"""
+        self.loading = True
+        self.total_size = os.path.getsize(self.file_path)
+        # Read-only until complete so a partial document can't be edited or saved
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        
+        self.loader = VSCodeFileLoader(self.file_path, self)
+        self.loader.chunk_loaded.connect(self.on_chunk_loaded)
+        self.loader.load_failed.connect(self.on_load_failed)
+        self.loader.finished.connect(self.on_loading_finished)
+        self.loader.start()
+        
+    def on_chunk_loaded(self, text, bytes_read):
+        """Append a chunk at the end without moving the view"""
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        self.loader.acknowledge()
+        self.loading_progress.emit(bytes_read, self.total_size)
+        
+    def on_load_failed(self, message):
+        """Show why the file could not be loaded"""
+        QMessageBox.critical(self, "Error", f"Could not open file: {message}")
+        
+    def on_loading_finished(self):
+        """Make the document editable once fully loaded"""
+        complete = self.loader.complete
+        self.loading = False
+        self.loader = None
+        if not complete:
+            # Saving the part that was read would truncate the file, keep it read-only
+            self.partial = True
+            self.loading_finished.emit()
+            return
+        try:
+            self.saved_stat = VSCodeFileSaver.file_stat(self.file_path)
+        except OSError:
+            pass
+        self.setReadOnly(False)
+        self.setUndoRedoEnabled(True)
+        self.document().setModified(False)
+        self.loading_finished.emit()
+        
+    def cancel_loading(self):
+        """Stop a progressive load, e.g. when the tab is closed"""
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader.wait()
 
-class VSCodePreview(QWidget):
-    """Preview widget for Markdown and HTML files"""
+class VSCodeLineIndex:
+    """Byte offsets of every line start in a file, persisted for fast reopen"""
     
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setup_preview()
-        
-    def setup_preview(self):
-        """Setup the preview widget"""
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
+    MAGIC = b'BIDXLN01'
+    # The first bytes identify the file, so rotated logs are reindexed
+    HEAD_SIZE = 4096
+    CHUNK_SIZE = 16 * 1024 * 1024
+    
+    def __init__(self, file_path):
+        self.file_path = os.path.abspath(file_path)
+        self.offsets = array('q', [0])
+        # Bytes scanned so far, offsets are complete up to here
+        self.indexed_size = 0
+        self.head_hash = b''
+        
+    def cache_path(self):
+        """Get the cache file used for this log file"""
+        key = hashlib.sha1(self.file_path.encode('utf-8')).hexdigest()
+        return os.path.join(VSCodeProjectIndex.CACHE_DIR, f"lines-{key}.idx")
+        
+    def head_digest(self, mapped):
+        """Fingerprint the start of the file"""
+        return hashlib.sha1(mapped[:self.HEAD_SIZE]).digest()
+        
+    def load_cache(self, mapped):
+        """Load a persisted index if it still describes the start of this file"""
+        try:
+            with open(self.cache_path(), 'rb') as f:
+                magic, indexed_size, head_hash = struct.unpack('<8sq20s', f.read(36))
+                if (magic != self.MAGIC or indexed_size > len(mapped) or
+                        head_hash != self.head_digest(mapped[:indexed_size])):
+                    return False
+                offsets = array('q')
+                offsets.frombytes(f.read())
+        except (OSError, struct.error, ValueError):
+            return False
+            
+        self.offsets = offsets
+        self.indexed_size = indexed_size
+        self.head_hash = head_hash
+        return True
         
-        # Header
-        header = QWidget()
-        header_layout = QHBoxLayout(header)
-        header_layout.setContentsMargins(8, 4, 8, 4)
+    def save_cache(self, mapped):
+        """Persist the index next to the other BasicIDE caches"""
+        try:
+            os.makedirs(VSCodeProjectIndex.CACHE_DIR, exist_ok=True)
+            temp_path = self.cache_path() + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(struct.pack('<8sq20s', self.MAGIC, self.indexed_size,
+                                    self.head_digest(mapped[:self.indexed_size])))
+                self.offsets.tofile(f)
+            os.replace(temp_path, self.cache_path())
+        except OSError:
+            pass
+            
+    def extend(self, mapped, should_stop=None, progress=None):
+        """Index lines from the last indexed byte to the end of the mapping"""
+        size = len(mapped)
+        pos = self.indexed_size
+        while pos < size:
+            if should_stop and should_stop():
+                return False
+            chunk = mapped[pos:pos + self.CHUNK_SIZE]
+            parts = chunk.split(b'\n')
+            # Every part but the last ends in a newline, the next line starts after it
+            starts = accumulate([len(part) + 1 for part in parts[:-1]], initial=pos)
+            next(starts)
+            self.offsets.extend(starts)
+            pos += len(chunk)
+            self.indexed_size = pos
+            if progress:
+                progress(pos, size)
+        return True
+        
+    def line_count(self, size):
+        """Number of lines in a file of the given size, ignoring a final empty line"""
+        count = len(self.offsets)
+        if count > 1 and self.offsets[-1] >= size:
+            count -= 1
+        return count
+        
+class VSCodeLineIndexer(QThread):
+    """Builds a line index for a huge file in the background"""
+    
+    # bytes indexed, total bytes
+    progress = pyqtSignal(int, int)
+    
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.cancelled = False
+        self.last_report = 0
+        
+    def cancel(self):
+        """Stop indexing after the current chunk"""
+        self.cancelled = True
+        
+    def report(self, done, total):
+        """Emit progress at most every 100 ms"""
+        now = time.monotonic()
+        if now - self.last_report >= 0.1 or done >= total:
+            self.last_report = now
+            self.progress.emit(done, total)
+            
+    def run(self):
+        """Index the file through a private memory map"""
+        try:
+            with open(self.index.file_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if self.index.extend(mapped, lambda: self.cancelled, self.report):
+                    self.index.save_cache(mapped)
+        except (OSError, ValueError):
+            pass
+            
+class VSCodeLogViewer(QAbstractScrollArea):
+    """Read-only viewer for huge files that only materializes the visible lines"""
+    
+    # bytes indexed, total bytes
+    indexing_progress = pyqtSignal(int, int)
+    indexing_finished = pyqtSignal()
+    
+    # How often a growing file is checked for new lines
+    FOLLOW_INTERVAL_MS = 500
+    # Very long lines are cut when drawn
+    MAX_LINE_CHARS = 4000
+    
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.large_file = True
+        self.file = None
+        self.mapped = None
+        self.indexer = None
+        self.text_width = 0
+        
+        font_family = "Monaco" if sys.platform == "darwin" else "Consolas"
+        font = QFont(font_family, 13)
+        font.setFixedPitch(True)
+        self.setFont(font)
+        self.viewport().setStyleSheet("background-color: #1e1e1e;")
+        self.line_height = self.fontMetrics().lineSpacing()
+        self.gutter_width = self.fontMetrics().horizontalAdvance('0' * 12)
+        self.verticalScrollBar().setSingleStep(1)
+        
+        self.follow_timer = QTimer(self)
+        self.follow_timer.setInterval(self.FOLLOW_INTERVAL_MS)
+        self.follow_timer.timeout.connect(self.poll_file)
+        
+        self.open_file()
+        
+    def open_file(self):
+        """Map the file and start indexing whatever the cached index doesn't cover"""
+        self.file = open(self.file_path, 'rb')
+        self.mapped = self.map_file()
+        self.index = VSCodeLineIndex(self.file_path)
+        self.index.load_cache(self.mapped)
+        self.update_scrollbars()
+        self.start_indexing()
+        self.follow_timer.start()
+        
+    def map_file(self):
+        """Map the open file, an empty file can't be mapped and reads as no bytes"""
+        if os.fstat(self.file.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+    def release_map(self):
+        """Close the current memory map, if the file had one"""
+        if isinstance(self.mapped, mmap.mmap):
+            self.mapped.close()
+            
+    def start_indexing(self):
+        """Index the rest of the file in the background"""
+        if self.index.indexed_size >= len(self.mapped):
+            self.indexing_finished.emit()
+            return
+        self.indexer = VSCodeLineIndexer(self.index, self)
+        self.indexer.progress.connect(self.on_indexing_progress)
+        self.indexer.finished.connect(self.on_indexing_finished)
+        self.indexer.start()
+        
+    def on_indexing_progress(self, done, total):
+        """Let the user scroll through the part indexed so far"""
+        self.update_scrollbars()
+        self.viewport().update()
+        self.indexing_progress.emit(done, total)
+        
+    def on_indexing_finished(self):
+        """Show the complete file once every line is indexed"""
+        self.indexer = None
+        self.update_scrollbars()
+        self.viewport().update()
+        self.indexing_finished.emit()
+        
+    def line_count(self):
+        """Number of lines indexed so far"""
+        return self.index.line_count(len(self.mapped))
+        
+    def line_text(self, line_number):
+        """Decode a single line from the mapped file"""
+        offsets = self.index.offsets
+        start = offsets[line_number]
+        if line_number + 1 < len(offsets):
+            end = offsets[line_number + 1] - 1
+        else:
+            end = len(self.mapped)
+        end = min(end, start + self.MAX_LINE_CHARS * 4)
+        text = self.mapped[start:end].decode('utf-8', 'replace').rstrip('\r\n')
+        return text[:self.MAX_LINE_CHARS]
+        
+    def visible_lines(self):
+        """Number of lines that fit in the viewport"""
+        return max(1, self.viewport().height() // self.line_height)
+        
+    def is_at_end(self):
+        """Check whether the view shows the last line, which enables tail-follow"""
+        scrollbar = self.verticalScrollBar()
+        return scrollbar.value() >= scrollbar.maximum()
+        
+    def update_scrollbars(self):
+        """Size the scroll bars to the indexed lines and widest visible line"""
+        page = self.visible_lines()
+        vertical = self.verticalScrollBar()
+        vertical.setPageStep(page)
+        vertical.setRange(0, max(0, self.line_count() - page))
+        horizontal = self.horizontalScrollBar()
+        horizontal.setPageStep(self.viewport().width())
+        horizontal.setRange(0, max(0, self.text_width + self.gutter_width - self.viewport().width()))
+        
+    def paintEvent(self, event):
+        """Draw only the lines inside the viewport"""
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(), QColor("#1e1e1e"))
+        metrics = self.fontMetrics()
+        first = self.verticalScrollBar().value()
+        x_offset = self.horizontalScrollBar().value()
+        count = self.line_count()
+        
+        widest = self.text_width
+        for row in range(self.visible_lines() + 1):
+            line_number = first + row
+            if line_number >= count:
+                break
+            y = row * self.line_height + metrics.ascent()
+            text = self.line_text(line_number)
+            widest = max(widest, metrics.horizontalAdvance(text))
+            
+            painter.setPen(QColor("#d4d4d4"))
+            painter.drawText(self.gutter_width - x_offset, y, text)
+            painter.fillRect(0, row * self.line_height, self.gutter_width - 8, self.line_height,
+                             QColor("#1e1e1e"))
+            painter.setPen(QColor("#858585"))
+            painter.drawText(0, y, str(line_number + 1).rjust(10))
+        painter.end()
+        
+        if widest != self.text_width:
+            self.text_width = widest
+            self.update_scrollbars()
+            
+    def resizeEvent(self, event):
+        """Recompute the scroll range for the new viewport size"""
+        super().resizeEvent(event)
+        self.update_scrollbars()
+        
+    def scrollContentsBy(self, dx, dy):
+        """Repaint instead of scrolling pixels, the lines are drawn on demand"""
+        self.viewport().update()
+        
+    def keyPressEvent(self, event):
+        """Navigate with the usual keys, End also starts following the tail"""
+        scrollbar = self.verticalScrollBar()
+        key = event.key()
+        if key == Qt.Key.Key_Down:
+            scrollbar.setValue(scrollbar.value() + 1)
+        elif key == Qt.Key.Key_Up:
+            scrollbar.setValue(scrollbar.value() - 1)
+        elif key == Qt.Key.Key_PageDown:
+            scrollbar.setValue(scrollbar.value() + scrollbar.pageStep())
+        elif key == Qt.Key.Key_PageUp:
+            scrollbar.setValue(scrollbar.value() - scrollbar.pageStep())
+        elif key == Qt.Key.Key_Home:
+            scrollbar.setValue(0)
+        elif key == Qt.Key.Key_End:
+            scrollbar.setValue(scrollbar.maximum())
+        else:
+            super().keyPressEvent(event)
+            
+    def poll_file(self):
+        """Pick up lines appended to a growing file, following the tail if at the end"""
+        try:
+            size = os.path.getsize(self.file_path)
+        except OSError:
+            return
+        if size == len(self.mapped) or self.indexer is not None:
+            return
+            
+        following = self.is_at_end()
+        # Map the new size before dropping the old map, which paintEvent keeps using on failure
+        try:
+            mapped = self.map_file()
+        except (OSError, ValueError):
+            return
+        self.release_map()
+        self.mapped = mapped
+        if len(mapped) < self.index.indexed_size:
+            # Truncated or rotated, start over
+            self.index = VSCodeLineIndex(self.file_path)
+            self.start_indexing()
+        else:
+            self.index.extend(self.mapped)
+            
+        self.update_scrollbars()
+        if following:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        self.viewport().update()
+        
+    def toPlainText(self):
+        """Get the visible lines, the whole file is never materialized"""
+        first = self.verticalScrollBar().value()
+        last = min(first + self.visible_lines(), self.line_count())
+        return '\n'.join(self.line_text(i) for i in range(first, last))
+        
+    def close_viewer(self):
+        """Stop background work and release the memory map"""
+        self.follow_timer.stop()
+        if self.indexer is not None:
+            self.indexer.cancel()
+            self.indexer.wait()
+            self.indexer = None
+        if self.mapped is not None:
+            self.index.save_cache(self.mapped)
+            self.release_map()
+            self.mapped = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            
+class VSCodeMarkdownRenderer:
+    """Block-based Markdown to HTML renderer with a per-block LRU cache"""
+    
+    # Rendered blocks kept for reuse between renders of the same document
+    MAX_CACHED_BLOCKS = 4096
+    
+    HEADER_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+    RULE_PATTERN = re.compile(r'^\s{0,3}([-*_])(?:\s*\1){2,}\s*$')
+    UNORDERED_PATTERN = re.compile(r'^\s{0,3}[-*+]\s+(.*)$')
+    ORDERED_PATTERN = re.compile(r'^\s{0,3}\d+[.)]\s+(.*)$')
+    QUOTE_PATTERN = re.compile(r'^\s{0,3}>\s?(.*)$')
+    FENCE_PATTERN = re.compile(r'^\s{0,3}(```|~~~)')
+    # Lines starting with anything else can only be paragraph text
+    BLOCK_START_CHARS = frozenset('#-*_+>`~0123456789')
+    
+    CODE_SPAN_PATTERN = re.compile(r'`([^`]+)`')
+    BOLD_PATTERN = re.compile(r'\*\*(.+?)\*\*|(?<!\w)__(.+?)__(?!\w)')
+    ITALIC_PATTERN = re.compile(r'\*(?!\s)(.+?)(?<!\s)\*|(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)')
+    LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+    
+    HTML_TEMPLATE = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <style>
+                body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; margin: 20px; line-height: 1.6; }}
+                code {{ background-color: #f6f8fa; padding: 2px 4px; border-radius: 3px; font-family: 'Monaco', 'Consolas', monospace; }}
+                pre {{ background-color: #f6f8fa; padding: 16px; border-radius: 6px; overflow-x: auto; }}
+                h1, h2, h3, h4, h5, h6 {{ color: #24292e; margin-top: 24px; margin-bottom: 16px; }}
+                a {{ color: #0366d6; text-decoration: none; }}
+                a:hover {{ text-decoration: underline; }}
+                strong {{ font-weight: 600; }}
+                em {{ font-style: italic; }}
+                blockquote {{ color: #6a737d; border-left: 4px solid #dfe2e5; padding-left: 16px; margin-left: 0; }}
+            </style>
+        </head>
+        <body>
+            {body}
+        </body>
+        </html>
+        """
+    
+    def __init__(self, max_cached_blocks=MAX_CACHED_BLOCKS):
+        self.max_cached_blocks = max_cached_blocks
+        # (kind, source) -> html, ordered from least to most recently used
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Last rendered document and its (start, kind, source, html) blocks
+        self.text = None
+        self.blocks = []
+        
+    def render(self, markdown_text):
+        """Render a whole document, re-splitting and re-rendering only edited blocks"""
+        self.blocks = self.update_blocks(markdown_text)
+        self.text = markdown_text
+        return self.HTML_TEMPLATE.format(body='\n'.join(block[3] for block in self.blocks))
+        
+    @staticmethod
+    def common_prefix_length(a, b):
+        """Length of the common prefix, found by bisecting with C-level slice compares"""
+        low, high = 0, min(len(a), len(b))
+        while low < high:
+            mid = (low + high + 1) // 2
+            if a[:mid] == b[:mid]:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+        
+    @staticmethod
+    def common_suffix_length(a, b, limit):
+        """Length of the common suffix, at most limit characters"""
+        low, high = 0, limit
+        while low < high:
+            mid = (low + high + 1) // 2
+            if a[len(a) - mid:] == b[len(b) - mid:]:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+        
+    def update_blocks(self, text):
+        """Get (start, kind, source, html) blocks, reusing those outside the edited range"""
+        old_text, old_blocks = self.text, self.blocks
+        if old_text is None or not old_blocks:
+            return self.scan_blocks(text, 0)[0]
+        if old_text == text:
+            return old_blocks
+            
+        prefix = self.common_prefix_length(old_text, text)
+        suffix = self.common_suffix_length(old_text, text, min(len(old_text), len(text)) - prefix)
+        old_end = len(old_text) - suffix
+        delta = len(text) - len(old_text)
+        
+        # Start one block early since an edit can merge a block with the previous one
+        starts = [block[0] for block in old_blocks]
+        first = max(bisect.bisect_right(starts, prefix) - 2, 0)
+        # Old blocks starting after the edit are valid again once scanning reaches them
+        tail = bisect.bisect_right(starts, old_end)
+        sync = {starts[j] + delta: j for j in range(tail, len(old_blocks))}
+        
+        middle, resume = self.scan_blocks(text, old_blocks[first][0] if first else 0, sync)
+        if resume is None:
+            return old_blocks[:first] + middle
+        shifted = [(start + delta, kind, source, html)
+                   for start, kind, source, html in old_blocks[resume:]]
+        return old_blocks[:first] + middle + shifted
+        
+    def starts_block(self, line):
+        """Check whether a line starts a block other than a paragraph"""
+        if line.lstrip()[:1] not in self.BLOCK_START_CHARS:
+            return False
+        return bool(self.HEADER_PATTERN.match(line) or self.FENCE_PATTERN.match(line) or
+                    self.RULE_PATTERN.match(line) or self.UNORDERED_PATTERN.match(line) or
+                    self.ORDERED_PATTERN.match(line) or self.QUOTE_PATTERN.match(line))
+                    
+    def scan_blocks(self, text, pos, sync=None):
+        """Split text into rendered blocks from pos.
+        
+        Stops when a block would start at an offset in sync and returns the
+        mapped old block index, so the rest of the old blocks can be reused.
+        """
+        blocks = []
+        length = len(text)
+        
+        def next_line(p):
+            end = text.find('\n', p)
+            return end if end != -1 else length
+            
+        while pos < length:
+            if sync and pos in sync:
+                return blocks, sync[pos]
+            end = next_line(pos)
+            line = text[pos:end]
+            if not line.strip():
+                pos = end + 1
+                continue
+                
+            start = pos
+            fence = self.FENCE_PATTERN.match(line) if self.starts_block(line) else None
+            if fence:
+                # A fence runs to the matching closing fence or the end of the document
+                kind = 'code'
+                pos = end + 1
+                while pos < length:
+                    end = next_line(pos)
+                    if text[pos:end].lstrip().startswith(fence.group(1)):
+                        break
+                    pos = end + 1
+            elif not self.starts_block(line):
+                kind = 'paragraph'
+                while end + 1 < length:
+                    following_end = next_line(end + 1)
+                    following = text[end + 1:following_end]
+                    if not following.strip() or self.starts_block(following):
+                        break
+                    end = following_end
+            elif self.HEADER_PATTERN.match(line):
+                kind = 'header'
+            elif self.RULE_PATTERN.match(line):
+                kind = 'rule'
+            elif self.QUOTE_PATTERN.match(line):
+                kind = 'quote'
+                while end + 1 < length:
+                    following_end = next_line(end + 1)
+                    if not self.QUOTE_PATTERN.match(text[end + 1:following_end]):
+                        break
+                    end = following_end
+            else:
+                pattern = self.UNORDERED_PATTERN if self.UNORDERED_PATTERN.match(line) else self.ORDERED_PATTERN
+                kind = 'ul' if pattern is self.UNORDERED_PATTERN else 'ol'
+                while end + 1 < length:
+                    following_end = next_line(end + 1)
+                    following = text[end + 1:following_end]
+                    if not pattern.match(following) or self.RULE_PATTERN.match(following):
+                        break
+                    end = following_end
+                    
+            end = min(end, length)
+            source = text[start:end]
+            blocks.append((start, kind, source, self.render_block(kind, source)))
+            pos = end + 1
+        return blocks, None
+        
+    def render_block(self, kind, source):
+        """Get the HTML for one block, from the cache when its source is unchanged"""
+        key = (kind, source)
+        html = self.cache.get(key)
+        if html is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return html
+            
+        self.misses += 1
+        html = getattr(self, f"render_{kind}")(source)
+        self.cache[key] = html
+        if len(self.cache) > self.max_cached_blocks:
+            self.cache.popitem(last=False)
+        return html
+        
+    def render_inline(self, text):
+        """Render inline formatting, code spans are left untouched"""
+        code_spans = []
+        
+        def stash_code(match):
+            code_spans.append(f"<code>{html_escape(match.group(1))}</code>")
+            return f"\x00{len(code_spans) - 1}\x00"
+            
+        text = self.CODE_SPAN_PATTERN.sub(stash_code, text)
+        text = self.BOLD_PATTERN.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+        text = self.ITALIC_PATTERN.sub(lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+        text = self.LINK_PATTERN.sub(r'<a href="\2">\1</a>', text)
+        return re.sub(r'\x00(\d+)\x00', lambda m: code_spans[int(m.group(1))], text)
+        
+    def render_code(self, source):
+        """Render a fenced code block without any inline formatting"""
+        lines = source.split('\n')
+        fence = self.FENCE_PATTERN.match(lines[0]).group(1)
+        body = lines[1:]
+        if body and body[-1].lstrip().startswith(fence):
+            body = body[:-1]
+        return f"<pre><code>{html_escape(chr(10).join(body))}</code></pre>"
+        
+    def render_header(self, source):
+        """Render an ATX header"""
+        match = self.HEADER_PATTERN.match(source)
+        level = len(match.group(1))
+        return f"<h{level}>{self.render_inline(match.group(2))}</h{level}>"
+        
+    def render_rule(self, source):
+        """Render a horizontal rule"""
+        return "<hr>"
+        
+    def render_list(self, source, pattern, tag):
+        """Render list items matched by pattern inside tag"""
+        items = ''.join(f"<li>{self.render_inline(pattern.match(line).group(1))}</li>"
+                        for line in source.split('\n'))
+        return f"<{tag}>{items}</{tag}>"
+        
+    def render_ul(self, source):
+        """Render an unordered list"""
+        return self.render_list(source, self.UNORDERED_PATTERN, 'ul')
+        
+    def render_ol(self, source):
+        """Render an ordered list"""
+        return self.render_list(source, self.ORDERED_PATTERN, 'ol')
+        
+    def render_quote(self, source):
+        """Render a block quote"""
+        lines = [self.QUOTE_PATTERN.match(line).group(1) for line in source.split('\n')]
+        return f"<blockquote>{self.render_inline('<br>'.join(lines))}</blockquote>"
+        
+    def render_paragraph(self, source):
+        """Render a paragraph, keeping its line breaks"""
+        return f"<p>{self.render_inline('<br>'.join(source.split(chr(10))))}</p>"
+        
+class VSCodePreviewRenderer(QObject):
+    """Renders preview HTML on a worker thread, only the newest request is kept"""
+    
+    # generation, is_html, text
+    rendered = pyqtSignal(int, bool, str)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.condition = threading.Condition()
+        self.job = None
+        # Only used from the worker thread, keeps unchanged blocks between renders
+        self.markdown = VSCodeMarkdownRenderer()
+        # Daemon thread so a pending render never holds up shutdown
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        
+    def submit(self, generation, content, file_type):
+        """Queue a render, replacing any request that has not started yet"""
+        with self.condition:
+            self.job = (generation, content, file_type)
+            self.condition.notify()
+            
+    def run(self):
+        """Render queued requests until the application exits"""
+        while True:
+            with self.condition:
+                while self.job is None:
+                    self.condition.wait()
+                generation, content, file_type = self.job
+                self.job = None
+                
+            if file_type == "markdown":
+                try:
+                    self.rendered.emit(generation, True, self.markdown.render(content))
+                except Exception as e:
+                    self.rendered.emit(generation, False, f"Markdown preview error: {str(e)}")
+            else:
+                self.rendered.emit(generation, file_type == "html", content)
+                
+class VSCodePreview(QWidget):
+    """Preview widget for Markdown and HTML files"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Incremented per request so stale background renders can be dropped
+        self.render_generation = 0
+        self.renderer = VSCodePreviewRenderer(self)
+        self.renderer.rendered.connect(self.on_rendered)
+        self.setup_preview()
+        
+    def setup_preview(self):
+        """Setup the preview widget"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        # Header
+        header = QWidget()
+        header_layout = QHBoxLayout(header)
+        header_layout.setContentsMargins(8, 4, 8, 4)
         
         self.preview_label = QLabel("PREVIEW")
         self.preview_label.setStyleSheet("""
@@ -562,65 +2677,385 @@ class VSCodePreview(QWidget):
         else:
             self.text_browser.setPlainText(content)
             
-    def simple_markdown_to_html(self, markdown_text):
-        """Simple markdown to HTML conversion"""
-        html = markdown_text
-        
-        # Headers
-        html = re.sub(r'^### (.*$)', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-        html = re.sub(r'^## (.*$)', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-        html = re.sub(r'^# (.*$)', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-        
-        # Bold
-        html = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html)
-        html = re.sub(r'__(.*?)__', r'<strong>\1</strong>', html)
-        
-        # Italic
-        html = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html)
-        html = re.sub(r'_(.*?)_', r'<em>\1</em>', html)
+    def request_preview(self, content, file_type):
+        """Render the preview in the background, newer requests supersede older ones"""
+        self.render_generation += 1
+        self.renderer.submit(self.render_generation, content, file_type)
+        
+    def on_rendered(self, generation, is_html, text):
+        """Show a finished render unless a newer one was requested meanwhile"""
+        if generation != self.render_generation:
+            return
+        if is_html:
+            self.text_browser.setHtml(text)
+        else:
+            self.text_browser.setPlainText(text)
+            
+    @staticmethod
+    def simple_markdown_to_html(markdown_text):
+        """Markdown to HTML conversion"""
+        return VSCodeMarkdownRenderer().render(markdown_text)
+
+class VSCodeTerminalProcess(QObject):
+    """Runs one shell command asynchronously and streams its output by line"""
+    
+    output = pyqtSignal(str)
+    finished = pyqtSignal(int)
+    
+    def __init__(self, command, parent=None):
+        super().__init__(parent)
+        self.command = command
+        self.interrupted = False
+        # Set when the command runs in a process group of its own, which interrupts go to
+        self.own_group = False
+        # Incremental decoders keep multi-byte characters split across reads intact
+        self.decoders = {
+            QProcess.ProcessChannel.StandardOutput: codecs.getincrementaldecoder('utf-8')('replace'),
+            QProcess.ProcessChannel.StandardError: codecs.getincrementaldecoder('utf-8')('replace'),
+        }
+        self.partial = {channel: "" for channel in self.decoders}
+        
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(
+            lambda: self.read_channel(QProcess.ProcessChannel.StandardOutput))
+        self.process.readyReadStandardError.connect(
+            lambda: self.read_channel(QProcess.ProcessChannel.StandardError))
+        self.process.finished.connect(self.on_finished)
+        self.process.errorOccurred.connect(self.on_error)
+        
+    def start(self):
+        """Start the command through the platform shell"""
+        if sys.platform == "win32":
+            self.process.start("cmd.exe", ["/c", self.command])
+        else:
+            # A new session makes the shell lead a process group that its pipelines and children join
+            if hasattr(self.process, 'setUnixProcessParameters'):
+                self.process.setUnixProcessParameters(QProcess.UnixProcessFlag.CreateNewSession)
+                self.own_group = True
+            self.process.start(os.environ.get("SHELL", "/bin/sh"), ["-c", self.command])
+            
+    def is_running(self):
+        """Check whether the command is still running"""
+        return self.process.state() != QProcess.ProcessState.NotRunning
         
-        # Code blocks
-        html = re.sub(r'```(.*?)```', r'<pre><code>\1</code></pre>', html, flags=re.DOTALL)
-        html = re.sub(r'`(.*?)`', r'<code>\1</code>', html)
+    def interrupt(self):
+        """Send Ctrl+C to the command, a second interrupt kills it"""
+        if not self.is_running():
+            return
+        if sys.platform == "win32":
+            self.process.kill()
+        else:
+            signal_number = signal.SIGKILL if self.interrupted else signal.SIGINT
+            pid = self.process.processId()
+            try:
+                if self.own_group:
+                    os.killpg(pid, signal_number)
+                else:
+                    os.kill(pid, signal_number)
+            except ProcessLookupError:
+                pass
+        self.interrupted = True
+        
+    def read_channel(self, channel):
+        """Emit every complete line received on a channel"""
+        self.process.setReadChannel(channel)
+        data = bytes(self.process.readAll())
+        text = self.partial[channel] + self.decoders[channel].decode(data)
+        lines = text.split('\n')
+        self.partial[channel] = lines.pop()
+        if lines:
+            self.output.emit('\n'.join(line.rstrip('\r') for line in lines))
+            
+    def flush(self):
+        """Emit output left without a trailing newline"""
+        for channel, decoder in self.decoders.items():
+            text = self.partial[channel] + decoder.decode(b'', final=True)
+            self.partial[channel] = ""
+            if text:
+                self.output.emit(text.rstrip('\r'))
+                
+    def on_finished(self, exit_code, exit_status):
+        """Report the exit code once all output has been read"""
+        self.read_channel(QProcess.ProcessChannel.StandardOutput)
+        self.read_channel(QProcess.ProcessChannel.StandardError)
+        self.flush()
+        if exit_status == QProcess.ExitStatus.CrashExit and exit_code == 0:
+            exit_code = -1
+        self.finished.emit(exit_code)
+        
+    def on_error(self, error):
+        """Report commands that could not be started"""
+        if error == QProcess.ProcessError.FailedToStart:
+            self.output.emit(f"Error: {self.process.errorString()}")
+            self.finished.emit(-1)
+            
+class VSCodeShellSession(QObject):
+    """Long-lived shell running on a pseudo-terminal for the integrated terminal"""
+    
+    output = pyqtSignal(str)
+    command_finished = pyqtSignal(int)
+    closed = pyqtSignal()
+    
+    # The prompt is replaced by an invisible marker, and every command is followed by a printf
+    # of one carrying its exit code, since not every shell expands $? in PS1
+    PROMPT_MARKER = "\x1b]777;prompt\x07"
+    EXIT_MARKER_COMMAND = "printf '\\033]777;exit;%d\\007' \"$?\""
+    MARKER_PATTERN = re.compile(r'\x1b\]777;(?:exit;(\d+)|prompt)\x07')
+    # Exit code reported for a command whose marker never ran, e.g. when it was interrupted
+    INTERRUPTED_EXIT_CODE = 130
+    # Escape sequences that a plain text view cannot render
+    ANSI_PATTERN = re.compile(r'\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07]*\x07|\x1b[()][0-9A-Za-z]|\x1b[=>]')
+    # Prompts without a trailing newline (e.g. input()) are shown after this delay
+    PARTIAL_FLUSH_MS = 50
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.master_fd = None
+        self.shell = None
+        self.notifier = None
+        self.write_notifier = None
+        # Input the pseudo-terminal had no room for yet
+        self.pending_input = bytearray()
+        self.exit_code = None
+        self.started = False
+        self.busy = False
+        self.queue = []
+        self.buffer = ""
+        self.decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        
+        self.partial_timer = QTimer(self)
+        self.partial_timer.setSingleShot(True)
+        self.partial_timer.timeout.connect(self.flush_partial)
         
-        # Links
-        html = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', html)
+    @staticmethod
+    def is_supported():
+        """Check whether pseudo-terminals are available on this platform"""
+        return pty is not None
+        
+    def start(self, cwd=None):
+        """Spawn the shell on a new pseudo-terminal"""
+        master_fd, slave_fd = pty.openpty()
+        
+        # The terminal widget echoes commands itself
+        attrs = termios.tcgetattr(slave_fd)
+        attrs[3] &= ~termios.ECHO
+        termios.tcsetattr(slave_fd, termios.TCSANOW, attrs)
+        
+        bash = shutil.which('bash')
+        args = [bash, '--noprofile', '--norc', '-i'] if bash else ['/bin/sh', '-i']
+        env = dict(os.environ, PS1=self.PROMPT_MARKER, PS2='', PROMPT_COMMAND='',
+                   TERM='dumb', HISTFILE=os.devnull, VIRTUAL_ENV_DISABLE_PROMPT='1')
+        
+        def make_controlling_terminal():
+            # Runs in the child after setsid so Ctrl+C reaches the foreground job
+            fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+            
+        try:
+            self.shell = subprocess.Popen(
+                args, stdin=slave_fd, stdout=slave_fd, stderr=slave_fd, cwd=cwd,
+                env=env, start_new_session=True, preexec_fn=make_controlling_terminal)
+        finally:
+            os.close(slave_fd)
+            
+        self.master_fd = master_fd
+        os.set_blocking(master_fd, False)
+        self.notifier = QSocketNotifier(master_fd, QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self.read_output)
+        self.write_notifier = QSocketNotifier(master_fd, QSocketNotifier.Type.Write, self)
+        self.write_notifier.setEnabled(False)
+        self.write_notifier.activated.connect(self.flush_input)
+        
+    def is_alive(self):
+        """Check whether the shell is still running"""
+        return self.shell is not None and self.shell.poll() is None
+        
+    def write(self, text):
+        """Write raw input to the pseudo-terminal, what doesn't fit is sent once it has room"""
+        if self.master_fd is None:
+            return
+        self.pending_input += text.encode('utf-8')
+        self.flush_input()
         
-        # Line breaks
-        html = html.replace('\n', '<br>')
+    def flush_input(self):
+        """Write pending input until the pseudo-terminal is full"""
+        while self.pending_input:
+            try:
+                written = os.write(self.master_fd, self.pending_input)
+            except BlockingIOError:
+                # Wait for the program to read, without blocking the GUI
+                self.write_notifier.setEnabled(True)
+                return
+            except OSError:
+                self.pending_input.clear()
+                break
+            del self.pending_input[:written]
+        if self.write_notifier is not None:
+            self.write_notifier.setEnabled(False)
+            
+    def run(self, command):
+        """Run a command in the shell, queued until the previous one finishes"""
+        if self.busy or not self.started:
+            self.queue.append(command)
+            return
+        self.busy = True
+        self.exit_code = None
+        # eval keeps a trailing comment or & from swallowing the marker
+        self.write(f"eval {shlex.quote(command)}; {self.EXIT_MARKER_COMMAND}\n")
+        
+    def send_input(self, text):
+        """Send a line of input to the program running in the shell"""
+        self.write(text + '\n')
+        
+    def interrupt(self):
+        """Send Ctrl+C to the foreground job, dropping input it hasn't read yet"""
+        self.pending_input.clear()
+        self.write('\x03')
+        
+    def read_output(self):
+        """Read everything available without blocking"""
+        chunks = []
+        while True:
+            try:
+                data = os.read(self.master_fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                # EIO means the shell exited and the pty was closed
+                data = b''
+            if not data:
+                self.process_output(''.join(chunks))
+                self.close()
+                return
+            chunks.append(self.decoder.decode(data))
+        self.process_output(''.join(chunks))
+        
+    def process_output(self, text):
+        """Split output on exit markers and emit complete lines"""
+        self.buffer += text
+        while True:
+            match = self.MARKER_PATTERN.search(self.buffer)
+            if not match:
+                break
+            self.emit_text(self.buffer[:match.start()])
+            self.buffer = self.buffer[match.end():]
+            if match.group(1) is not None:
+                self.exit_code = int(match.group(1))
+            else:
+                self.on_prompt(self.INTERRUPTED_EXIT_CODE if self.exit_code is None else self.exit_code)
+            
+        # Keep an incomplete line for the next read
+        cut = self.buffer.rfind('\n')
+        if cut >= 0:
+            self.emit_text(self.buffer[:cut + 1])
+            self.buffer = self.buffer[cut + 1:]
+        if self.buffer:
+            self.partial_timer.start(self.PARTIAL_FLUSH_MS)
+            
+    def emit_text(self, text):
+        """Clean terminal control sequences and emit the text as lines"""
+        text = self.ANSI_PATTERN.sub('', text).replace('\r\n', '\n')
+        if not text:
+            return
+        # A bare carriage return redraws the line, keep only the final state
+        text = '\n'.join(line.rsplit('\r', 1)[-1] for line in text.split('\n'))
+        if text.endswith('\n'):
+            text = text[:-1]
+        self.output.emit(text)
+        
+    def flush_partial(self):
+        """Show a line that has no newline yet, such as an input() prompt"""
+        # Wait if the text ends in an escape sequence that is still incomplete
+        if self.buffer and '\x1b' not in self.ANSI_PATTERN.sub('', self.buffer):
+            self.emit_text(self.buffer)
+            self.buffer = ""
+            
+    def on_prompt(self, exit_code):
+        """Handle the shell becoming idle after a command"""
+        if not self.started:
+            self.started = True
+        elif self.busy:
+            self.busy = False
+            self.command_finished.emit(exit_code)
+            
+        if self.queue:
+            self.run(self.queue.pop(0))
+            
+    def close(self):
+        """Terminate the shell and release the pseudo-terminal"""
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier = None
+        if self.write_notifier is not None:
+            self.write_notifier.setEnabled(False)
+            self.write_notifier = None
+        self.pending_input.clear()
+        if self.master_fd is not None:
+            os.close(self.master_fd)
+            self.master_fd = None
+        if self.is_alive():
+            self.shell.terminate()
+        self.busy = False
+        self.queue.clear()
+        self.closed.emit()
+        
+class VSCodeTerminalOutput(QPlainTextEdit):
+    """Read-only terminal output with bounded scrollback and batched appends"""
+    
+    DEFAULT_SCROLLBACK = 10000
+    # Pending lines are pushed to the document at most once per frame
+    FLUSH_INTERVAL_MS = 16
+    
+    def __init__(self, parent=None, max_scrollback=DEFAULT_SCROLLBACK):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.pending = deque()
+        self.set_max_scrollback(max_scrollback)
+        
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush)
+        
+    def set_max_scrollback(self, lines):
+        """Limit how many lines are kept, the oldest are evicted first"""
+        self.max_scrollback = lines
+        self.setMaximumBlockCount(lines)
+        # Lines that would be evicted right away are dropped before reaching the document
+        self.pending = deque(self.pending, maxlen=lines)
+        
+    def append(self, text):
+        """Queue text as plain lines, no HTML parsing"""
+        self.pending.extend(text.split('\n'))
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+            
+    def flush(self):
+        """Write all queued lines to the document in one edit"""
+        self.flush_timer.stop()
+        if not self.pending:
+            return
+        text = '\n'.join(self.pending)
+        self.pending.clear()
+        self.appendPlainText(text)
         
-        # Wrap in HTML structure
-        full_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <style>
-                body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; margin: 20px; line-height: 1.6; }}
-                code {{ background-color: #f6f8fa; padding: 2px 4px; border-radius: 3px; font-family: 'Monaco', 'Consolas', monospace; }}
-                pre {{ background-color: #f6f8fa; padding: 16px; border-radius: 6px; overflow-x: auto; }}
-                h1, h2, h3, h4, h5, h6 {{ color: #24292e; margin-top: 24px; margin-bottom: 16px; }}
-                a {{ color: #0366d6; text-decoration: none; }}
-                a:hover {{ text-decoration: underline; }}
-                strong {{ font-weight: 600; }}
-                em {{ font-style: italic; }}
-            </style>
-        </head>
-        <body>
-            {html}
-        </body>
-        </html>
-        """
+    def toPlainText(self):
+        """Get the scrollback text including lines not flushed yet"""
+        self.flush()
+        return super().toPlainText()
         
-        return full_html
-
 class VSCodeTerminal(QWidget):
     """VS Code-like integrated terminal"""
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, max_scrollback=VSCodeTerminalOutput.DEFAULT_SCROLLBACK):
         super().__init__(parent)
+        # Commands currently running in the background
+        self.processes = []
+        self.shell_session = None
+        self.max_scrollback = max_scrollback
         self.setup_terminal()
         self.venv_manager = VSCodeVirtualEnvManager(self)
+        self.start_shell_session()
         
     def setup_terminal(self):
         """Setup the terminal"""
@@ -628,9 +3063,9 @@ class VSCodeTerminal(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         
         # Terminal output
-        self.terminal_output = QTextBrowser()
+        self.terminal_output = VSCodeTerminalOutput(max_scrollback=self.max_scrollback)
         self.terminal_output.setStyleSheet("""
-            QTextBrowser {
+            QPlainTextEdit {
                 background-color: #1e1e1e;
                 color: #d4d4d4;
                 border: none;
@@ -655,6 +3090,7 @@ class VSCodeTerminal(QWidget):
             }
         """)
         self.command_input.returnPressed.connect(self.execute_command)
+        self.command_input.installEventFilter(self)
         
         layout.addWidget(self.terminal_output)
         layout.addWidget(self.command_input)
@@ -664,58 +3100,1386 @@ class VSCodeTerminal(QWidget):
         self.terminal_output.append("Type 'help' for available commands")
         self.command_input.setFocus()
         
+    def eventFilter(self, obj, event):
+        """Interrupt running commands with Ctrl+C in the command input"""
+        if (obj is self.command_input and event.type() == QEvent.Type.KeyPress and
+                event.key() == Qt.Key.Key_C and
+                event.modifiers() == Qt.KeyboardModifier.ControlModifier and
+                not self.command_input.hasSelectedText() and self.is_busy()):
+            self.interrupt_commands()
+            return True
+        return super().eventFilter(obj, event)
+        
+    def start_shell_session(self):
+        """Start the persistent shell that typed commands run in"""
+        if not VSCodeShellSession.is_supported():
+            return False
+            
+        session = VSCodeShellSession(self)
+        try:
+            session.start()
+        except OSError as e:
+            self.terminal_output.append(f"Could not start shell session: {str(e)}")
+            return False
+            
+        session.output.connect(self.terminal_output.append)
+        session.command_finished.connect(self.on_session_command_finished)
+        session.closed.connect(self.on_session_closed)
+        self.shell_session = session
+        
+        # A restarted shell picks the active environment back up
+        if self.venv_manager.current_venv:
+            self.venv_manager.activate_venv(self.venv_manager.current_venv)
+        return True
+        
+    def has_shell_session(self):
+        """Check whether commands can run in the persistent shell"""
+        return self.shell_session is not None and self.shell_session.is_alive()
+        
+    def run_in_session(self, command):
+        """Run a command in the persistent shell once it is idle"""
+        if not self.has_shell_session():
+            return False
+        self.shell_session.run(command)
+        return True
+        
+    def on_session_command_finished(self, exit_code):
+        """Report a command finished by the persistent shell"""
+        if exit_code != 0:
+            self.terminal_output.append(f"Command exited with code {exit_code}")
+        self.terminal_output.append("")  # Empty line
+        
+    def on_session_closed(self):
+        """Forget a shell that exited, a new one starts with the next command"""
+        self.shell_session = None
+        self.terminal_output.append("Shell session ended")
+        
+    def is_busy(self):
+        """Check whether any command is running"""
+        return bool(self.processes) or (self.has_shell_session() and self.shell_session.busy)
+        
     def execute_command(self):
         """Execute a command in the terminal"""
         command = self.command_input.text().strip()
         if not command:
             return
+        self.command_input.clear()
+        
+        if self.shell_session is None:
+            self.start_shell_session()
+        if self.has_shell_session():
+            if self.shell_session.busy:
+                # Typed text is input for the running program, like a real terminal
+                self.terminal_output.append(command)
+                self.shell_session.send_input(command)
+            else:
+                self.terminal_output.append(f"$ {command}")
+                self.shell_session.run(command)
+            return
             
         self.terminal_output.append(f"$ {command}")
         
+        # Check if we have an active virtual environment
+        if hasattr(self, 'venv_manager') and self.venv_manager.current_venv:
+            # Modify command to use virtual environment Python
+            if command.startswith('python') or command.startswith('python3'):
+                if sys.platform == "win32":
+                    python_path = os.path.join(self.venv_manager.current_venv, "Scripts", "python.exe")
+                else:
+                    python_path = os.path.join(self.venv_manager.current_venv, "bin", "python")
+                command = command.replace('python', f'"{python_path}"', 1)
+                command = command.replace('python3', f'"{python_path}"', 1)
+            elif command.startswith('pip'):
+                if sys.platform == "win32":
+                    pip_path = os.path.join(self.venv_manager.current_venv, "Scripts", "pip.exe")
+                else:
+                    pip_path = os.path.join(self.venv_manager.current_venv, "bin", "pip")
+                command = command.replace('pip', f'"{pip_path}"', 1)
+                command = command.replace('pip3', f'"{pip_path}"', 1)
+                
+        self.run_command(command)
+        
+    def run_command(self, command, on_finished=None):
+        """Run a shell command in the background, streaming its output"""
+        process = VSCodeTerminalProcess(command, self)
+        process.output.connect(self.terminal_output.append)
+        process.finished.connect(lambda exit_code: self.on_command_finished(process, exit_code, on_finished))
+        self.processes.append(process)
+        process.start()
+        return process
+        
+    def on_command_finished(self, process, exit_code, on_finished=None):
+        """Report a finished command and release its process"""
+        if process not in self.processes:
+            return
+        self.processes.remove(process)
+        
+        if process.interrupted:
+            self.terminal_output.append("Command interrupted")
+        elif exit_code != 0:
+            self.terminal_output.append(f"Command exited with code {exit_code}")
+        self.terminal_output.append("")  # Empty line
+        
+        if on_finished:
+            on_finished(exit_code)
+        process.deleteLater()
+        
+    def interrupt_commands(self):
+        """Interrupt every running command"""
+        self.terminal_output.append("^C")
+        if self.has_shell_session() and self.shell_session.busy:
+            self.shell_session.interrupt()
+        for process in list(self.processes):
+            process.interrupt()
+            
+class VSCodeProjectIndex:
+    """Compact index of every directory and file under a project root"""
+    
+    CACHE_VERSION = 1
+    CACHE_DIR = os.path.join(os.path.expanduser("~"), ".basicide", "cache")
+    
+    # Directories that are never descended into
+    DEFAULT_EXCLUDES = ['.git/', '.venv/', 'venv/', '__pycache__/', 'node_modules/']
+    
+    def __init__(self, root_path, exclude_globs=None):
+        self.root_path = os.path.abspath(root_path)
+        self.exclude_globs = list(exclude_globs or [])
+        # rel_dir -> {'mtime': st_mtime_ns, 'entries': [[name, is_dir], ...]}
+        self.dirs = {}
+        # Relative paths of listed entries that are ignored or excluded
+        self.excluded = set()
+        # (base_rel, pattern) pairs read from .gitignore files
+        self.ignore_patterns = []
+        self.ignore_rules = []
+        self.compile_rules()
+        
+    def cache_path(self):
+        """Get the cache file used for this root path"""
+        key = hashlib.sha1(self.root_path.encode('utf-8')).hexdigest()
+        return os.path.join(self.CACHE_DIR, f"index-{key}.json")
+        
+    def load_cache(self):
+        """Load a previously persisted index, returns True on success"""
         try:
-            # Check if we have an active virtual environment
-            if hasattr(self, 'venv_manager') and self.venv_manager.current_venv:
-                # Modify command to use virtual environment Python
-                if command.startswith('python') or command.startswith('python3'):
-                    if sys.platform == "win32":
-                        python_path = os.path.join(self.venv_manager.current_venv, "Scripts", "python.exe")
-                    else:
-                        python_path = os.path.join(self.venv_manager.current_venv, "bin", "python")
-                    command = command.replace('python', f'"{python_path}"', 1)
-                    command = command.replace('python3', f'"{python_path}"', 1)
-                elif command.startswith('pip'):
-                    if sys.platform == "win32":
-                        pip_path = os.path.join(self.venv_manager.current_venv, "Scripts", "pip.exe")
-                    else:
-                        pip_path = os.path.join(self.venv_manager.current_venv, "bin", "pip")
-                    command = command.replace('pip', f'"{pip_path}"', 1)
-                    command = command.replace('pip3', f'"{pip_path}"', 1)
-            
-            # Execute the command
-            result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=30)
-            
-            if result.stdout:
-                self.terminal_output.append(result.stdout)
-            if result.stderr:
-                self.terminal_output.append(f"Error: {result.stderr}")
-            if result.returncode != 0:
-                self.terminal_output.append(f"Command exited with code {result.returncode}")
+            with open(self.cache_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+            
+        if (data.get('version') != self.CACHE_VERSION or
+                data.get('root') != self.root_path or
+                data.get('exclude_globs') != self.exclude_globs):
+            return False
+            
+        self.dirs = data['dirs']
+        self.excluded = set(data['excluded'])
+        self.ignore_patterns = [tuple(item) for item in data['ignore_patterns']]
+        self.compile_rules()
+        return True
+        
+    def save_cache(self):
+        """Persist the index atomically next to the other BasicIDE caches"""
+        data = {
+            'version': self.CACHE_VERSION,
+            'root': self.root_path,
+            'exclude_globs': self.exclude_globs,
+            'dirs': self.dirs,
+            'excluded': sorted(self.excluded),
+            'ignore_patterns': self.ignore_patterns,
+        }
+        try:
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+            temp_path = self.cache_path() + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, self.cache_path())
+        except OSError:
+            pass
+            
+    def copy(self):
+        """Create an independent copy that can be rescanned on another thread"""
+        index = VSCodeProjectIndex(self.root_path, self.exclude_globs)
+        index.dirs = dict(self.dirs)
+        index.excluded = set(self.excluded)
+        index.ignore_patterns = list(self.ignore_patterns)
+        index.compile_rules()
+        return index
+        
+    def relpath(self, path):
+        """Convert an absolute path to the '/'-separated key used by the index"""
+        rel = os.path.relpath(os.path.abspath(path), self.root_path)
+        return '' if rel == '.' else rel.replace(os.sep, '/')
+        
+    def abspath(self, rel):
+        """Convert an index key back to an absolute path"""
+        if not rel:
+            return self.root_path
+        return os.path.join(self.root_path, *rel.split('/'))
+        
+    @staticmethod
+    def glob_to_regex(pattern):
+        """Translate a gitignore glob into a regex fragment"""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if pattern.startswith('**/', i):
+                parts.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                parts.append('.*')
+                i += 2
+                continue
+            if char == '*':
+                parts.append('[^/]*')
+            elif char == '?':
+                parts.append('[^/]')
+            elif char == '[':
+                close = pattern.find(']', i + 1)
+                if close == -1:
+                    parts.append(re.escape(char))
+                else:
+                    body = pattern[i + 1:close]
+                    if body.startswith('!'):
+                        body = '^' + body[1:]
+                    parts.append(f'[{body}]')
+                    i = close
+            else:
+                parts.append(re.escape(char))
+            i += 1
+        return ''.join(parts)
+        
+    def compile_rule(self, base, pattern):
+        """Compile one gitignore line into (regex, negate, dir_only) or None"""
+        pattern = pattern.rstrip()
+        if not pattern or pattern.startswith('#'):
+            return None
+            
+        negate = pattern.startswith('!')
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        if not pattern:
+            return None
+            
+        prefix = re.escape(base + '/') if base else ''
+        if '/' in pattern:
+            # Patterns containing a slash are relative to the .gitignore location
+            regex = prefix + self.glob_to_regex(pattern.lstrip('/'))
+        else:
+            regex = prefix + '(?:.*/)?' + self.glob_to_regex(pattern)
+        return re.compile(f'^{regex}$'), negate, dir_only
+        
+    def compile_rules(self):
+        """Rebuild the compiled exclusion rules from defaults, globs and .gitignore files"""
+        self.ignore_rules = []
+        patterns = [('', p) for p in self.DEFAULT_EXCLUDES + self.exclude_globs]
+        for base, pattern in patterns + self.ignore_patterns:
+            rule = self.compile_rule(base, pattern)
+            if rule:
+                self.ignore_rules.append(rule)
                 
-        except subprocess.TimeoutExpired:
-            self.terminal_output.append("Command timed out")
-        except Exception as e:
-            self.terminal_output.append(f"Error: {str(e)}")
+    def gitignore_lines(self, rel_dir):
+        """Read the lines of a directory's .gitignore file, [] if it has none"""
+        try:
+            with open(os.path.join(self.abspath(rel_dir), '.gitignore'), 'r',
+                      encoding='utf-8', errors='replace') as f:
+                return f.read().splitlines()
+        except OSError:
+            return []
             
-        self.command_input.clear()
-        self.terminal_output.append("")  # Empty line
-
-class VSCodeFileExplorer(QWidget):
-    """VS Code-like file explorer"""
+    def gitignore_changed(self, rel_dir, entries):
+        """Check whether a directory's .gitignore rules differ from the loaded ones"""
+        loaded = [pattern for base, pattern in self.ignore_patterns if base == rel_dir]
+        if ['.gitignore', False] not in entries:
+            return bool(loaded)
+        return loaded != [line for line in self.gitignore_lines(rel_dir) if self.compile_rule(rel_dir, line)]
+        
+    def load_gitignore(self, rel_dir):
+        """Add the rules from a directory's .gitignore file"""
+        for line in self.gitignore_lines(rel_dir):
+            rule = self.compile_rule(rel_dir, line)
+            if rule:
+                self.ignore_patterns.append((rel_dir, line))
+                self.ignore_rules.append(rule)
+                
+    def matches_ignore(self, rel, is_dir):
+        """Check a relative path against the exclusion rules, last match wins"""
+        ignored = False
+        for regex, negate, dir_only in self.ignore_rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel):
+                ignored = not negate
+        return ignored
+        
+    def list_directory(self, path):
+        """List one directory as sorted [name, is_dir] pairs"""
+        entries = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        # Symlinked directories aren't descended into, they may form cycles
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    entries.append([entry.name, is_dir])
+        except OSError:
+            return None
+        entries.sort(key=lambda entry: entry[0])
+        return entries
+        
+    def scan(self):
+        """Walk the project, relisting only directories whose mtime changed.
+        
+        Returns the absolute paths of directories whose entries changed.
+        """
+        changed = []
+        seen = set()
+        self.excluded = set()
+        self.ignore_patterns = []
+        self.compile_rules()
+        
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = self.abspath(rel_dir)
+            try:
+                mtime = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                continue
+                
+            cached = self.dirs.get(rel_dir)
+            if cached is None or cached['mtime'] != mtime:
+                entries = self.list_directory(abs_dir)
+                if entries is None:
+                    continue
+                if cached is None or cached['entries'] != entries:
+                    changed.append(abs_dir)
+                self.dirs[rel_dir] = {'mtime': mtime, 'entries': entries}
+            else:
+                entries = cached['entries']
+            seen.add(rel_dir)
+            
+            if ['.gitignore', False] in entries:
+                self.load_gitignore(rel_dir)
+                
+            for name, is_dir in entries:
+                rel = f"{rel_dir}/{name}" if rel_dir else name
+                if self.matches_ignore(rel, is_dir):
+                    self.excluded.add(rel)
+                elif is_dir:
+                    stack.append(rel)
+                    
+        # Forget directories that were removed or became excluded
+        for rel_dir in list(self.dirs):
+            if rel_dir not in seen:
+                del self.dirs[rel_dir]
+        return changed
+        
+    def forget_directory(self, rel_dir):
+        """Remove a directory and everything below it from the index"""
+        prefix = rel_dir + '/'
+        for rel in [rel for rel in self.dirs if rel == rel_dir or rel.startswith(prefix)]:
+            del self.dirs[rel]
+        self.excluded = {rel for rel in self.excluded
+                         if rel != rel_dir and not rel.startswith(prefix)}
+        patterns = [(base, pattern) for base, pattern in self.ignore_patterns
+                    if base != rel_dir and not base.startswith(prefix)]
+        if patterns != self.ignore_patterns:
+            self.ignore_patterns = patterns
+            self.compile_rules()
+                         
+    def rescan(self, paths):
+        """Relist only the given directories and any new directories found below them.
+        
+        Returns the absolute paths of directories whose entries changed.
+        """
+        changed = []
+        stack = []
+        for path in paths:
+            rel_dir = self.relpath(path)
+            if not rel_dir.startswith('..') and not self.is_excluded(path):
+                stack.append(rel_dir)
+                
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = self.abspath(rel_dir)
+            old = self.dirs.get(rel_dir)
+            try:
+                mtime = os.stat(abs_dir).st_mtime_ns
+                entries = self.list_directory(abs_dir)
+            except OSError:
+                entries = None
+            if entries is None:
+                # The directory is gone, its parent's change event updates the listing
+                if old is not None:
+                    self.forget_directory(rel_dir)
+                continue
+            if self.gitignore_changed(rel_dir, entries):
+                # New rules can exclude or bring back paths anywhere below, walk it all again
+                return changed + self.scan()
+                
+            self.dirs[rel_dir] = {'mtime': mtime, 'entries': entries}
+            if old is None or old['entries'] != entries:
+                changed.append(abs_dir)
+                
+            current = set()
+            for name, is_dir in entries:
+                rel = f"{rel_dir}/{name}" if rel_dir else name
+                current.add(rel)
+                if self.matches_ignore(rel, is_dir):
+                    self.excluded.add(rel)
+                    continue
+                self.excluded.discard(rel)
+                if is_dir and rel not in self.dirs:
+                    stack.append(rel)
+                    
+            # Drop subdirectories that were deleted or renamed away
+            for name, is_dir in (old['entries'] if old else []):
+                rel = f"{rel_dir}/{name}" if rel_dir else name
+                if rel not in current:
+                    if is_dir:
+                        self.forget_directory(rel)
+                    self.excluded.discard(rel)
+        return changed
+        
+    def directories(self):
+        """Get the absolute paths of all indexed directories"""
+        return [self.abspath(rel_dir) for rel_dir in self.dirs]
+        
+    def entries(self, path):
+        """Get (name, path, is_dir) entries of an indexed directory, or None"""
+        directory = self.dirs.get(self.relpath(path))
+        if directory is None:
+            return None
+        abs_dir = os.path.abspath(path)
+        return [(name, os.path.join(abs_dir, name), is_dir)
+                for name, is_dir in directory['entries']]
+                
+    def is_excluded(self, path):
+        """Check whether a path is ignored by .gitignore or the exclude globs"""
+        rel = self.relpath(path)
+        parts = rel.split('/')
+        for i in range(1, len(parts) + 1):
+            if '/'.join(parts[:i]) in self.excluded:
+                return True
+        return False
+        
+    def files(self, extensions=None):
+        """Yield the absolute path of every indexed, non-excluded file"""
+        for rel_dir, directory in self.dirs.items():
+            abs_dir = self.abspath(rel_dir)
+            for name, is_dir in directory['entries']:
+                if is_dir:
+                    continue
+                if extensions and os.path.splitext(name)[1].lower() not in extensions:
+                    continue
+                rel = f"{rel_dir}/{name}" if rel_dir else name
+                if rel not in self.excluded:
+                    yield os.path.join(abs_dir, name)
+                    
+class VSCodeIndexScanner(QThread):
+    """Revalidates a project index in the background and persists it"""
     
-    def __init__(self, parent=None):
+    scanned = pyqtSignal(object, list)
+    
+    def __init__(self, index, parent=None, paths=None):
         super().__init__(parent)
-        self.root_path = None
+        # Work on a copy so the GUI thread can keep querying the old index
+        self.index = index.copy()
+        # Only these directories are relisted when given, otherwise a full scan
+        self.paths = paths
+        
+    def run(self):
+        """Scan the project and hand the refreshed index to the GUI thread"""
+        if self.paths is None:
+            changed = self.index.scan()
+        else:
+            changed = self.index.rescan(self.paths)
+        self.index.save_cache()
+        self.scanned.emit(self.index, changed)
+        
+class VSCodeFileWatcher(QObject):
+    """Watches project directories and reports coalesced bursts of changes"""
+    
+    directories_changed = pyqtSignal(list)
+    
+    # inotify watches are a limited per-user resource
+    MAX_WATCHED_DIRS = 4096
+    # Wait for a burst of events to settle, but never longer than MAX_DELAY_MS
+    DEBOUNCE_MS = 150
+    MAX_DELAY_MS = 1000
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.pending = set()
+        self.burst_started = None
+        
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.timeout.connect(self.flush)
+        
+    def set_directories(self, paths):
+        """Watch exactly the given directories, shallowest first up to the limit"""
+        wanted = sorted(set(paths), key=lambda path: (path.count(os.sep), path))
+        wanted = set(wanted[:self.MAX_WATCHED_DIRS])
+        current = set(self.watcher.directories())
+        
+        removed = list(current - wanted)
+        added = [path for path in wanted - current if os.path.isdir(path)]
+        if removed:
+            self.watcher.removePaths(removed)
+        if added:
+            self.watcher.addPaths(added)
+            
+    def add_directory(self, path):
+        """Watch one more directory if the limit allows"""
+        if len(self.watcher.directories()) < self.MAX_WATCHED_DIRS and os.path.isdir(path):
+            self.watcher.addPath(path)
+            
+    def clear(self):
+        """Stop watching everything and drop pending events"""
+        watched = self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self.pending.clear()
+        self.burst_started = None
+        self.debounce_timer.stop()
+        
+    def on_directory_changed(self, path):
+        """Collect a change event and (re)start the debounce timer"""
+        self.pending.add(path)
+        now = time.monotonic()
+        if self.burst_started is None:
+            self.burst_started = now
+            
+        elapsed_ms = (now - self.burst_started) * 1000
+        if elapsed_ms >= self.MAX_DELAY_MS:
+            self.flush()
+        else:
+            self.debounce_timer.start(int(min(self.DEBOUNCE_MS, self.MAX_DELAY_MS - elapsed_ms)))
+            
+    def flush(self):
+        """Emit all directories changed during the burst at once"""
+        self.debounce_timer.stop()
+        self.burst_started = None
+        if self.pending:
+            paths = sorted(self.pending)
+            self.pending.clear()
+            self.directories_changed.emit(paths)
+
+class VSCodeDirectoryLister(QThread):
+    """Lists a single directory off the GUI thread for the file explorer"""
+    
+    listed = pyqtSignal(str, list)
+    
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        
+    def run(self):
+        """List the directory with os.scandir and emit (name, path, is_dir) entries"""
+        entries = []
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    try:
+                        # Symlinks to directories aren't followed, like in the project index,
+                        # and the cached dirent type saves a stat
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    entries.append((entry.name, entry.path, is_dir))
+        except OSError:
+            pass
+            
+        entries.sort(key=lambda entry: entry[0])
+        self.listed.emit(self.path, entries)
+
+class VSCodeSearchIndex:
+    """Persistent trigram index of a project's files, narrows a search down to files that can match"""
+    
+    CACHE_VERSION = 1
+    MAGIC = b'BIDETRI1'
+    # Bigger files aren't indexed, every search reads them
+    MAX_INDEXED_SIZE = 8 * 1024 * 1024
+    # Compact the posting lists before saving once this share of file ids is stale
+    MAX_DEAD_RATIO = 0.25
+    # Inline flags like (?x) or (?i:...) change how the rest of a regex reads
+    INLINE_FLAGS = re.compile(r'\(\?[aiLmsux-]+[:)]')
+    # Characters taken by the argument of an escape such as \x41 or \u00e9
+    ESCAPE_ARGUMENT_LENGTHS = {'x': 2, 'u': 4, 'U': 8}
+    
+    def __init__(self, root_path):
+        self.root_path = os.path.abspath(root_path)
+        # file id -> [rel path, mtime, size, kind], None once deleted or reindexed.
+        # kind is 'text', 'binary' (never searched) or 'large' (not indexed, always searched)
+        self.files = []
+        self.ids = {}
+        # trigram (tuple of 3 lowercase characters) -> ascending array of file ids
+        self.postings = {}
+        # Ids of reindexed or deleted files still present in the posting lists
+        self.dead = set()
+        self.unindexed = set()
+        
+    def cache_path(self):
+        """Get the cache file used for this root path"""
+        key = hashlib.sha1(self.root_path.encode('utf-8')).hexdigest()
+        return os.path.join(VSCodeProjectIndex.CACHE_DIR, f"search-{key}.idx")
+        
+    def load_cache(self):
+        """Load a previously persisted index, returns True on success"""
+        try:
+            with open(self.cache_path(), 'rb') as f:
+                magic, header_size = struct.unpack('<8sQ', f.read(16))
+                if magic != self.MAGIC:
+                    return False
+                header = json.loads(f.read(header_size).decode('utf-8'))
+                data = array('I')
+                data.frombytes(f.read())
+        except (OSError, ValueError, struct.error):
+            return False
+        if header.get('version') != self.CACHE_VERSION or header.get('root') != self.root_path:
+            return False
+            
+        self.files = header['files']
+        self.ids = {entry[0]: fid for fid, entry in enumerate(self.files) if entry is not None}
+        self.dead = set(header['dead'])
+        self.unindexed = set(header['unindexed'])
+        self.postings = {}
+        offset = 0
+        for trigram, count in zip(header['trigrams'], header['counts']):
+            self.postings[tuple(trigram)] = data[offset:offset + count]
+            offset += count
+        return True
+        
+    def save_cache(self):
+        """Persist the index atomically next to the other BasicIDE caches"""
+        if self.dead and len(self.dead) > self.MAX_DEAD_RATIO * len(self.files):
+            self.compact()
+        trigrams = list(self.postings)
+        header = {
+            'version': self.CACHE_VERSION,
+            'root': self.root_path,
+            'files': self.files,
+            'dead': sorted(self.dead),
+            'unindexed': sorted(self.unindexed),
+            'trigrams': [''.join(trigram) for trigram in trigrams],
+            'counts': [len(self.postings[trigram]) for trigram in trigrams],
+        }
+        blob = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        try:
+            os.makedirs(VSCodeProjectIndex.CACHE_DIR, exist_ok=True)
+            temp_path = self.cache_path() + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(struct.pack('<8sQ', self.MAGIC, len(blob)))
+                f.write(blob)
+                for trigram in trigrams:
+                    self.postings[trigram].tofile(f)
+            os.replace(temp_path, self.cache_path())
+        except OSError:
+            pass
+            
+    def compact(self):
+        """Drop stale file ids from the posting lists"""
+        dead = self.dead
+        for trigram, posting in list(self.postings.items()):
+            live = set(posting).difference(dead)
+            if live:
+                self.postings[trigram] = array('I', sorted(live))
+            else:
+                del self.postings[trigram]
+        self.dead = set()
+        
+    def update(self, paths, progress=None):
+        """Index new and changed files and forget deleted ones, returns True if anything changed.
+        
+        paths are absolute paths below the root, as VSCodeProjectIndex.files yields them.
+        """
+        prefix = len(self.root_path) + 1
+        current = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            current[path[prefix:].replace(os.sep, '/')] = (path, st.st_mtime_ns, st.st_size)
+            
+        removed = [rel for rel in self.ids if rel not in current]
+        for rel in removed:
+            self.forget(rel)
+        changed = []
+        for rel, (path, mtime, size) in current.items():
+            fid = self.ids.get(rel)
+            if fid is None or self.files[fid][1] != mtime or self.files[fid][2] != size:
+                changed.append(rel)
+        for done, rel in enumerate(changed, 1):
+            self.forget(rel)
+            self.add_file(rel, *current[rel])
+            if progress:
+                progress(done, len(changed))
+        return bool(removed or changed)
+        
+    def forget(self, rel):
+        """Remove a file, its posting entries are filtered until the next compaction"""
+        fid = self.ids.pop(rel, None)
+        if fid is None:
+            return
+        if self.files[fid][3] == 'text':
+            self.dead.add(fid)
+        self.unindexed.discard(fid)
+        self.files[fid] = None
+        
+    def add_file(self, rel, path, mtime, size):
+        """Read a file and add its trigrams under a new id"""
+        fid = len(self.files)
+        kind = 'large' if size > self.MAX_INDEXED_SIZE else 'text'
+        if kind == 'text':
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                return
+            if b'\0' in data[:8192]:
+                kind = 'binary'
+            else:
+                # Repeated lines add no trigrams, zip makes them without a Python level loop
+                text = '\n'.join(set(data.decode('utf-8', errors='replace').lower().split('\n')))
+                postings = self.postings
+                for trigram in set(zip(text, text[1:], text[2:])):
+                    posting = postings.get(trigram)
+                    if posting is None:
+                        postings[trigram] = array('I', (fid,))
+                    else:
+                        posting.append(fid)
+        elif kind == 'large':
+            self.unindexed.add(fid)
+        self.files.append([rel, mtime, size, kind])
+        self.ids[rel] = fid
+        
+    @staticmethod
+    def required_literals(pattern, regex):
+        """Lowercase substrings every match must contain, at least 3 characters long"""
+        if not regex:
+            return [pattern.lower()] if len(pattern) >= 3 else []
+        if '|' in pattern or VSCodeSearchIndex.INLINE_FLAGS.search(pattern):
+            return []
+            
+        runs = []
+        run = ''
+        depth = 0
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            literal = None
+            if char == '\\':
+                following = pattern[i + 1:i + 2]
+                # Escaped punctuation is literal, \d, \w, \n and friends are not
+                if following and not following.isalnum():
+                    literal = following
+                i += 2
+                # Skip the argument of \x41, \u00e9, \N{name}, \0 and \12
+                if following in VSCodeSearchIndex.ESCAPE_ARGUMENT_LENGTHS:
+                    i += VSCodeSearchIndex.ESCAPE_ARGUMENT_LENGTHS[following]
+                elif following == 'N' and pattern[i:i + 1] == '{':
+                    close = pattern.find('}', i)
+                    i = len(pattern) if close == -1 else close + 1
+                elif following.isdigit():
+                    while i < len(pattern) and pattern[i].isdigit():
+                        i += 1
+            elif char == '[':
+                # A ] right after [ or [^ is part of the class, as is an escaped one
+                i += 1
+                if pattern[i:i + 1] == '^':
+                    i += 1
+                if pattern[i:i + 1] == ']':
+                    i += 1
+                while i < len(pattern) and pattern[i] != ']':
+                    i += 2 if pattern[i] == '\\' else 1
+                i += 1
+            elif char in '?*{':
+                # The previous character may be missing
+                run = run[:-1]
+                close = pattern.find('}', i) if char == '{' else i
+                i = len(pattern) if close == -1 else close + 1
+            elif char == '(':
+                depth += 1
+                i += 1
+            elif char == ')':
+                depth = max(0, depth - 1)
+                i += 1
+            elif char in '.^$+':
+                i += 1
+            else:
+                literal = char
+                i += 1
+                
+            if literal is not None and depth == 0:
+                run += literal
+            elif literal is None:
+                runs.append(run)
+                run = ''
+        runs.append(run)
+        return [run.lower() for run in runs if len(run) >= 3]
+        
+    def candidates(self, literals):
+        """Ids of the files that may contain every literal"""
+        trigrams = {tuple(literal[i:i + 3]) for literal in literals for i in range(len(literal) - 2)}
+        if not trigrams:
+            return [fid for fid, entry in enumerate(self.files) if entry is not None and entry[3] != 'binary']
+            
+        postings = []
+        for trigram in trigrams:
+            posting = self.postings.get(trigram)
+            if posting is None:
+                return sorted(self.unindexed)
+            postings.append(posting)
+        # Start from the rarest trigram, the set only shrinks from there
+        postings.sort(key=len)
+        ids = set(postings[0])
+        for posting in postings[1:]:
+            if not ids:
+                break
+            ids.intersection_update(posting)
+        ids.difference_update(self.dead)
+        return sorted(ids | self.unindexed)
+        
+class VSCodeSearchService(QObject):
+    """Keeps a project's search index up to date on a worker thread and streams search results"""
+    
+    # search generation, absolute path, [(line number, line text)]
+    found = pyqtSignal(int, str, list)
+    # search generation, files searched, matching lines, seconds
+    search_finished = pyqtSignal(int, int, int, float)
+    # files indexed, files to index
+    indexing = pyqtSignal(int, int)
+    
+    MAX_RESULTS = 5000
+    MAX_LINE_LENGTH = 300
+    # Saving rewrites the whole index, small changes are saved at most this often
+    SAVE_INTERVAL = 60
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.condition = threading.Condition()
+        self.files_job = None
+        self.search_job = None
+        # Bumped by every search or cancel, the worker drops results of older ones
+        self.generation = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        
+    def set_project(self, project_index):
+        """Index the files of a scanned VSCodeProjectIndex, replacing any earlier project"""
+        with self.condition:
+            self.files_job = project_index
+            self.condition.notify()
+            
+    @staticmethod
+    def compile_query(pattern, regex=False, case_sensitive=False):
+        """Compile a query into (regex, literals for narrowing the candidates), raises re.error"""
+        flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+        compiled = re.compile(pattern if regex else re.escape(pattern), flags)
+        return compiled, VSCodeSearchIndex.required_literals(pattern, regex)
+        
+    def search(self, pattern, regex=False, case_sensitive=False):
+        """Start a search, cancelling the previous one, returns its generation"""
+        compiled, literals = self.compile_query(pattern, regex, case_sensitive)
+        with self.condition:
+            self.generation += 1
+            self.search_job = (self.generation, compiled, literals)
+            self.condition.notify()
+            return self.generation
+            
+    def cancel(self):
+        """Stop the running search"""
+        with self.condition:
+            self.generation += 1
+            self.search_job = None
+            
+    def run(self):
+        """Index and search until the application exits"""
+        index = None
+        paths = []
+        last_save = 0
+        while True:
+            with self.condition:
+                while self.files_job is None and self.search_job is None:
+                    self.condition.wait()
+                files_job, self.files_job = self.files_job, None
+                search_job, self.search_job = self.search_job, None
+                
+            if files_job is not None:
+                # A scanned project index is never modified again, listing it here keeps the GUI free
+                root_path = files_job.root_path
+                paths = list(files_job.files())
+                if index is None or index.root_path != root_path:
+                    index = VSCodeSearchIndex(root_path)
+                    index.load_cache()
+                    last_save = 0
+            if index is None:
+                continue
+            # Files edited outside the IDE are picked up by their mtime on every search
+            if index.update(paths, self.indexing.emit) and time.monotonic() - last_save > self.SAVE_INTERVAL:
+                index.save_cache()
+                last_save = time.monotonic()
+            if search_job is not None:
+                self.run_search(index, *search_job)
+                
+    def run_search(self, index, generation, compiled, literals):
+        """Run the regex over the candidate files, emitting each file's matches as it is found"""
+        start = time.perf_counter()
+        searched = 0
+        total = 0
+        for fid in index.candidates(literals):
+            if generation != self.generation or total >= self.MAX_RESULTS:
+                break
+            entry = index.files[fid]
+            path = index.root_path + os.sep + entry[0].replace('/', os.sep)
+            try:
+                with open(path, 'rb') as f:
+                    text = f.read().decode('utf-8', errors='replace')
+            except OSError:
+                continue
+            searched += 1
+            
+            matches = []
+            line = 1
+            position = 0
+            last_line = 0
+            for match in compiled.finditer(text):
+                line += text.count('\n', position, match.start())
+                position = match.start()
+                if line == last_line:
+                    continue
+                last_line = line
+                begin = text.rfind('\n', 0, position) + 1
+                end = text.find('\n', position)
+                matches.append((line, text[begin:end if end != -1 else len(text)][:self.MAX_LINE_LENGTH]))
+                if total + len(matches) >= self.MAX_RESULTS:
+                    break
+            if matches:
+                total += len(matches)
+                self.found.emit(generation, path, matches)
+        if generation == self.generation:
+            self.search_finished.emit(generation, searched, total, time.perf_counter() - start)
+            
+class VSCodeSearchPanel(QWidget):
+    """Find in Files, results stream in grouped by file"""
+    
+    # absolute path, line number
+    open_requested = pyqtSignal(str, int)
+    
+    # Typing must pause this long before a search starts
+    SEARCH_DEBOUNCE_MS = 250
+    
+    def __init__(self, service, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self.generation = None
+        self.root_path = None
+        self.service.found.connect(self.on_found)
+        self.service.search_finished.connect(self.on_search_finished)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.start_search)
+        self.setup_panel()
+        
+    def setup_panel(self):
+        """Setup the query box, options and result tree"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Search in folder")
+        self.query_edit.textChanged.connect(lambda: self.search_timer.start())
+        self.query_edit.returnPressed.connect(self.start_search)
+        layout.addWidget(self.query_edit)
+        
+        options = QHBoxLayout()
+        self.regex_check = QCheckBox("Regex")
+        self.case_check = QCheckBox("Match Case")
+        for check in (self.regex_check, self.case_check):
+            check.setStyleSheet("QCheckBox { color: #cccccc; }")
+            check.toggled.connect(lambda: self.search_timer.start())
+            options.addWidget(check)
+        options.addStretch()
+        layout.addLayout(options)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("QLabel { color: #858585; }")
+        layout.addWidget(self.status_label)
+        
+        self.results_tree = QTreeWidget()
+        self.results_tree.setHeaderHidden(True)
+        self.results_tree.setUniformRowHeights(True)
+        self.results_tree.itemActivated.connect(self.on_item_activated)
+        self.results_tree.setStyleSheet("""
+            QTreeWidget {
+                background-color: #252526;
+                color: #cccccc;
+                border: none;
+            }
+        """)
+        layout.addWidget(self.results_tree)
+        
+    def set_root_path(self, root_path):
+        """Show results relative to the open folder"""
+        self.root_path = root_path
+        
+    def focus_query(self, text=None):
+        """Focus the query box, optionally replacing its text"""
+        if text:
+            self.query_edit.setText(text)
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+        
+    def start_search(self):
+        """Search for the current query, replacing the results"""
+        self.search_timer.stop()
+        self.results_tree.clear()
+        pattern = self.query_edit.text()
+        if not pattern:
+            self.service.cancel()
+            self.generation = None
+            self.status_label.setText("")
+            return
+        if self.root_path is None:
+            self.status_label.setText("Open a folder to search in")
+            return
+        try:
+            self.generation = self.service.search(pattern, self.regex_check.isChecked(),
+                                                  self.case_check.isChecked())
+        except re.error as e:
+            self.generation = None
+            self.status_label.setText(f"Invalid regex: {e}")
+            return
+        self.status_label.setText("Searching...")
+        
+    def on_found(self, generation, path, matches):
+        """Add the matches of one file"""
+        if generation != self.generation:
+            return
+        rel = os.path.relpath(path, self.root_path) if self.root_path else path
+        file_item = QTreeWidgetItem(self.results_tree, [f"{rel} ({len(matches)})"])
+        file_item.setData(0, Qt.ItemDataRole.UserRole, (path, matches[0][0]))
+        for line, text in matches:
+            item = QTreeWidgetItem(file_item, [f"{line}: {text.strip()}"])
+            item.setData(0, Qt.ItemDataRole.UserRole, (path, line))
+        file_item.setExpanded(True)
+        
+    def on_search_finished(self, generation, searched, total, elapsed):
+        """Show how the search went"""
+        if generation != self.generation:
+            return
+        files = self.results_tree.topLevelItemCount()
+        limit = " (limit reached)" if total >= self.service.MAX_RESULTS else ""
+        self.status_label.setText(f"{total} results in {files} files{limit}, "
+                                  f"{searched} files read in {elapsed * 1000:.0f} ms")
+                                  
+    def on_item_activated(self, item, column):
+        """Open the file of a result at its line"""
+        target = item.data(0, Qt.ItemDataRole.UserRole)
+        if target:
+            self.open_requested.emit(*target)
+            
+class VSCodePathIndex:
+    """Compact in-memory index of a project's file paths for fuzzy matching"""
+    
+    # Paths per chunk, a query checks for cancellation between chunks
+    CHUNK_SIZE = 16384
+    # Ranking tiers, a path scores its tier minus its length
+    NAME_SCORE = 3000
+    PATH_SCORE = 2000
+    FUZZY_NAME_SCORE = 1000
+    FUZZY_PATH_SCORE = 0
+    # Added when the query starts the file name
+    PREFIX_BONUS = 1000
+    
+    def __init__(self, root_path, paths):
+        self.root_path = os.path.abspath(root_path)
+        # Project-relative '/'-separated paths, and their lowercase forms for matching
+        self.paths = paths
+        self.lowered = [path.lower() for path in paths]
+        # (first path id, lowercase paths each preceded by a newline)
+        self.chunks = [(first, '\n' + '\n'.join(self.lowered[first:first + self.CHUNK_SIZE]))
+                       for first in range(0, len(paths), self.CHUNK_SIZE)]
+            
+    @classmethod
+    def from_project(cls, project_index):
+        """Build from the files of a VSCodeProjectIndex, sorted"""
+        prefix = len(project_index.root_path) + 1
+        paths = sorted(path[prefix:].replace(os.sep, '/') for path in project_index.files())
+        return cls(project_index.root_path, paths)
+        
+    def tiers(self, query):
+        """(score, best possible score, matches) for each ranking tier of a lowercase query, best first"""
+        # Literal tiers scan whole chunks, a pattern runs to the end of its path so it matches a path once
+        literal = re.escape(query)
+        tiers = []
+        if '/' not in query:
+            tiers.append((self.NAME_SCORE, self.NAME_SCORE + self.PREFIX_BONUS,
+                          self.match(re.compile(literal + '[^\\n/]*+$', re.MULTILINE))))
+        tiers.append((self.PATH_SCORE, self.PATH_SCORE, self.match(re.compile(literal + '[^\\n]*+'))))
+        if len(query) > 1:
+            tiers.append((self.FUZZY_PATH_SCORE, self.FUZZY_NAME_SCORE, self.match_each(self.fuzzy_pattern(query))))
+        return tiers
+        
+    @staticmethod
+    def fuzzy_pattern(query):
+        """Regex matching a string from its start if it contains the query's characters in order"""
+        # Gaps skip possessively to the next character, so a string that does not match fails without backtracking
+        return re.compile(''.join(f'[^{char}]*+{char}' for char in map(re.escape, query)))
+        
+    def match(self, pattern):
+        """Yield lists of the path ids a pattern finds in the chunks, a chunk at a time"""
+        for first, blob in self.chunks:
+            # One regex scan over the chunk finds its matching paths without a loop per path,
+            # a match ends with its path so counting newlines up to there gives the path id
+            ids = []
+            i = first - 1
+            position = 0
+            for match in pattern.finditer(blob):
+                end = match.end()
+                i += blob.count('\n', position, end)
+                position = end
+                ids.append(i)
+            yield ids
+            
+    def match_each(self, pattern):
+        """Yield lists of the path ids a pattern matches from their start, a chunk at a time"""
+        # Patterns that fail fast on every path are quicker applied one path at a time than searched for
+        for first in range(0, len(self.lowered), self.CHUNK_SIZE):
+            paths = self.lowered[first:first + self.CHUNK_SIZE]
+            yield list(compress(range(first, first + len(paths)), map(pattern.match, paths)))
+            
+    def score(self, i, tier, query, fuzzy_name):
+        """Score a path matched in a tier, shorter paths first"""
+        path = self.lowered[i]
+        name = path.rfind('/') + 1
+        if tier == self.NAME_SCORE and path.startswith(query, name):
+            tier += self.PREFIX_BONUS
+        elif tier == self.FUZZY_PATH_SCORE and fuzzy_name.match(path, name):
+            tier = self.FUZZY_NAME_SCORE
+        return tier - len(path)
+        
+class VSCodeQuickOpenService(QObject):
+    """Matches quick-open queries against a path index on a worker thread"""
+    
+    # query generation, [(relative path, absolute path)], finished
+    results = pyqtSignal(int, list, bool)
+    
+    MAX_RESULTS = 50
+    # Partial results are published at most this often while a query runs
+    PUBLISH_INTERVAL = 0.05
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.condition = threading.Condition()
+        self.project_job = None
+        self.query_job = None
+        self.generation = 0
+        self.path_index = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        
+    def set_project(self, project_index):
+        """Rebuild the path index from a scanned VSCodeProjectIndex"""
+        with self.condition:
+            self.project_job = project_index
+            self.condition.notify()
+            
+    def query(self, text):
+        """Start matching text, cancelling the previous query, returns its generation"""
+        with self.condition:
+            self.generation += 1
+            self.query_job = (self.generation, ''.join(text.lower().split()))
+            self.condition.notify()
+            return self.generation
+            
+    def run(self):
+        """Build indexes and answer queries until the application exits"""
+        while True:
+            with self.condition:
+                while self.project_job is None and self.query_job is None:
+                    self.condition.wait()
+                project_job, self.project_job = self.project_job, None
+                query_job, self.query_job = self.query_job, None
+                
+            if project_job is not None:
+                self.path_index = VSCodePathIndex.from_project(project_job)
+            if query_job is not None and self.path_index is not None:
+                self.run_query(self.path_index, *query_job)
+                
+    def publish(self, generation, index, heap, finished):
+        """Emit the best matches so far"""
+        ranked = sorted(heap, reverse=True)
+        self.results.emit(generation, [(index.paths[-i], os.path.join(index.root_path, index.paths[-i]))
+                                       for _, i in ranked], finished)
+                                       
+    def run_query(self, index, generation, query):
+        """Keep the top matches of a query, publishing them as chunks are matched"""
+        if not query:
+            self.publish(generation, index, [(0, -i) for i in range(min(len(index.paths), self.MAX_RESULTS))], True)
+            return
+            
+        # Min-heap of (score, -path id), ties go to the path that sorts first
+        heap = []
+        seen = set()
+        lowered = index.lowered
+        fuzzy_name = index.fuzzy_pattern(query)
+        # The first chunk's matches are shown straight away
+        published = 0
+        for tier, best, matches in index.tiers(query):
+            # Every path in a lower tier scores below the worst one kept
+            if len(heap) == self.MAX_RESULTS and heap[0][0] >= best:
+                break
+            for ids in matches:
+                if generation != self.generation:
+                    return
+                for i in ids:
+                    # Skip paths too long to beat the worst kept match before scoring them
+                    if i in seen or (len(heap) == self.MAX_RESULTS and best - len(lowered[i]) <= heap[0][0]):
+                        continue
+                    seen.add(i)
+                    entry = (index.score(i, tier, query, fuzzy_name), -i)
+                    if len(heap) < self.MAX_RESULTS:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+                if heap and time.perf_counter() - published > self.PUBLISH_INTERVAL:
+                    self.publish(generation, index, heap, False)
+                    published = time.perf_counter()
+        self.publish(generation, index, heap, True)
+        
+class VSCodeQuickOpen(QDialog):
+    """Ctrl+P palette, fuzzy matches file paths of the open folder as you type"""
+    
+    # absolute path
+    open_requested = pyqtSignal(str)
+    
+    def __init__(self, service, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self.generation = None
+        self.service.results.connect(self.on_results)
+        self.setWindowFlags(Qt.WindowType.Popup)
+        self.setup_palette()
+        
+    def setup_palette(self):
+        """Setup the query box and result list"""
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #252526;
+                border: 1px solid #454545;
+            }
+            QLineEdit {
+                background-color: #3c3c3c;
+                color: #cccccc;
+                border: 1px solid #007acc;
+                padding: 4px;
+            }
+            QListWidget {
+                background-color: #252526;
+                color: #cccccc;
+                border: none;
+            }
+            QListWidget::item:selected {
+                background-color: #094771;
+            }
+        """)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Search files by name")
+        self.query_edit.textChanged.connect(self.on_query_changed)
+        self.query_edit.returnPressed.connect(self.open_selected)
+        self.query_edit.installEventFilter(self)
+        layout.addWidget(self.query_edit)
+        self.result_list = QListWidget()
+        self.result_list.setUniformItemSizes(True)
+        self.result_list.itemActivated.connect(self.open_selected)
+        layout.addWidget(self.result_list)
+        
+    def popup(self):
+        """Show the palette at the top of the parent window"""
+        parent = self.parentWidget()
+        if parent is not None:
+            width = min(600, parent.width() - 40)
+            top_left = parent.mapToGlobal(parent.rect().topLeft())
+            self.setGeometry(top_left.x() + (parent.width() - width) // 2, top_left.y() + 60, width, 360)
+        self.show()
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+        self.on_query_changed(self.query_edit.text())
+        
+    def eventFilter(self, obj, event):
+        """Move the selection with the arrow keys while the query box has focus"""
+        if obj is self.query_edit and event.type() == QEvent.Type.KeyPress:
+            step = {Qt.Key.Key_Down: 1, Qt.Key.Key_Up: -1}.get(event.key())
+            if step and self.result_list.count():
+                row = (self.result_list.currentRow() + step) % self.result_list.count()
+                self.result_list.setCurrentRow(row)
+                return True
+        return super().eventFilter(obj, event)
+        
+    def on_query_changed(self, text):
+        """Hand the query to the worker, only the latest one is answered"""
+        self.generation = self.service.query(text)
+        
+    def on_results(self, generation, results, finished):
+        """Show the best matches of the current query"""
+        if generation != self.generation:
+            return
+        self.result_list.clear()
+        for rel, path in results:
+            name = rel.rsplit('/', 1)[-1]
+            item = QListWidgetItem(f"{name}    {rel}" if name != rel else name)
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            self.result_list.addItem(item)
+        if results:
+            self.result_list.setCurrentRow(0)
+            
+    def open_selected(self):
+        """Open the selected file and close the palette"""
+        item = self.result_list.currentItem()
+        if item is not None:
+            self.open_requested.emit(item.data(Qt.ItemDataRole.UserRole))
+            self.hide()
+            
+class VSCodeFileExplorer(QWidget):
+    """VS Code-like file explorer"""
+    
+    # Marks the dummy child shown under directories that are not listed yet
+    PLACEHOLDER_ROLE = Qt.ItemDataRole.UserRole + 1
+    
+    # Emitted with the VSCodeProjectIndex once a folder scan completes
+    index_ready = pyqtSignal(object)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root_path = None
         self.main_window = None
+        self.project_index = None
+        self.index_scanner = None
+        # gitignore-style patterns the user excludes from the index on top of DEFAULT_EXCLUDES
+        self.exclude_globs = []
+        # Directory items waiting for a background listing, keyed by path
+        self.pending_listings = {}
+        self.listers = set()
+        # Directory tree items keyed by absolute path
+        self.dir_items = {}
+        # Changed directories queued while an index scan is running
+        self.pending_changes = set()
+        self.file_watcher = VSCodeFileWatcher(self)
+        self.file_watcher.directories_changed.connect(self.on_directories_changed)
         self.setup_explorer()
         
     def setup_explorer(self):
@@ -783,6 +4547,7 @@ class VSCodeFileExplorer(QWidget):
             }
         """)
         self.file_tree.itemDoubleClicked.connect(self.on_file_selected)
+        self.file_tree.itemExpanded.connect(self.on_item_expanded)
         
         layout.addWidget(self.file_tree)
         
@@ -798,45 +4563,214 @@ class VSCodeFileExplorer(QWidget):
             
     def load_folder(self, folder_path):
         """Load a folder into the explorer"""
+        folder_path = os.path.abspath(folder_path)
         self.root_path = folder_path
         self.file_tree.clear()
+        self.pending_listings.clear()
+        self.dir_items.clear()
+        self.pending_changes.clear()
+        self.file_watcher.clear()
+        
+        # A cached index makes reopening a project instant
+        self.project_index = VSCodeProjectIndex(folder_path, self.exclude_globs)
+        self.project_index.load_cache()
         
         # Create root item
         root_item = QTreeWidgetItem(self.file_tree, [os.path.basename(folder_path)])
         root_item.setIcon(0, self.style().standardIcon(self.style().StandardPixmap.SP_DirIcon))
+        root_item.setData(0, Qt.ItemDataRole.UserRole, folder_path)
+        self.dir_items[os.path.abspath(folder_path)] = root_item
         
-        # Populate with files and folders
-        self.populate_tree_item(root_item, folder_path)
+        # Children are listed lazily when the item is expanded
+        self.add_placeholder(root_item)
         root_item.setExpanded(True)
+        self.load_children(root_item)
         
-    def populate_tree_item(self, parent_item, path):
-        """Recursively populate tree with files and folders"""
-        try:
-            for item_name in sorted(os.listdir(path)):
-                item_path = os.path.join(path, item_name)
+        # Revalidate the index against the disk in the background
+        self.file_watcher.set_directories(self.project_index.directories() or [folder_path])
+        self.start_index_scan()
+        
+    def set_exclude_globs(self, exclude_globs):
+        """Exclude more patterns from the index, rescanning the open folder with them"""
+        self.exclude_globs = list(exclude_globs)
+        if self.project_index is None or self.project_index.exclude_globs == self.exclude_globs:
+            return
+        # Listings are still valid, only what is excluded changes
+        index = VSCodeProjectIndex(self.root_path, self.exclude_globs)
+        index.dirs = dict(self.project_index.dirs)
+        self.project_index = index
+        self.pending_changes.clear()
+        self.start_index_scan()
+        
+    def start_index_scan(self, paths=None):
+        """Start a full scan, or a rescan of only the given directories"""
+        self.index_scanner = VSCodeIndexScanner(self.project_index, self, paths)
+        self.index_scanner.scanned.connect(self.on_index_scanned)
+        self.index_scanner.finished.connect(self.index_scanner.deleteLater)
+        self.index_scanner.start()
+        
+    def on_index_scanned(self, index, changed):
+        """Adopt a freshly scanned index and refresh directories that changed"""
+        if (self.root_path is None or index.root_path != self.root_path or
+                index.exclude_globs != self.exclude_globs):
+            return
+            
+        self.project_index = index
+        self.index_scanner = None
+        for path in changed:
+            entries = index.entries(path)
+            if entries is not None:
+                self.refresh_directory(path, entries)
                 
-                if os.path.isdir(item_path):
-                    # Skip hidden directories except .venv
-                    if item_name.startswith('.') and item_name != '.venv':
-                        continue
-                        
-                    dir_item = QTreeWidgetItem(parent_item, [item_name])
-                    # Use custom icon for .venv directory
-                    if item_name == '.venv':
-                        dir_item.setText(0, f"VENV {item_name}")
-                    else:
-                        dir_item.setText(0, f"📁 {item_name}")
-                    self.populate_tree_item(dir_item, item_path)
-                else:
-                    # File with custom icon
-                    file_item = QTreeWidgetItem(parent_item, [item_name])
-                    custom_icon = VSCodeFileIcons.get_file_icon(item_name)
-                    # Set the icon text directly in the item
-                    file_item.setText(0, f"{custom_icon} {item_name}")
-                    file_item.setData(0, Qt.ItemDataRole.UserRole, item_path)
-        except PermissionError:
-            pass
+        # Watch every indexed directory plus excluded ones opened in the tree
+        watched = set(index.directories())
+        watched.update(path for path in self.dir_items if not self.has_placeholder(self.dir_items[path]))
+        self.file_watcher.set_directories(watched)
+        self.index_ready.emit(index)
+        
+        if self.pending_changes:
+            paths = sorted(self.pending_changes)
+            self.pending_changes.clear()
+            self.start_index_scan(paths)
             
+    def on_directories_changed(self, paths):
+        """Apply a coalesced burst of filesystem changes to the index and tree"""
+        indexed = []
+        for path in paths:
+            if self.project_index and self.project_index.entries(path) is not None:
+                indexed.append(path)
+            elif path in self.dir_items:
+                # Excluded directories open in the tree are relisted directly
+                self.start_listing(self.dir_items[path], path)
+                
+        if not indexed:
+            return
+        if self.index_scanner is not None:
+            self.pending_changes.update(indexed)
+        else:
+            self.start_index_scan(indexed)
+        
+    def add_placeholder(self, dir_item):
+        """Add a placeholder child so an unloaded directory can be expanded"""
+        placeholder = QTreeWidgetItem(dir_item, ["Loading..."])
+        placeholder.setData(0, self.PLACEHOLDER_ROLE, True)
+        
+    def has_placeholder(self, dir_item):
+        """Check whether a directory item has not been listed yet"""
+        return (dir_item.childCount() == 1 and
+                bool(dir_item.child(0).data(0, self.PLACEHOLDER_ROLE)))
+        
+    def on_item_expanded(self, item):
+        """List a directory the first time it is expanded"""
+        self.load_children(item)
+        
+    def load_children(self, dir_item):
+        """Fill an unloaded directory item from the index or a background listing"""
+        path = dir_item.data(0, Qt.ItemDataRole.UserRole)
+        if not path or not self.has_placeholder(dir_item) or path in self.pending_listings:
+            return
+            
+        entries = self.project_index.entries(path) if self.project_index else None
+        if entries is not None:
+            dir_item.takeChildren()
+            self.populate_tree_item(dir_item, entries)
+            return
+            
+        # Not indexed (excluded or not scanned yet), list it from disk
+        self.start_listing(dir_item, path)
+        
+    def start_listing(self, dir_item, path):
+        """List a directory in a background thread"""
+        if path in self.pending_listings:
+            return
+        self.pending_listings[path] = dir_item
+        lister = VSCodeDirectoryLister(path, self)
+        lister.listed.connect(self.on_directory_listed)
+        lister.finished.connect(lambda: self.listers.discard(lister))
+        lister.finished.connect(lister.deleteLater)
+        self.listers.add(lister)
+        lister.start()
+        
+    def on_directory_listed(self, path, entries):
+        """Fill or refresh a directory item with its listed entries"""
+        dir_item = self.pending_listings.pop(path, None)
+        # The folder may have been closed or reloaded while listing
+        if dir_item is None or self.dir_items.get(path) is not dir_item:
+            return
+            
+        if self.has_placeholder(dir_item):
+            dir_item.takeChildren()
+            self.populate_tree_item(dir_item, entries)
+            self.file_watcher.add_directory(path)
+        else:
+            self.refresh_directory(path, entries)
+        
+    def is_visible_entry(self, item_name, is_dir):
+        """Check whether an entry is shown in the tree"""
+        # Skip hidden directories except .venv
+        return not (is_dir and item_name.startswith('.') and item_name != '.venv')
+        
+    def create_tree_item(self, item_name, item_path, is_dir):
+        """Create a tree item for a file or directory"""
+        if is_dir:
+            dir_item = QTreeWidgetItem([item_name])
+            # Use custom icon for .venv directory
+            if item_name == '.venv':
+                dir_item.setText(0, f"VENV {item_name}")
+            else:
+                dir_item.setText(0, f"📁 {item_name}")
+            dir_item.setData(0, Qt.ItemDataRole.UserRole, item_path)
+            self.add_placeholder(dir_item)
+            self.dir_items[os.path.abspath(item_path)] = dir_item
+            return dir_item
+            
+        # File with custom icon
+        file_item = QTreeWidgetItem([item_name])
+        custom_icon = VSCodeFileIcons.get_file_icon(item_name)
+        # Set the icon text directly in the item
+        file_item.setText(0, f"{custom_icon} {item_name}")
+        file_item.setData(0, Qt.ItemDataRole.UserRole, item_path)
+        return file_item
+        
+    def populate_tree_item(self, parent_item, entries):
+        """Populate one level of the tree with files and folders"""
+        items = [self.create_tree_item(item_name, item_path, is_dir)
+                 for item_name, item_path, is_dir in entries
+                 if self.is_visible_entry(item_name, is_dir)]
+        parent_item.addChildren(items)
+        
+    def forget_item(self, item):
+        """Drop a removed item and its descendants from the directory registry"""
+        path = item.data(0, Qt.ItemDataRole.UserRole)
+        if path and self.dir_items.get(os.path.abspath(path)) is item:
+            del self.dir_items[os.path.abspath(path)]
+            self.pending_listings.pop(path, None)
+        for i in range(item.childCount()):
+            self.forget_item(item.child(i))
+            
+    def refresh_directory(self, path, entries):
+        """Bring an already listed directory item in line with new entries"""
+        dir_item = self.dir_items.get(os.path.abspath(path))
+        if dir_item is None or self.has_placeholder(dir_item):
+            return
+            
+        existing = {}
+        for i in range(dir_item.childCount()):
+            child = dir_item.child(i)
+            existing[child.data(0, Qt.ItemDataRole.UserRole)] = child
+            
+        wanted = [entry for entry in entries if self.is_visible_entry(entry[0], entry[2])]
+        wanted_paths = {item_path for _, item_path, _ in wanted}
+        for child_path, child in existing.items():
+            if child_path not in wanted_paths:
+                self.forget_item(child)
+                dir_item.removeChild(child)
+                
+        # Both lists are sorted by name, so inserting in order keeps the tree sorted
+        for position, (item_name, item_path, is_dir) in enumerate(wanted):
+            if item_path not in existing:
+                dir_item.insertChild(position, self.create_tree_item(item_name, item_path, is_dir))
+                
     def on_file_selected(self, item, column):
         """Handle file selection"""
         file_path = item.data(0, Qt.ItemDataRole.UserRole)
@@ -846,10 +4780,34 @@ class VSCodeFileExplorer(QWidget):
 class VSCodeMainWindow(QMainWindow):
     """Main VS Code-like window"""
     
+    # Files at least this big are loaded progressively without highlighting
+    LARGE_FILE_THRESHOLD = 10 * 1024 * 1024
+    # Files at least this big open in the read-only log viewer instead
+    LOG_VIEWER_THRESHOLD = 256 * 1024 * 1024
+    
+    # Typing must pause this long before the preview is re-rendered
+    PREVIEW_DEBOUNCE_MS = 200
+    # and this long before the health metrics are refreshed
+    HEALTH_DEBOUNCE_MS = 500
+    # Bigger documents are only measured on request, copying them out would stall typing
+    LIVE_HEALTH_MAX_CHARS = 2 * 1024 * 1024
+    
     def __init__(self):
         super().__init__()
         self.current_file_path = None
         self.preview_widget = None
+        # Editor whose preview waits for typing to settle
+        self.preview_editor = None
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.PREVIEW_DEBOUNCE_MS)
+        self.preview_timer.timeout.connect(self.refresh_pending_preview)
+        # Editor whose health metrics wait for typing to settle
+        self.health_editor = None
+        self.health_timer = QTimer(self)
+        self.health_timer.setSingleShot(True)
+        self.health_timer.setInterval(self.HEALTH_DEBOUNCE_MS)
+        self.health_timer.timeout.connect(self.refresh_live_health)
         self.project_templates = VSCodeProjectTemplates()
         self.setup_window()
         self.setup_ui()
@@ -981,13 +4939,19 @@ class VSCodeMainWindow(QMainWindow):
         self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.terminal_dock)
         
         # Initialize AI fixer
-        self.ai_fixer = AIFixer()
+        self.ai_fixer = AIFixer(cache=VSCodeAIFixCache())
+        self.ai_fix_service = VSCodeAIFixService(self.ai_fixer, self)
+        self.ai_fix_preview = None
+        self.batch_fix_service = VSCodeBatchFixService(self.ai_fixer, self)
+        self.batch_fix_dialog = None
         
         # Create Visual Code Flow dock
         self.flow_dock = QDockWidget("Visual Code Flow", self)
         self.flow_dock.setAllowedAreas(Qt.DockWidgetArea.RightDockWidgetArea)
-        self.visual_flow = VSCodeVisualFlow()
-        self.flow_dock.setWidget(self.visual_flow)
+        self.flow_panel = VSCodeFlowPanel()
+        self.visual_flow = self.flow_panel.view
+        self.flow_dock.setWidget(self.flow_panel)
+        self.project_graph_builder = None
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.flow_dock)
         
         # Create Health Dashboard dock
@@ -995,8 +4959,20 @@ class VSCodeMainWindow(QMainWindow):
         self.health_dock.setAllowedAreas(Qt.DockWidgetArea.RightDockWidgetArea)
         self.health_dashboard = VSCodeHealthDashboard()
         self.health_dock.setWidget(self.health_dashboard)
+        self.project_metrics_builder = None
+        # Measures the current editor in the background while the health dock is open
+        self.health_monitor = VSCodeHealthMonitor(self)
+        self.health_monitor.measured.connect(self.on_health_measured)
+        self.editor_area.currentChanged.connect(lambda index: self.schedule_health_update(self.current_editor()))
+        self.health_dock.visibilityChanged.connect(
+            lambda visible: visible and self.schedule_health_update(self.current_editor()))
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.health_dock)
         
+        # Both docks are fed from one shared, cached analysis
+        self.analysis_service = VSCodeAnalysisService(self)
+        self.analysis_service.analyzed.connect(self.flow_panel.show_analysis)
+        self.analysis_service.analyzed.connect(self.health_dashboard.show_analysis)
+        
         # Create Package Manager dock
         self.package_dock = QDockWidget("Package Manager", self)
         self.package_dock.setAllowedAreas(Qt.DockWidgetArea.RightDockWidgetArea)
@@ -1004,6 +4980,24 @@ class VSCodeMainWindow(QMainWindow):
         self.package_dock.setWidget(self.package_manager)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.package_dock)
         
+        # Create Search dock, its index follows the folder open in the explorer
+        self.search_service = VSCodeSearchService(self)
+        self.search_service.indexing.connect(self.on_search_indexing)
+        self.search_panel = VSCodeSearchPanel(self.search_service)
+        self.search_panel.open_requested.connect(self.open_file_at_line)
+        self.search_dock = QDockWidget("Search", self)
+        self.search_dock.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea |
+                                         Qt.DockWidgetArea.BottomDockWidgetArea)
+        self.search_dock.setWidget(self.search_panel)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.search_dock)
+        self.search_dock.hide()
+        self.sidebar.index_ready.connect(self.on_project_index_ready)
+        
+        # Create Go to File palette, matching against the same project index
+        self.quick_open_service = VSCodeQuickOpenService(self)
+        self.quick_open = VSCodeQuickOpen(self.quick_open_service, self)
+        self.quick_open.open_requested.connect(self.open_file_at_line)
+        
         # Create status bar
         self.status_bar = VSCodeStatusBar()
         self.setStatusBar(self.status_bar)
@@ -1032,6 +5026,11 @@ class VSCodeMainWindow(QMainWindow):
         
         file_menu.addSeparator()
         
+        go_to_file_action = QAction("Go to File...", self)
+        go_to_file_action.setShortcut("Ctrl+P")
+        go_to_file_action.triggered.connect(self.go_to_file)
+        file_menu.addAction(go_to_file_action)
+        
         save_action = QAction("Save", self)
         save_action.setShortcut("Ctrl+S")
         save_action.triggered.connect(self.save_file)
@@ -1079,6 +5078,13 @@ class VSCodeMainWindow(QMainWindow):
         paste_action.triggered.connect(self.paste)
         edit_menu.addAction(paste_action)
         
+        edit_menu.addSeparator()
+        
+        find_in_files_action = QAction("Find in Files", self)
+        find_in_files_action.setShortcut("Ctrl+Shift+F")
+        find_in_files_action.triggered.connect(self.find_in_files)
+        edit_menu.addAction(find_in_files_action)
+        
         # Terminal menu
         terminal_menu = menubar.addMenu("Terminal")
         
@@ -1124,10 +5130,28 @@ class VSCodeMainWindow(QMainWindow):
         analyze_flow_action.triggered.connect(self.analyze_code_flow)
         project_menu.addAction(analyze_flow_action)
         
+        project_flow_action = QAction("Analyze Project Flow", self)
+        project_flow_action.triggered.connect(self.analyze_project_flow)
+        project_menu.addAction(project_flow_action)
+        
         check_health_action = QAction("Check Code Health", self)
         check_health_action.triggered.connect(self.check_code_health)
         project_menu.addAction(check_health_action)
         
+        project_health_action = QAction("Check Project Health", self)
+        project_health_action.triggered.connect(self.check_project_health)
+        project_menu.addAction(project_health_action)
+        
+        fix_all_action = QAction("Fix All Errors with AI...", self)
+        fix_all_action.triggered.connect(self.fix_all_errors)
+        project_menu.addAction(fix_all_action)
+        
+        project_menu.addSeparator()
+        
+        exclude_action = QAction("Exclude Files...", self)
+        exclude_action.triggered.connect(self.edit_exclude_globs)
+        project_menu.addAction(exclude_action)
+        
         # Help menu
         help_menu = menubar.addMenu("Help")
         
@@ -1177,28 +5201,64 @@ class VSCodeMainWindow(QMainWindow):
         ai_fix_btn.setToolTip("Fix code using AI")
         ai_fix_btn.triggered.connect(self.ai_fix_code)
         
-    def create_editor_tab(self, filename, file_path=None):
+    def create_editor_tab(self, filename, file_path=None, large_file=False):
         """Create a new editor tab"""
-        editor = VSCodeEditor(file_path=file_path)
+        editor = VSCodeEditor(file_path=file_path, large_file=large_file)
         tab_index = self.editor_area.addTab(editor, filename)
         self.editor_area.setCurrentIndex(tab_index)
         
-        # Connect text change to preview update
+        # Connect text change to the debounced preview and health updates
         editor.textChanged.connect(lambda: self.update_preview_if_needed(editor))
+        editor.textChanged.connect(lambda: self.schedule_health_update(editor))
         
         return editor
         
     def update_preview_if_needed(self, editor):
-        """Update preview if the file is markdown or HTML"""
-        if hasattr(editor, 'file_path') and editor.file_path:
+        """Schedule a preview update if the file is markdown or HTML"""
+        if hasattr(editor, 'file_path') and editor.file_path and not editor.large_file:
             ext = os.path.splitext(editor.file_path)[1].lower()
             if ext in ['.md', '.html']:
-                content = editor.toPlainText()
-                if ext == '.md':
-                    self.show_preview(content, "markdown")
-                elif ext == '.html':
-                    self.show_preview(content, "html")
-                    
+                # Restarting the timer coalesces a burst of keystrokes into one render
+                self.preview_editor = editor
+                self.preview_timer.start()
+                
+    def refresh_pending_preview(self):
+        """Render the preview for the editor that changed once typing settles"""
+        editor = self.preview_editor
+        self.preview_editor = None
+        if editor is None or self.editor_area.indexOf(editor) == -1:
+            return
+            
+        content = editor.toPlainText()
+        ext = os.path.splitext(editor.file_path)[1].lower()
+        if ext == '.md':
+            self.show_preview(content, "markdown")
+        elif ext == '.html':
+            self.show_preview(content, "html")
+            
+    def schedule_health_update(self, editor):
+        """Measure an editor once typing settles, runs on every keystroke so it only restarts a timer"""
+        if editor is not None and self.health_dock.isVisible():
+            self.health_editor = editor
+            self.health_timer.start()
+            
+    def refresh_live_health(self):
+        """Hand the current Python document to the health monitor"""
+        editor = self.health_editor
+        self.health_editor = None
+        if editor is None or editor is not self.current_editor() or editor.loading or editor.large_file:
+            return
+        if os.path.splitext(editor.file_path or '')[1].lower() not in ('', '.py', '.pyw'):
+            return
+        if editor.document().characterCount() > self.LIVE_HEALTH_MAX_CHARS:
+            return
+        self.health_monitor.measure(editor, editor.toPlainText())
+        
+    def on_health_measured(self, editor, metrics):
+        """Show fresh metrics if their editor is still the current one"""
+        if editor is self.current_editor():
+            self.health_dashboard.show_metrics(metrics)
+            
     def show_preview(self, content, file_type):
         """Show preview for markdown or HTML files"""
         if not self.preview_widget:
@@ -1208,7 +5268,7 @@ class VSCodeMainWindow(QMainWindow):
             self.preview_dock.setAllowedAreas(Qt.DockWidgetArea.RightDockWidgetArea)
             self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.preview_dock)
             
-        self.preview_widget.update_preview(content, file_type)
+        self.preview_widget.request_preview(content, file_type)
         self.preview_dock.show()
         
     def new_file(self):
@@ -1227,12 +5287,22 @@ class VSCodeMainWindow(QMainWindow):
     def open_file_path(self, file_path):
         """Open a file by path"""
         try:
+            size = os.path.getsize(file_path)
+            if size >= self.LOG_VIEWER_THRESHOLD:
+                self.open_log_viewer(file_path)
+                return
+            if size >= self.LARGE_FILE_THRESHOLD:
+                self.open_large_file(file_path)
+                return
+                
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             filename = os.path.basename(file_path)
             editor = self.create_editor_tab(filename, file_path)
             editor.setPlainText(content)
+            editor.saved_hash = VSCodeFileSaver.content_hash(VSCodeFileSaver.encode_text(content))
+            editor.saved_stat = VSCodeFileSaver.file_stat(file_path)
             self.current_file_path = file_path
             
             # Show preview for markdown/HTML files
@@ -1245,101 +5315,272 @@ class VSCodeMainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not open file: {str(e)}")
             
+    def open_large_file(self, file_path):
+        """Open a large file progressively, showing the first screen right away"""
+        filename = os.path.basename(file_path)
+        editor = self.create_editor_tab(filename, file_path, large_file=True)
+        self.current_file_path = file_path
+        
+        editor.loading_progress.connect(
+            lambda done, total: self.status_bar.show_progress(f"Loading {filename}...", done, total))
+        editor.loading_finished.connect(lambda: self.on_large_file_loaded(editor, filename))
+        editor.load_progressively()
+        
+    def on_large_file_loaded(self, editor, filename):
+        """Report how a progressive load ended, marking the tab of a partial document"""
+        if not editor.partial:
+            self.status_bar.clear_progress(f"Loaded {filename} (syntax highlighting off for large files)")
+            return
+        self.status_bar.clear_progress(f"Loading {filename} stopped early, showing the start read-only")
+        index = self.editor_area.indexOf(editor)
+        if index >= 0:
+            self.editor_area.setTabText(index, f"{filename} (partial)")
+        
+    def open_log_viewer(self, file_path):
+        """Open a huge file read-only, indexing its lines in the background"""
+        filename = os.path.basename(file_path)
+        viewer = VSCodeLogViewer(file_path)
+        viewer.indexing_progress.connect(
+            lambda done, total: self.status_bar.show_progress(f"Indexing {filename}...", done, total))
+        viewer.indexing_finished.connect(
+            lambda: self.status_bar.clear_progress(
+                f"{filename}: {viewer.line_count():,} lines (read-only, follows appended lines at the end)"))
+        
+        tab_index = self.editor_area.addTab(viewer, filename)
+        self.editor_area.setCurrentIndex(tab_index)
+        self.current_file_path = file_path
+        
+    def find_editor(self, file_path):
+        """Get the open editor of a file, or None"""
+        for index in range(self.editor_area.count()):
+            widget = self.editor_area.widget(index)
+            if isinstance(widget, VSCodeEditor) and widget.file_path == file_path:
+                return widget
+        return None
+        
+    def open_file_at_line(self, file_path, line=None):
+        """Show a file with the cursor on a line, reusing its tab if it is open"""
+        editor = self.find_editor(file_path)
+        if editor is not None:
+            self.editor_area.setCurrentIndex(self.editor_area.indexOf(editor))
+        else:
+            self.open_file_path(file_path)
+        editor = self.current_editor()
+        if editor is None or editor.file_path != file_path:
+            return
+        block = editor.document().findBlockByNumber(line - 1) if line else None
+        if block is not None and block.isValid():
+            cursor = QTextCursor(block)
+            editor.setTextCursor(cursor)
+            editor.centerCursor()
+        editor.setFocus()
+        
+    def find_in_files(self):
+        """Show the search dock, searching for the selected text"""
+        editor = self.current_editor()
+        selected = editor.textCursor().selectedText() if editor else ""
+        self.search_dock.show()
+        # A selection across lines is no use as a query
+        self.search_panel.focus_query(selected if '\u2029' not in selected else None)
+        
+    def go_to_file(self):
+        """Show the Go to File palette"""
+        self.quick_open.popup()
+        
+    def on_project_index_ready(self, index):
+        """Keep the search and path indexes in step with the explorer's project index"""
+        self.search_panel.set_root_path(index.root_path)
+        self.search_service.set_project(index)
+        self.quick_open_service.set_project(index)
+        
+    def on_search_indexing(self, done, total):
+        """Report search indexing progress"""
+        if done < total:
+            self.status_bar.show_progress("Indexing files for search...", done, total)
+        else:
+            self.status_bar.clear_progress(f"Search index updated ({total} files indexed)")
+            
+    def current_editor(self):
+        """Get the editor in the current tab, None for log viewers and empty tabs"""
+        widget = self.editor_area.currentWidget()
+        if isinstance(widget, VSCodeEditor):
+            return widget
+        return None
+        
     def open_folder(self):
         """Open a folder"""
         self.sidebar.open_folder()
                 
     def save_file(self):
         """Save the current file"""
-        current_editor = self.editor_area.currentWidget()
+        current_editor = self.current_editor()
         if current_editor:
-            if hasattr(current_editor, 'file_path') and current_editor.file_path:
+            if current_editor.loading:
+                self.status_bar.showMessage("File is still loading, try again when it has finished")
+                return
+            if current_editor.file_path:
                 # Save to existing file
-                try:
-                    with open(current_editor.file_path, 'w', encoding='utf-8') as f:
-                        f.write(current_editor.toPlainText())
-                    self.status_bar.showMessage("File saved successfully!")
-                except Exception as e:
-                    QMessageBox.critical(self, "Error", f"Could not save file: {str(e)}")
+                self.save_editor(current_editor, current_editor.file_path)
             else:
                 # Save as new file
                 self.save_file_as()
                 
     def save_file_as(self):
         """Save file as"""
+        if getattr(self.current_editor(), 'loading', False):
+            self.status_bar.showMessage("File is still loading, try again when it has finished")
+            return
+            
         file_path, _ = QFileDialog.getSaveFileName(
             self, "Save File As", "", 
             "All Files (*);;Python Files (*.py);;JavaScript Files (*.js);;CSS Files (*.css);;Markdown Files (*.md);;HTML Files (*.html)"
         )
         if file_path:
-            current_editor = self.editor_area.currentWidget()
+            current_editor = self.current_editor()
             if current_editor:
-                try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(current_editor.toPlainText())
-                    
-                    # Update the editor's file path and tab name
-                    current_editor.file_path = file_path
-                    filename = os.path.basename(file_path)
-                    tab_index = self.editor_area.currentIndex()
-                    self.editor_area.setTabText(tab_index, filename)
-                    
-                    # Update syntax highlighter
-                    ext = os.path.splitext(file_path)[1].lower()
-                    if ext == '.py':
-                        language = "python"
-                    elif ext in ['.js', '.jsx']:
-                        language = "javascript"
-                    elif ext == '.md':
-                        language = "markdown"
-                    else:
-                        language = "text"
-                    
-                    current_editor.highlighter = VSCodeSyntaxHighlighter(
-                        current_editor.document(), language
-                    )
-                    
-                    self.status_bar.showMessage("File saved successfully!")
-                except Exception as e:
-                    QMessageBox.critical(self, "Error", f"Could not save file: {str(e)}")
-                    
+                self.save_editor(current_editor, file_path)
+                
+    def save_editor(self, editor, file_path):
+        """Snapshot an editor's text and write it to disk in the background"""
+        if editor.saver is not None:
+            # Save the latest text again once the running save is done
+            editor.save_pending = file_path
+            return
+            
+        same_file = file_path == editor.file_path
+        filename = os.path.basename(file_path)
+        if editor.partial:
+            self.status_bar.showMessage(f"Only part of {os.path.basename(editor.file_path)} was loaded, "
+                                        f"it can't be saved")
+            return
+        if same_file and not editor.document().isModified() and editor.saved_stat:
+            # Nothing was edited since the last load or save, skip the snapshot too
+            try:
+                if VSCodeFileSaver.file_stat(file_path) == editor.saved_stat:
+                    self.status_bar.showMessage(f"{filename} is unchanged, nothing to save")
+                    return
+            except OSError:
+                pass
+                
+        revision = editor.document().revision()
+        saver = VSCodeFileSaver(file_path, editor.toPlainText(),
+                                editor.saved_hash if same_file else None,
+                                editor.saved_stat if same_file else None, self)
+        editor.saver = saver
+        saver.saved.connect(
+            lambda path, digest, stat, skipped, elapsed:
+                self.on_file_saved(editor, path, digest, stat, skipped, elapsed, revision))
+        saver.save_failed.connect(lambda path, message: self.on_save_failed(message))
+        saver.finished.connect(lambda: self.on_saver_finished(editor))
+        self.status_bar.showMessage(f"Saving {filename}...")
+        saver.start()
+        
+    def on_file_saved(self, editor, file_path, digest, stat, skipped, elapsed, revision):
+        """Remember what was saved and report it"""
+        editor.saved_hash = digest
+        editor.saved_stat = stat
+        # Edits made while the snapshot was being written still need saving
+        if editor.document().revision() == revision:
+            editor.document().setModified(False)
+        if file_path != editor.file_path:
+            self.set_editor_file_path(editor, file_path)
+            
+        filename = os.path.basename(file_path)
+        if skipped:
+            self.status_bar.showMessage(f"{filename} is unchanged, nothing to save")
+        else:
+            self.status_bar.showMessage(f"Saved {filename} ({elapsed * 1000:.0f} ms)")
+            
+    def on_save_failed(self, message):
+        """Report a failed save, the original file is left untouched"""
+        QMessageBox.critical(self, "Error", f"Could not save file: {message}")
+        
+    def on_saver_finished(self, editor):
+        """Run a save requested while the previous one was still writing"""
+        editor.saver.deleteLater()
+        editor.saver = None
+        if editor.save_pending:
+            file_path = editor.save_pending
+            editor.save_pending = None
+            self.save_editor(editor, file_path)
+            
+    def set_editor_file_path(self, editor, file_path):
+        """Point an editor at a new file, updating its tab and highlighter"""
+        editor.file_path = file_path
+        filename = os.path.basename(file_path)
+        tab_index = self.editor_area.indexOf(editor)
+        if tab_index != -1:
+            self.editor_area.setTabText(tab_index, filename)
+            
+        # Update syntax highlighter
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == '.py':
+            language = "python"
+        elif ext in ['.js', '.jsx']:
+            language = "javascript"
+        elif ext == '.md':
+            language = "markdown"
+        else:
+            language = "text"
+        
+        if not editor.large_file:
+            if editor.highlighter is not None:
+                editor.highlighter.setDocument(None)
+            editor.highlighter = VSCodeSyntaxHighlighter(
+                editor.document(), language
+            )
+            
+    def closeEvent(self, event):
+        """Let background saves finish before the window closes"""
+        for saver in self.findChildren(VSCodeFileSaver):
+            saver.wait()
+        super().closeEvent(event)
+        
     def close_tab(self, index):
         """Close a tab"""
+        editor = self.editor_area.widget(index)
+        if isinstance(editor, VSCodeEditor):
+            editor.cancel_loading()
+            self.health_monitor.forget(editor)
+            if self.ai_fix_preview is not None and self.ai_fix_preview.editor is editor:
+                self.ai_fix_preview.reject()
+        elif isinstance(editor, VSCodeLogViewer):
+            editor.close_viewer()
         self.editor_area.removeTab(index)
         
     def undo(self):
         """Undo action"""
-        current_editor = self.editor_area.currentWidget()
+        current_editor = self.current_editor()
         if current_editor:
             current_editor.undo()
             
     def redo(self):
         """Redo action"""
-        current_editor = self.editor_area.currentWidget()
+        current_editor = self.current_editor()
         if current_editor:
             current_editor.redo()
             
     def cut(self):
         """Cut action"""
-        current_editor = self.editor_area.currentWidget()
+        current_editor = self.current_editor()
         if current_editor:
             current_editor.cut()
             
     def copy(self):
         """Copy action"""
-        current_editor = self.editor_area.currentWidget()
+        current_editor = self.current_editor()
         if current_editor:
             current_editor.copy()
             
     def paste(self):
         """Paste action"""
-        current_editor = self.editor_area.currentWidget()
+        current_editor = self.current_editor()
         if current_editor:
             current_editor.paste()
                     
     def run_code(self):
         """Run the current code"""
-        current_editor = self.editor_area.currentWidget()
+        current_editor = self.current_editor()
         if current_editor:
             code = current_editor.toPlainText()
             if code.strip():
@@ -1375,7 +5616,7 @@ class VSCodeMainWindow(QMainWindow):
                 
     def ai_fix_code(self):
         """Fix code using AI based on terminal output"""
-        current_editor = self.editor_area.currentWidget()
+        current_editor = self.current_editor()
         if not current_editor:
             QMessageBox.warning(self, "Warning", "No active editor")
             return
@@ -1385,171 +5626,1656 @@ class VSCodeMainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", "No code to fix")
             return
             
-        # Get the last error from terminal
+        # Get the last error from terminal, a whole Python traceback when there is one
         terminal_text = self.terminal.terminal_output.toPlainText()
+        traceback = VSCodeTraceback.parse(terminal_text)
         lines = terminal_text.split('\n')
         
         # Find the last error message
         error_message = ""
-        for line in reversed(lines):
-            if any(keyword in line.lower() for keyword in ['error', 'exception', 'traceback', 'syntaxerror']):
-                error_message = line.strip()
-                break
+        if traceback is not None:
+            error_message = traceback.text()
+        else:
+            for line in reversed(lines):
+                if any(keyword in line.lower() for keyword in ['error', 'exception', 'traceback', 'syntaxerror']):
+                    error_message = line.strip()
+                    break
         
         if not error_message:
             QMessageBox.information(self, "Info", "No recent errors found in terminal")
             return
             
-        # Determine language
-        language = "python"  # default
-        if hasattr(current_editor, 'file_path') and current_editor.file_path:
-            ext = os.path.splitext(current_editor.file_path)[1].lower()
-            if ext == '.js':
-                language = "javascript"
-            elif ext == '.html':
-                language = "html"
-            elif ext == '.css':
-                language = "css"
-            elif ext == '.json':
-                language = "json"
+        # Determine language
+        language = "python"  # default
+        if hasattr(current_editor, 'file_path') and current_editor.file_path:
+            ext = os.path.splitext(current_editor.file_path)[1].lower()
+            if ext == '.js':
+                language = "javascript"
+            elif ext == '.html':
+                language = "html"
+            elif ext == '.css':
+                language = "css"
+            elif ext == '.json':
+                language = "json"
+                
+        # Only the code around the failing line of this file is sent, and only that part is replaced
+        region = None
+        if traceback is not None and language == "python" and current_editor.file_path:
+            line = traceback.line_in(current_editor.file_path)
+            if line is not None:
+                region = VSCodeFixRegion.around(code, line)
+        
+        # Fix code using AI, the fix streams into a diff preview and is only applied on request
+        if self.ai_fix_preview is not None:
+            self.ai_fix_preview.reject()
+        self.terminal.terminal_output.append("\n🤖 AI is analyzing and fixing the code...")
+        self.ai_fix_preview = VSCodeAIFixPreview(self.ai_fix_service, current_editor, code, region, self)
+        self.ai_fix_preview.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.ai_fix_preview.applied.connect(self.on_ai_fix_applied)
+        self.ai_fix_preview.finished.connect(self.on_ai_fix_preview_closed)
+        self.ai_fix_preview.start(error_message, language)
+        self.ai_fix_preview.show()
+        
+    def fix_all_errors(self):
+        """Find every Python file of the open folder that does not compile and queue AI fixes for review"""
+        index = self.sidebar.project_index
+        if not self.sidebar.root_path or index is None:
+            QMessageBox.warning(self, "Warning", "Open a folder first")
+            return
+        if self.batch_fix_dialog is not None:
+            self.batch_fix_dialog.reject()
+        self.batch_fix_dialog = VSCodeBatchFixDialog(self.batch_fix_service, self)
+        self.batch_fix_dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.batch_fix_dialog.finished.connect(self.on_batch_fix_dialog_closed)
+        self.batch_fix_dialog.start(list(index.files({'.py'})))
+        self.batch_fix_dialog.show()
+        
+    def on_batch_fix_dialog_closed(self, result):
+        """Forget the batch fix dialog once it closes"""
+        if self.sender() is self.batch_fix_dialog:
+            self.batch_fix_dialog = None
+            
+    def on_ai_fix_applied(self, fixed_code):
+        """Report an applied AI fix"""
+        self.terminal.terminal_output.append("✅ Code has been fixed by AI!")
+        
+    def on_ai_fix_preview_closed(self, result):
+        """Forget the AI fix preview once it closes"""
+        if self.sender() is self.ai_fix_preview:
+            self.ai_fix_preview = None
+                
+    def toggle_terminal(self):
+        """Toggle terminal visibility"""
+        if self.terminal_dock.isVisible():
+            self.terminal_dock.hide()
+        else:
+            self.terminal_dock.show()
+            self.terminal.command_input.setFocus()
+            
+    def create_virtual_environment(self):
+        """Create a new virtual environment"""
+        if self.sidebar.root_path:
+            self.terminal.venv_manager.create_venv(self.sidebar.root_path)
+        else:
+            QMessageBox.warning(self, "Warning", "Please open a folder first")
+            
+    def activate_virtual_environment(self):
+        """Activate a virtual environment"""
+        if self.sidebar.root_path:
+            venv_path = os.path.join(self.sidebar.root_path, '.venv')
+            if os.path.exists(venv_path):
+                self.terminal.venv_manager.activate_venv(venv_path)
+            else:
+                QMessageBox.warning(self, "Warning", "No virtual environment found. Create one first.")
+        else:
+            QMessageBox.warning(self, "Warning", "Please open a folder first")
+            
+    def deactivate_virtual_environment(self):
+        """Deactivate current virtual environment"""
+        self.terminal.venv_manager.deactivate_venv()
+        
+    def install_package(self):
+        """Install a package in the current virtual environment"""
+        package_name, ok = QInputDialog.getText(self, "Install Package", "Package name:")
+        if ok and package_name:
+            self.terminal.venv_manager.install_package(package_name)
+            
+    def edit_exclude_globs(self):
+        """Edit the patterns excluded from search, quick open and project checks"""
+        text, ok = QInputDialog.getMultiLineText(
+            self, "Exclude Files", "Patterns to exclude, one per line as in .gitignore:",
+            '\n'.join(self.sidebar.exclude_globs))
+        if ok:
+            self.sidebar.set_exclude_globs([line.strip() for line in text.splitlines() if line.strip()])
+            
+    def create_new_project(self):
+        """Create a new project from template"""
+        templates = list(self.project_templates.templates.keys())
+        template_name, ok = QInputDialog.getItem(self, "New Project", 
+                                               "Choose template:", templates, 0, False)
+        if ok and template_name:
+            project_path, _ = QFileDialog.getExistingDirectory(self, "Choose Project Location")
+            if project_path:
+                success, message = self.project_templates.create_project(template_name, project_path)
+                if success:
+                    QMessageBox.information(self, "Success", message)
+                    # Open the new project
+                    self.sidebar.load_folder(project_path)
+                else:
+                    QMessageBox.critical(self, "Error", message)
+                    
+    def request_analysis(self, editor):
+        """Analyze an editor's code, False if there is none"""
+        revision = editor.document().revision()
+        # An unchanged document doesn't even need to be copied and hashed
+        if editor.analysis_revision is not None and editor.analysis_revision[0] == revision:
+            if self.analysis_service.publish(editor.analysis_revision[1]):
+                return True
+                
+        code = editor.toPlainText()
+        if not code.strip():
+            return False
+        editor.analysis_revision = (revision, self.analysis_service.analyze(code))
+        return True
+        
+    def analyze_code_flow(self):
+        """Analyze current code and show visual flow"""
+        current_editor = self.current_editor()
+        if current_editor:
+            if self.request_analysis(current_editor):
+                self.flow_dock.show()
+            else:
+                # Show sample flow if no code
+                self.visual_flow.show_sample_flow()
+                self.flow_dock.show()
+        else:
+            # Show sample flow if no editor
+            self.visual_flow.show_sample_flow()
+            self.flow_dock.show()
+            
+    def analyze_project_flow(self):
+        """Build the call and import graph of every Python file in the open folder"""
+        index = self.sidebar.project_index
+        if not self.sidebar.root_path or index is None:
+            QMessageBox.warning(self, "Warning", "Open a folder first")
+            return
+        if self.project_graph_builder is not None:
+            self.status_bar.showMessage("Project flow analysis is already running")
+            return
+            
+        builder = VSCodeProjectBuilder(VSCodeProjectGraph, index.root_path, list(index.files({'.py'})), self)
+        builder.progress.connect(
+            lambda done, total: self.status_bar.show_progress("Analyzing project files...", done, total))
+        builder.built.connect(self.on_project_graph_built)
+        builder.finished.connect(self.on_project_graph_builder_finished)
+        self.project_graph_builder = builder
+        self.status_bar.showMessage("Analyzing project files...")
+        builder.start()
+        
+    def on_project_graph_built(self, graph):
+        """Show the project graph in the flow dock"""
+        modules = sum(1 for _, kind, _ in graph.nodes if kind == 'module')
+        self.status_bar.clear_progress(
+            f"Project graph: {modules} modules, {len(graph.nodes) - modules} functions, "
+            f"{len(graph.edges)} edges ({graph.parsed} files parsed, {graph.reused} unchanged)")
+        self.flow_panel.show_project_graph(graph)
+        self.flow_dock.show()
+        
+    def on_project_graph_builder_finished(self):
+        """Allow another project analysis"""
+        self.project_graph_builder.deleteLater()
+        self.project_graph_builder = None
+        
+    def check_project_health(self):
+        """Measure every function of every Python file in the open folder"""
+        index = self.sidebar.project_index
+        if not self.sidebar.root_path or index is None:
+            QMessageBox.warning(self, "Warning", "Open a folder first")
+            return
+        if self.project_metrics_builder is not None:
+            self.status_bar.showMessage("Project health check is already running")
+            return
+            
+        builder = VSCodeProjectBuilder(VSCodeProjectMetrics, index.root_path, list(index.files({'.py'})), self)
+        builder.progress.connect(
+            lambda done, total: self.status_bar.show_progress("Measuring project files...", done, total))
+        builder.built.connect(self.on_project_metrics_built)
+        builder.finished.connect(self.on_project_metrics_builder_finished)
+        self.project_metrics_builder = builder
+        self.status_bar.showMessage("Measuring project files...")
+        builder.start()
+        
+    def on_project_metrics_built(self, metrics):
+        """Show the project's metrics in the health dock"""
+        self.status_bar.clear_progress(
+            f"Project health: {len(metrics.files)} files ({metrics.parsed} measured, {metrics.reused} unchanged)")
+        self.health_dashboard.show_project_metrics(metrics)
+        self.health_dock.show()
+        
+    def on_project_metrics_builder_finished(self):
+        """Allow another project health check"""
+        self.project_metrics_builder.deleteLater()
+        self.project_metrics_builder = None
+        
+    def check_code_health(self):
+        """Check code health of current file"""
+        current_editor = self.current_editor()
+        if current_editor:
+            if self.request_analysis(current_editor):
+                self.health_dock.show()
+            else:
+                QMessageBox.warning(self, "Warning", "No code to analyze")
+        else:
+            QMessageBox.warning(self, "Warning", "No active editor")
+                
+    def show_about(self):
+        """Show about dialog"""
+        QMessageBox.about(self, "About", 
+                         "VS Code Clone\n\nA Python implementation of Visual Studio Code\nBuilt with PyQt6")
+
+class VSCodeStatusBar(QStatusBar):
+    """VS Code-like status bar"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setup_status_bar()
+        
+    def setup_status_bar(self):
+        """Setup the status bar with VS Code styling"""
+        self.setStyleSheet("""
+            QStatusBar {
+                background-color: #007acc;
+                color: white;
+                border: none;
+            }
+        """)
+        
+        # Progress of long running operations such as loading large files
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(150)
+        self.progress_bar.setMaximumHeight(14)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.hide()
+        self.addPermanentWidget(self.progress_bar)
+        
+        # Add status items like VS Code
+        self.addPermanentWidget(QLabel("Ln 1, Col 1"))
+        self.addPermanentWidget(QLabel("UTF-8"))
+        self.addPermanentWidget(QLabel("Python"))
+        self.showMessage("Ready")
+        
+    def show_progress(self, message, done, total):
+        """Show a message with a progress bar"""
+        self.progress_bar.setMaximum(100)
+        self.progress_bar.setValue(int(done * 100 / total) if total else 100)
+        self.progress_bar.show()
+        self.showMessage(message)
+        
+    def clear_progress(self, message="Ready"):
+        """Hide the progress bar and show a final message"""
+        self.progress_bar.hide()
+        self.showMessage(message)
+
+class VSCodeFlowAnalyzer:
+    """Collects functions, variables, a call graph and def/use sets in one pass over an AST"""
+    
+    MODULE_SCOPE = '<module>'
+    
+    def __init__(self):
+        # name -> info, for the flow diagram
+        self.variables = {}
+        self.functions = {}
+        # caller -> callees, both qualified names of functions defined in the module
+        self.call_graph = defaultdict(set)
+        # scope -> names bound / read in it
+        self.defs = defaultdict(set)
+        self.uses = defaultdict(set)
+        # (caller scope, enclosing class, callee name, is method call, line)
+        self.call_sites = []
+        # (caller scope, dotted callee) for calls this module can't resolve itself
+        self.external_calls = []
+        # (local name, module, imported name or None, relative import level)
+        self.imports = []
+        self.visited = 0
+        
+    def visit(self, tree):
+        """Walk the tree with explicit stacks, visiting every node exactly once"""
+        Name, Call, AST = ast.Name, ast.Call, ast.AST
+        functions = (ast.FunctionDef, ast.AsyncFunctionDef)
+        imports = (ast.Import, ast.ImportFrom)
+        # (statements, scope, enclosing class), one entry per function or class body
+        scopes = [([tree], self.MODULE_SCOPE, None)]
+        while scopes:
+            body, scope, class_scope = scopes.pop()
+            defs = self.defs[scope]
+            uses = self.uses[scope]
+            nodes = body[::-1]
+            while nodes:
+                node = nodes.pop()
+                kind = type(node)
+                if kind is Name:
+                    self.visited += 1
+                    if type(node.ctx) is ast.Load:
+                        uses.add(node.id)
+                    else:
+                        self.define_variable(node, defs)
+                    continue
+                if not isinstance(node, AST):
+                    # None and str entries of lists like Dict.keys or Global.names
+                    continue
+                self.visited += 1
+                
+                if kind in functions:
+                    inner = self.visit_function(node, scope, class_scope)
+                    # Decorators, defaults and annotations belong to the enclosing scope
+                    arguments = node.args
+                    annotations = [arg.annotation for arg in
+                                   arguments.posonlyargs + arguments.args + arguments.kwonlyargs +
+                                   [arguments.vararg, arguments.kwarg]
+                                   if arg is not None and arg.annotation is not None]
+                    nodes.extend(node.decorator_list + arguments.defaults + annotations +
+                                 arguments.kw_defaults + [node.returns])
+                    scopes.append((node.body, inner, None))
+                    continue
+                if kind is ast.ClassDef:
+                    inner = self.qualify(scope, node.name)
+                    defs.add(node.name)
+                    nodes.extend(node.decorator_list + node.bases +
+                                 [keyword.value for keyword in node.keywords])
+                    scopes.append((node.body, inner, inner))
+                    continue
+                    
+                if kind is Call:
+                    self.visit_call(node, scope, class_scope)
+                elif kind in imports:
+                    self.visit_import(node, defs)
+                        
+                for field in node._fields:
+                    if field == 'ctx':
+                        continue
+                    value = getattr(node, field, None)
+                    if type(value) is list:
+                        nodes.extend(value[::-1])
+                    elif isinstance(value, AST):
+                        nodes.append(value)
+                        
+        self.resolve_calls()
+        return self
+        
+    def qualify(self, scope, name):
+        """Qualified name of something defined in a scope"""
+        if scope == self.MODULE_SCOPE:
+            return name
+        return f"{scope}.{name}"
+        
+    def visit_function(self, node, scope, class_scope):
+        """Record a function definition and its parameters, returns its scope"""
+        name = self.qualify(scope, node.name)
+        self.defs[scope].add(node.name)
+        self.functions[name] = {
+            'lineno': node.lineno,
+            'class': class_scope,
+            'variables': self.defs[name],
+            'calls': []
+        }
+        arguments = node.args
+        for arg in arguments.posonlyargs + arguments.args + arguments.kwonlyargs:
+            self.defs[name].add(arg.arg)
+        for arg in (arguments.vararg, arguments.kwarg):
+            if arg is not None:
+                self.defs[name].add(arg.arg)
+        return name
+        
+    def define_variable(self, node, defs):
+        """Record a name bound by assignment, loops, with-statements and the like"""
+        defs.add(node.id)
+        if node.id not in self.variables:
+            self.variables[node.id] = {
+                'value': 'assigned',
+                'lineno': node.lineno,
+                'type': 'variable'
+            }
+            
+    def visit_import(self, node, defs):
+        """Record the names an import binds and where they come from"""
+        for alias in node.names:
+            if isinstance(node, ast.Import):
+                if alias.asname:
+                    self.imports.append((alias.asname, alias.name, None, 0))
+                else:
+                    # import a.b binds a
+                    top = alias.name.split('.')[0]
+                    self.imports.append((top, top, None, 0))
+            elif alias.name != '*':
+                self.imports.append((alias.asname or alias.name, node.module or '', alias.name, node.level))
+            defs.add(alias.asname or alias.name.split('.')[0])
+            
+    def visit_call(self, node, scope, class_scope):
+        """Remember a call site, callees are resolved once every function is known"""
+        func = node.func
+        if isinstance(func, ast.Name):
+            self.call_sites.append((scope, class_scope, func.id, False, node.lineno))
+        elif (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name)
+                and func.value.id in ('self', 'cls')):
+            self.call_sites.append((scope, class_scope, func.attr, True, node.lineno))
+        elif isinstance(func, ast.Attribute):
+            dotted = self.dotted_name(func)
+            if dotted is not None:
+                self.external_calls.append((scope, dotted))
+                
+    @staticmethod
+    def dotted_name(node):
+        """Turn a.b.c into 'a.b.c', None for anything but a chain of names"""
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            return None
+        parts.append(node.id)
+        return '.'.join(reversed(parts))
+            
+    def resolve_calls(self):
+        """Turn call sites into call graph edges"""
+        self.call_sites.sort(key=lambda site: site[4])
+        for scope, class_scope, name, is_method, lineno in self.call_sites:
+            callee = self.resolve(scope, name, is_method)
+            if callee is None:
+                if not is_method:
+                    self.external_calls.append((scope, name))
+                continue
+            self.call_graph[scope].add(callee)
+            self.functions[callee]['calls'].append(lineno)
+            
+    def resolve(self, scope, name, is_method):
+        """Find the function a call refers to, or None if it isn't defined here"""
+        if is_method:
+            # self.name() inside a method refers to the method's class
+            class_scope = self.functions.get(scope, {}).get('class')
+            candidate = self.qualify(class_scope, name) if class_scope else None
+            return candidate if candidate in self.functions else None
+            
+        # Look outward through the enclosing function scopes
+        while True:
+            candidate = self.qualify(scope, name)
+            if candidate in self.functions and self.functions[candidate]['class'] is None:
+                return candidate
+            if scope == self.MODULE_SCOPE:
+                return None
+            scope = scope.rpartition('.')[0] or self.MODULE_SCOPE
+            
+class VSCodeFlowLayout:
+    """Layered (Sugiyama-style) layout for flow graphs"""
+    
+    NODE_SPACING = 150
+    LAYER_SPACING = 110
+    # Wider layers wrap onto extra rows so huge graphs stay roughly square
+    MAX_ROW_NODES = 40
+    # Barycenter sweeps used to reduce edge crossings
+    ORDERING_SWEEPS = 4
+    
+    @classmethod
+    def compute(cls, node_count, edges):
+        """Position nodes in layers so most edges point downwards, returns [(x, y)]"""
+        successors = [[] for _ in range(node_count)]
+        for source, target in set(edges):
+            if source != target:
+                successors[source].append(target)
+                
+        successors = cls.remove_cycles(successors)
+        layers = cls.assign_layers(successors)
+        cls.order_layers(layers, successors)
+        
+        rows = [layer[start:start + cls.MAX_ROW_NODES]
+                for layer in layers for start in range(0, len(layer), cls.MAX_ROW_NODES)]
+        positions = [None] * node_count
+        if not rows:
+            return positions
+            
+        # Very deep graphs are folded into side by side bands of layers to stay roughly square
+        row_width = max(len(row) for row in rows) * cls.NODE_SPACING
+        columns = max(1, round((len(rows) * cls.LAYER_SPACING / row_width) ** 0.5))
+        rows_per_column = -(-len(rows) // columns)
+        for r, row in enumerate(rows):
+            column, y = divmod(r, rows_per_column)
+            x = column * (row_width + cls.NODE_SPACING)
+            for i, node in enumerate(row):
+                positions[node] = (x + i * cls.NODE_SPACING, y * cls.LAYER_SPACING)
+        return positions
+        
+    @staticmethod
+    def remove_cycles(successors):
+        """Reverse the edges that close cycles, found with an iterative depth-first search"""
+        WHITE, GREY, BLACK = 0, 1, 2
+        color = [WHITE] * len(successors)
+        acyclic = [[] for _ in successors]
+        for root in range(len(successors)):
+            if color[root] != WHITE:
+                continue
+            color[root] = GREY
+            stack = [(root, iter(successors[root]))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if color[child] == GREY:
+                        # Back edge, flip it
+                        acyclic[child].append(node)
+                        continue
+                    acyclic[node].append(child)
+                    if color[child] == WHITE:
+                        color[child] = GREY
+                        stack.append((child, iter(successors[child])))
+                        break
+                else:
+                    color[node] = BLACK
+                    stack.pop()
+        return acyclic
+        
+    @staticmethod
+    def assign_layers(successors):
+        """Longest-path layering, every edge goes at least one layer down"""
+        indegree = [0] * len(successors)
+        for children in successors:
+            for child in children:
+                indegree[child] += 1
+        layer = [0] * len(successors)
+        ready = [node for node, degree in enumerate(indegree) if degree == 0]
+        while ready:
+            node = ready.pop()
+            for child in successors[node]:
+                layer[child] = max(layer[child], layer[node] + 1)
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+                    
+        layers = [[] for _ in range(max(layer, default=-1) + 1)]
+        for node, depth in enumerate(layer):
+            layers[depth].append(node)
+        return layers
+        
+    @classmethod
+    def order_layers(cls, layers, successors):
+        """Sort each layer by the average position of its neighbours in the adjacent layer"""
+        predecessors = [[] for _ in successors]
+        for node, children in enumerate(successors):
+            for child in children:
+                predecessors[child].append(node)
+                
+        position = [0] * len(successors)
+        for layer in layers:
+            for i, node in enumerate(layer):
+                position[node] = i
+                
+        def sweep(ordered_layers, neighbours):
+            for layer in ordered_layers:
+                def barycenter(node):
+                    linked = neighbours[node]
+                    if not linked:
+                        return position[node]
+                    return sum(position[other] for other in linked) / len(linked)
+                layer.sort(key=barycenter)
+                for i, node in enumerate(layer):
+                    position[node] = i
+                    
+        for _ in range(cls.ORDERING_SWEEPS):
+            sweep(layers[1:], predecessors)
+            sweep(layers[-2::-1], successors)
+            
+class VSCodeFlowNodeItem(QGraphicsItem):
+    """Flow diagram node, drawn cheaply and without labels when zoomed out"""
+    
+    WIDTH = 120
+    HEIGHT = 50
+    # Below these scales text is unreadable and ellipses look like boxes anyway
+    LABEL_MIN_SCALE = 0.4
+    SHAPE_MIN_SCALE = 0.15
+    
+    def __init__(self, label, color, detail=None):
+        super().__init__()
+        self.label = label
+        self.detail = detail
+        self.color = QColor(color)
+        self.rect = QRectF(0, 0, self.WIDTH, self.HEIGHT)
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        self.setToolTip(label if detail is None else f"{label}\n{detail}")
+        
+    def boundingRect(self):
+        """Area covered by the node, including its outline"""
+        return self.rect.adjusted(-1, -1, 1, 1)
+        
+    def paint(self, painter, option, widget=None):
+        """Draw the node with as much detail as the zoom level allows"""
+        scale = option.levelOfDetailFromTransform(painter.worldTransform())
+        if scale < self.SHAPE_MIN_SCALE:
+            painter.fillRect(self.rect, self.color)
+            return
+            
+        painter.setBrush(QBrush(self.color))
+        painter.setPen(QPen(QColor("#d4d4d4"), 2))
+        painter.drawEllipse(self.rect)
+        if scale < self.LABEL_MIN_SCALE:
+            return
+            
+        painter.setPen(QColor("#1e1e1e"))
+        metrics = painter.fontMetrics()
+        text_rect = self.rect.adjusted(12, 5, -12, -5)
+        # Qualified names keep their last two parts, e.g. Class.method
+        short_label = '.'.join(self.label.split('.')[-2:])
+        label = metrics.elidedText(short_label, Qt.TextElideMode.ElideLeft, int(text_rect.width()))
+        if self.detail is None:
+            painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, label)
+        else:
+            painter.drawText(text_rect, Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop, label)
+            painter.setPen(QColor("#ce9178"))
+            painter.drawText(text_rect, Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom,
+                             self.detail)
+            
+class VSCodeFlowGraphItem(QGraphicsItem):
+    """Edges of a flow diagram, with a pre-rendered image of the whole graph for zooming out"""
+    
+    ANTIALIAS_MIN_SCALE = 0.5
+    # Longest side of the overview image in pixels
+    OVERVIEW_SIZE = 2048
+    
+    def __init__(self, lines, boxes, color):
+        super().__init__()
+        self.lines = lines
+        # (rect, color) of every node, for the overview
+        self.boxes = boxes
+        self.color = QColor(color)
+        xs = [x for line in lines for x in (line.x1(), line.x2())]
+        ys = [y for line in lines for y in (line.y1(), line.y2())]
+        for rect, _ in boxes:
+            xs += (rect.left(), rect.right())
+            ys += (rect.top(), rect.bottom())
+        xs = xs or [0]
+        ys = ys or [0]
+        self.bounds = QRectF(min(xs) - 1, min(ys) - 1, max(xs) - min(xs) + 2, max(ys) - min(ys) + 2)
+        self.overview = None
+        self.overview_scale = min(1.0, self.OVERVIEW_SIZE / max(self.bounds.width(), self.bounds.height()))
+        # Up to this zoom level the overview is sharp enough to replace the node items
+        self.overview_limit = self.overview_scale * 1.5 if self.overview_scale < 1.0 else 0.0
+        # Panning only blits the cached pixels instead of redrawing every edge
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        self.setZValue(-1)
+        
+    def boundingRect(self):
+        """Area covered by the whole graph"""
+        return self.bounds
+        
+    def render_overview(self):
+        """Render edges and nodes into an image, safe to call from a worker thread"""
+        size = self.bounds.size() * self.overview_scale
+        image = QImage(max(1, int(size.width())), max(1, int(size.height())),
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.scale(self.overview_scale, self.overview_scale)
+        painter.translate(-self.bounds.topLeft())
+        painter.setPen(QPen(self.color, 0))
+        painter.drawLines(self.lines)
+        for rect, color in self.boxes:
+            painter.fillRect(rect, color)
+        painter.end()
+        return image
+        
+    def set_overview(self, image):
+        """Use a finished overview image"""
+        self.overview = image
+        self.update()
+        
+    def paint(self, painter, option, widget=None):
+        """Draw the overview when zoomed out, otherwise the edges with a cosmetic pen"""
+        scale = option.levelOfDetailFromTransform(painter.worldTransform())
+        if scale <= self.overview_limit:
+            # Blank for the moment it takes the worker to render the overview
+            if self.overview is not None:
+                painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+                painter.drawImage(self.bounds, self.overview, QRectF(self.overview.rect()))
+            return
+            
+        # Antialiasing thousands of long lines costs far more than it shows when zoomed out
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, scale >= self.ANTIALIAS_MIN_SCALE)
+        painter.setPen(QPen(self.color, 0))
+        painter.drawLines(self.lines)
+        
+class VSCodeMetricsEngine:
+    """Per-function complexity, nesting, length and Halstead counts from one pass over an AST"""
+    
+    COMPLEXITY_LIMIT = 10
+    NESTING_LIMIT = 4
+    LENGTH_LIMIT = 50
+    # Numeric literals this large are reported as magic numbers
+    MAGIC_NUMBER = 100
+    MAX_CACHED_FUNCTIONS = 20000
+    TODO_PATTERN = re.compile(r'#[^\n]*\bTODO\b', re.IGNORECASE)
+    
+    FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+    # Each of these adds a path through the function
+    BRANCH_TYPES = {ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler,
+                    ast.comprehension}
+    # Statements whose bodies are one level deeper
+    NESTING_TYPES = {ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try}
+    # Statement lists a module level function or class can sit in
+    BLOCK_FIELDS = ('body', 'orelse', 'finalbody', 'handlers')
+    if hasattr(ast, 'Match'):
+        BRANCH_TYPES.add(ast.match_case)
+        NESTING_TYPES.add(ast.Match)
+    if hasattr(ast, 'TryStar'):
+        NESTING_TYPES.add(ast.TryStar)
+        
+    def __init__(self):
+        # source hash -> [(name suffix, line offset, metrics)], least recently used first
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+    def measure_module(self, code, tree=None, error=None):
+        """Metrics of every function in a module, parsing it unless a tree or parse error is given"""
+        result = {'functions': [], 'todos': self.find_todos(code), 'lines': code.count('\n') + 1,
+                  'error': None}
+        if tree is None and error is None:
+            try:
+                tree = ast.parse(code)
+            except (SyntaxError, ValueError) as e:
+                error = e
+        if error is not None:
+            result['error'] = self.describe_error(error)
+            return result
+        result['functions'] = self.measure_statements(tree.body, code.split('\n'))
+        return result
+        
+    @staticmethod
+    def describe_error(error):
+        """Short description of why code doesn't parse"""
+        if isinstance(error, SyntaxError):
+            return f"line {error.lineno}: {error.msg}"
+        return str(error)
+        
+    def measure_statements(self, statements, lines):
+        """Metrics of the functions in some module level statements, ordered by line"""
+        functions = []
+        # (statements, qualified name prefix), functions inside module level if/try still count
+        bodies = [(statements, '')]
+        while bodies:
+            body, prefix = bodies.pop()
+            for node in body:
+                kind = type(node)
+                if kind in self.FUNCTION_TYPES:
+                    functions.extend(self.measure_function(node, prefix + node.name, lines))
+                elif kind is ast.ClassDef:
+                    bodies.append((node.body, f"{prefix}{node.name}."))
+                elif kind is ast.ExceptHandler or kind in self.NESTING_TYPES:
+                    for field in self.BLOCK_FIELDS:
+                        bodies.append((getattr(node, field, None) or [], prefix))
+                    # The statements of a match are in its cases
+                    for case in getattr(node, 'cases', ()):
+                        bodies.append((case.body, prefix))
+        functions.sort(key=lambda function: function['lineno'])
+        return functions
+        
+    def find_todos(self, code):
+        """Line numbers of TODO comments"""
+        todos = []
+        line = 1
+        position = 0
+        for match in self.TODO_PATTERN.finditer(code):
+            line += code.count('\n', position, match.start())
+            position = match.start()
+            todos.append(line)
+        return todos
+        
+    def measure_function(self, node, name, lines):
+        """Metrics of a function and the functions nested in it, reused while its source is unchanged"""
+        source = '\n'.join(lines[node.lineno - 1:node.end_lineno])
+        key = hashlib.sha1(source.encode('utf-8', 'surrogatepass')).hexdigest()
+        entries = self.cache.get(key)
+        if entries is None:
+            self.misses += 1
+            entries = self.measure(node)
+            self.cache[key] = entries
+            while len(self.cache) > self.MAX_CACHED_FUNCTIONS:
+                self.cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        return [dict(metrics, name=name + suffix, lineno=node.lineno + offset)
+                for suffix, offset, metrics in entries]
+        
+    def measure(self, function):
+        """Walk a function once, returns its metrics followed by those of nested functions"""
+        Name, Constant, AST = ast.Name, ast.Constant, ast.AST
+        entries = []
+        # (function, name relative to the outermost one)
+        pending = [(function, '')]
+        while pending:
+            current, suffix = pending.pop()
+            complexity = 1
+            nesting = 0
+            magic_numbers = 0
+            operators = defaultdict(int)
+            operands = defaultdict(int)
+            # (node, nesting depth)
+            nodes = [(child, 0) for child in current.body[::-1]]
+            while nodes:
+                node, depth = nodes.pop()
+                kind = type(node)
+                if kind is Name:
+                    operands[node.id] += 1
+                    continue
+                if kind is Constant:
+                    value = node.value
+                    operands[repr(value)] += 1
+                    if type(value) in (int, float) and abs(value) >= self.MAGIC_NUMBER:
+                        magic_numbers += 1
+                    continue
+                if not isinstance(node, AST):
+                    continue
+                    
+                # Nested functions are measured on their own, class bodies are walked for methods
+                if kind in self.FUNCTION_TYPES:
+                    pending.append((node, f"{suffix}.{node.name}"))
+                    continue
+                if kind is ast.ClassDef:
+                    for statement in node.body:
+                        if type(statement) in self.FUNCTION_TYPES:
+                            pending.append((statement, f"{suffix}.{node.name}.{statement.name}"))
+                        else:
+                            nodes.append((statement, depth))
+                    continue
+                    
+                if kind in self.BRANCH_TYPES:
+                    complexity += 1
+                    if kind is ast.comprehension:
+                        complexity += len(node.ifs)
+                elif kind is ast.BoolOp:
+                    complexity += len(node.values) - 1
+                    operators[type(node.op)] += 1
+                elif kind is ast.BinOp or kind is ast.UnaryOp or kind is ast.AugAssign:
+                    operators[type(node.op)] += 1
+                elif kind is ast.Compare:
+                    for op in node.ops:
+                        operators[type(op)] += 1
+                        
+                inner = depth
+                if kind in self.NESTING_TYPES:
+                    inner = depth + 1
+                    nesting = max(nesting, inner)
+                    # elif is written flat, it doesn't nest any deeper than its if
+                    if kind is ast.If and len(node.orelse) == 1 and type(node.orelse[0]) is ast.If:
+                        nodes.append((node.orelse[0], depth))
+                        nodes.extend((child, inner) for child in node.body[::-1])
+                        nodes.append((node.test, depth))
+                        continue
+                for field in node._fields:
+                    if field == 'ctx':
+                        continue
+                    value = getattr(node, field, None)
+                    if type(value) is list:
+                        nodes.extend((child, inner) for child in value[::-1])
+                    elif isinstance(value, AST):
+                        nodes.append((value, inner))
+                        
+            distinct_operators = len(operators)
+            distinct_operands = len(operands)
+            total_operators = sum(operators.values())
+            total_operands = sum(operands.values())
+            vocabulary = distinct_operators + distinct_operands
+            volume = (total_operators + total_operands) * math.log2(vocabulary) if vocabulary > 1 else 0.0
+            difficulty = (distinct_operators / 2 * total_operands / distinct_operands
+                          if distinct_operands else 0.0)
+            entries.append((suffix, current.lineno - function.lineno, {
+                'length': current.end_lineno - current.lineno + 1,
+                'complexity': complexity,
+                'nesting': nesting,
+                'magic_numbers': magic_numbers,
+                'halstead': {
+                    'operators': distinct_operators,
+                    'operands': distinct_operands,
+                    'total_operators': total_operators,
+                    'total_operands': total_operands,
+                    'volume': round(volume, 1),
+                    'difficulty': round(difficulty, 1),
+                    'effort': round(volume * difficulty, 1),
+                },
+            }))
+        return entries
+        
+    @classmethod
+    def issues(cls, result):
+        """Readable issues for a module's metrics"""
+        issues = []
+        if result['error']:
+            issues.append(f"❌ Syntax error, {result['error']}")
+        for function in result['functions']:
+            where = f"{function['name']} (line {function['lineno']})"
+            if function['complexity'] > cls.COMPLEXITY_LIMIT:
+                issues.append(f"⚠️ {where} is too complex (cyclomatic complexity {function['complexity']})")
+            if function['nesting'] > cls.NESTING_LIMIT:
+                issues.append(f"⚠️ {where} is nested too deeply ({function['nesting']} levels)")
+            if function['length'] > cls.LENGTH_LIMIT:
+                issues.append(f"⚠️ {where} is too long ({function['length']} lines)")
+            if function['magic_numbers']:
+                issues.append(f"⚠️ {where} uses magic numbers")
+        if result['todos']:
+            shown = ', '.join(str(line) for line in result['todos'][:5])
+            more = ", ..." if len(result['todos']) > 5 else ""
+            issues.append(f"📝 TODO comments found (line {shown}{more})")
+            
+        if not issues:
+            issues.append("✅ No major issues detected")
+        return issues
+        
+    @classmethod
+    def quality_score(cls, result):
+        """Score a module's metrics out of 100"""
+        functions = result['functions']
+        complex_count = sum(1 for f in functions if f['complexity'] > cls.COMPLEXITY_LIMIT)
+        nested_count = sum(1 for f in functions if f['nesting'] > cls.NESTING_LIMIT)
+        long_count = sum(1 for f in functions if f['length'] > cls.LENGTH_LIMIT)
+        magic_count = sum(1 for f in functions if f['magic_numbers'])
+        
+        # Each kind of issue costs a capped number of points
+        score = 100
+        score -= min(30, 5 * complex_count)
+        score -= min(20, 3 * nested_count)
+        score -= min(20, 3 * long_count)
+        score -= min(10, 2 * magic_count)
+        if result['todos']:
+            score -= 5
+        if result['error']:
+            score -= 20
+        return max(0, score)
+        
+    @classmethod
+    def complexity_percent(cls, result):
+        """Worst function complexity as a percentage, the limit sits at 50%"""
+        worst = max((f['complexity'] for f in result['functions']), default=0)
+        return min(100, round(50 * worst / cls.COMPLEXITY_LIMIT))
+        
+class VSCodeIncrementalMetrics:
+    """Metrics of one document, an edit only reparses the top-level statements it touched"""
+    
+    # Lines where a module level definition starts, documents are parsed in chunks split there
+    CHUNK_START = re.compile(r'(?:async\s+def|def|class)\b|@')
+    # A chunk that doesn't parse on its own is retried joined with up to this many following ones
+    MAX_JOINED_CHUNKS = 4
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.lines = None
+        # (first line, last line, function metrics, error) per top-level statement, in order.
+        # Lines that don't parse form a unit with no metrics and an error
+        self.units = []
+        self.result = None
+        # Lines parsed by the last update
+        self.parsed_lines = 0
+        
+    def update(self, code):
+        """Metrics of a new version of the document"""
+        lines = code.split('\n')
+        old = self.lines
+        if old is None:
+            return self.finish(code, lines, self.parse_region(lines, 1, len(lines)))
+        if old == lines:
+            self.parsed_lines = 0
+            return self.result
+            
+        # Lines before and after the edit are the same in both versions
+        limit = min(len(old), len(lines))
+        first = 0
+        while first < limit and old[first] == lines[first]:
+            first += 1
+        suffix = 0
+        while suffix < limit - first and old[-1 - suffix] == lines[-1 - suffix]:
+            suffix += 1
+        delta = len(lines) - len(old)
+        # Changed lines in the old version, 1-based and inclusive, empty for a pure insertion
+        start, end = first + 1, len(old) - suffix
+        
+        units = self.units
+        low = bisect.bisect_left([unit[1] for unit in units], start)
+        high = low
+        while high < len(units) and units[high][0] <= end:
+            high += 1
+        # Lines that didn't parse are retried with every edit, a fix may be anywhere near them
+        broken = [i for i, unit in enumerate(units) if unit[2] is None]
+        if broken:
+            low = min(low, broken[0])
+            high = max(high, broken[-1] + 1)
+            
+        while True:
+            region_start = min(start, units[low][0]) if low < high else start
+            region_end = max(end, units[high - 1][1]) if low < high else end
+            # An indented line at the start of the region continues the statement before it,
+            # also after a deletion, where the first line left is one that followed the edit
+            code_lines = (line for line in lines[region_start - 1:]
+                          if line.strip() and not line.lstrip().startswith('#'))
+            if low == 0 or next(code_lines, '')[:1] not in (' ', '\t'):
+                break
+            low -= 1
+        # Statements after the edit only move
+        after = units[high:]
+        if delta:
+            after = [(first_line + delta, last_line + delta,
+                      [dict(function, lineno=function['lineno'] + delta) for function in functions], None)
+                     for first_line, last_line, functions, _ in after]
+        units = units[:low] + self.parse_region(lines, region_start, region_end + delta) + after
+        # The edit may have changed how the lines around it parse, only a full parse can tell
+        if any(unit[3] is not None for unit in units) and (region_start, region_end + delta) != (1, len(lines)):
+            units = self.parse_region(lines, 1, len(lines))
+        return self.finish(code, lines, units)
+        
+    def parse_region(self, lines, first, last):
+        """Units of whole lines, parsed a chunk at a time so no single parse holds the GIL for long"""
+        self.parsed_lines = max(0, last - first + 1)
+        starts = [first]
+        previous = ''
+        for number in range(first + 1, last + 1):
+            line = lines[number - 1]
+            # Decorators stay with what they decorate
+            if self.CHUNK_START.match(line) and not previous.startswith('@'):
+                starts.append(number)
+            if line.strip():
+                previous = line
+        starts.append(last + 1)
+        
+        units = []
+        chunks = len(starts) - 1
+        chunk = 0
+        while chunk < chunks:
+            error = None
+            for joined in range(chunk + 1, min(chunk + self.MAX_JOINED_CHUNKS, chunks) + 1):
+                # Blank lines in front keep the line numbers those of the document
+                source = '\n' * (starts[chunk] - 1) + '\n'.join(lines[starts[chunk] - 1:starts[joined] - 1])
+                try:
+                    tree = ast.parse(source)
+                except (SyntaxError, ValueError) as e:
+                    error = error or e
+                    continue
+                units.extend(self.measure_units(tree.body, lines))
+                chunk = joined
+                break
+            else:
+                units.append((starts[chunk], starts[chunk + 1] - 1, None, self.engine.describe_error(error)))
+                chunk += 1
+        return units
+        
+    def measure_units(self, statements, lines):
+        """One unit per top-level statement, decorators included"""
+        units = []
+        for statement in statements:
+            first_line = min([statement.lineno] +
+                             [decorator.lineno for decorator in getattr(statement, 'decorator_list', ())])
+            units.append((first_line, statement.end_lineno,
+                          self.engine.measure_statements([statement], lines), None))
+        return units
+        
+    def finish(self, code, lines, units):
+        """Merge the units into the document's metrics"""
+        self.lines = lines
+        self.units = units
+        errors = [unit[3] for unit in units if unit[3] is not None]
+        self.result = {'functions': [function for unit in units if unit[2] is not None for function in unit[2]],
+                       'todos': self.engine.find_todos(code), 'lines': len(lines),
+                       'error': errors[0] if errors else None}
+        return self.result
+        
+class VSCodeCodeAnalysis:
+    """Flow and health results for one version of a document"""
+    
+    def __init__(self, digest, code, metrics_engine=None, error=None):
+        self.digest = digest
+        self.error = error
+        self.variables = {}
+        self.functions = {}
+        self.call_graph = {}
+        self.defs = {}
+        self.uses = {}
+        tree = None
+        # An error given by the caller skips the analysis
+        parse_error = error
+        if error is None:
+            try:
+                tree = ast.parse(code)
+                analyzer = VSCodeFlowAnalyzer().visit(tree)
+                self.variables = analyzer.variables
+                self.functions = analyzer.functions
+                self.call_graph = dict(analyzer.call_graph)
+                self.defs = dict(analyzer.defs)
+                self.uses = dict(analyzer.uses)
+            except Exception as e:
+                self.error = str(e)
+                if tree is None:
+                    parse_error = e
+        self.build_graph()
+        # The health metrics share the parsed tree with the flow analysis
+        metrics_engine = metrics_engine or VSCodeMetricsEngine()
+        self.metrics = metrics_engine.measure_module(code, tree, parse_error)
+        self.issues = metrics_engine.issues(self.metrics)
+        self.quality = metrics_engine.quality_score(self.metrics)
+        
+    def build_graph(self):
+        """Lay out functions, module variables and the edges between them"""
+        # (name, kind, detail) per node, edges are (source, target) node indexes
+        self.nodes = []
+        self.edges = []
+        index = {}
+        for name, info in self.functions.items():
+            index[name] = len(self.nodes)
+            detail = f"Calls: {len(info['calls'])}" if info['calls'] else None
+            self.nodes.append((name, 'function', detail))
+            
+        module_defs = self.defs.get(VSCodeFlowAnalyzer.MODULE_SCOPE, set())
+        variables = {}
+        for name in self.variables:
+            if name in module_defs and name not in index:
+                variables[name] = len(self.nodes)
+                self.nodes.append((name, 'variable', None))
+                
+        for caller, callees in self.call_graph.items():
+            if caller in index:
+                self.edges.extend((index[caller], index[callee]) for callee in callees)
+        # Data flows from module variables into the functions reading them
+        for name in self.functions:
+            local = self.defs.get(name, set())
+            for used in self.uses.get(name, ()):
+                if used in variables and used not in local:
+                    self.edges.append((variables[used], index[name]))
+                    
+        self.positions = VSCodeFlowLayout.compute(len(self.nodes), self.edges)
+        
+class VSCodeAnalysisService(QObject):
+    """Analyzes code on a worker thread, each version of a document is parsed once"""
+    
+    analyzed = pyqtSignal(object)
+    # Internal, carries results from the worker back to the GUI thread
+    completed = pyqtSignal(object)
+    
+    MAX_CACHED_ANALYSES = 16
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.condition = threading.Condition()
+        self.job = None
+        self.pending = None
+        # content hash -> analysis, least recently used first, GUI thread only
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.completed.connect(self.on_completed)
+        # Only used by the worker, keeps the metrics of functions that didn't change
+        self.metrics_engine = VSCodeMetricsEngine()
+        # Daemon thread so a pending analysis never holds up shutdown
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        
+    @staticmethod
+    def content_hash(code):
+        """Hash the text being analyzed"""
+        return hashlib.sha1(code.encode('utf-8', 'surrogatepass')).hexdigest()
+        
+    def publish(self, digest):
+        """Publish a cached analysis, returns False if it is not cached"""
+        analysis = self.cache.get(digest)
+        if analysis is None:
+            return False
+        self.cache.move_to_end(digest)
+        self.hits += 1
+        self.analyzed.emit(analysis)
+        return True
+        
+    def analyze(self, code):
+        """Publish the analysis of code, parsing it only if this version is new"""
+        digest = self.content_hash(code)
+        if self.publish(digest) or digest == self.pending:
+            return digest
+            
+        self.misses += 1
+        self.pending = digest
+        with self.condition:
+            self.job = (digest, code)
+            self.condition.notify()
+        return digest
+        
+    def on_completed(self, analysis):
+        """Cache a finished analysis and hand it to the docks"""
+        self.cache[analysis.digest] = analysis
+        while len(self.cache) > self.MAX_CACHED_ANALYSES:
+            self.cache.popitem(last=False)
+        if analysis.digest == self.pending:
+            self.pending = None
+            self.analyzed.emit(analysis)
+            
+    def run(self):
+        """Analyze queued code until the application exits"""
+        while True:
+            with self.condition:
+                while self.job is None:
+                    self.condition.wait()
+                digest, code = self.job
+                self.job = None
+            try:
+                analysis = VSCodeCodeAnalysis(digest, code, self.metrics_engine)
+            except Exception as e:
+                # e.g. RecursionError on deeply nested code, the thread has to keep serving
+                analysis = VSCodeCodeAnalysis(digest, code, error=f"Analysis failed: {e!r}")
+            self.completed.emit(analysis)
+            
+class VSCodeHealthMonitor(QObject):
+    """Keeps the metrics of edited documents up to date on a worker thread"""
+    
+    # document key, metrics
+    measured = pyqtSignal(object, object)
+    
+    MAX_DOCUMENTS = 8
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.condition = threading.Condition()
+        self.job = None
+        # key -> VSCodeIncrementalMetrics, least recently edited first
+        self.documents = OrderedDict()
+        # Only used by the worker, shared by every document
+        self.engine = VSCodeMetricsEngine()
+        # Seconds the last update took on the worker
+        self.last_duration = 0.0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        
+    def measure(self, key, code):
+        """Queue a new version of a document, replacing any version still waiting"""
+        with self.condition:
+            self.job = (key, code)
+            self.condition.notify()
+            
+    def forget(self, key):
+        """Drop the state of a closed document"""
+        with self.condition:
+            self.documents.pop(key, None)
+            if self.job is not None and self.job[0] is key:
+                self.job = None
+                
+    def run(self):
+        """Measure queued documents until the application exits"""
+        while True:
+            with self.condition:
+                while self.job is None:
+                    self.condition.wait()
+                key, code = self.job
+                self.job = None
+                document = self.documents.get(key)
+                if document is None:
+                    document = self.documents[key] = VSCodeIncrementalMetrics(self.engine)
+                    while len(self.documents) > self.MAX_DOCUMENTS:
+                        self.documents.popitem(last=False)
+                else:
+                    self.documents.move_to_end(key)
+            start = time.perf_counter()
+            try:
+                result = document.update(code)
+            except Exception as e:
+                # Its state may be half updated, the next version is measured from scratch
+                with self.condition:
+                    if self.documents.get(key) is document:
+                        del self.documents[key]
+                result = self.engine.measure_module(code, error=f"Measuring failed: {e!r}")
+            self.last_duration = time.perf_counter() - start
+            self.measured.emit(key, result)
+            
+class VSCodeProjectSummaries(ABC):
+    """Per-file summaries of every Python file in a project, cached and computed in a process pool"""
+    
+    CACHE_VERSION = 1
+    CACHE_PREFIX = None
+    # Fewer changed files than this are parsed in-process, a pool costs more to start
+    POOL_MIN_FILES = 8
+    
+    def __init__(self, root_path):
+        self.root_path = os.path.abspath(root_path)
+        # rel path -> {'mtime': st_mtime_ns, 'size': st_size, 'summary': {...}}
+        self.files = {}
+        self.parsed = 0
+        self.reused = 0
+        
+    def cache_path(self):
+        """Get the cache file used for this root path"""
+        key = hashlib.sha1(self.root_path.encode('utf-8')).hexdigest()
+        return os.path.join(VSCodeProjectIndex.CACHE_DIR, f"{self.CACHE_PREFIX}-{key}.json")
+        
+    def load_cache(self):
+        """Load per-file summaries from a previous run, returns True on success"""
+        try:
+            with open(self.cache_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != self.CACHE_VERSION or data.get('root') != self.root_path:
+            return False
+        self.files = data['files']
+        return True
         
-        # Fix code using AI
-        self.terminal.terminal_output.append("\n🤖 AI is analyzing and fixing the code...")
-        fixed_code = self.ai_fixer.fix_code(code, error_message, language)
+    def save_cache(self):
+        """Persist the per-file summaries atomically next to the other BasicIDE caches"""
+        data = {'version': self.CACHE_VERSION, 'root': self.root_path, 'files': self.files}
+        try:
+            os.makedirs(VSCodeProjectIndex.CACHE_DIR, exist_ok=True)
+            temp_path = self.cache_path() + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, self.cache_path())
+        except OSError:
+            pass
+            
+    @staticmethod
+    def module_name(rel_path):
+        """Dotted module name of a project-relative .py path"""
+        parts = rel_path[:-3].split('/')
+        if parts[-1] == '__init__' and len(parts) > 1:
+            parts.pop()
+        return '.'.join(parts)
         
-        if fixed_code.startswith("Error:"):
-            QMessageBox.critical(self, "AI Error", fixed_code)
+    @staticmethod
+    @abstractmethod
+    def summarize(path, module, is_package):
+        """Summarize one file, runs in worker processes"""
+        
+    def update(self, paths, progress=None):
+        """Resummarize files that changed since the cached run and rebuild the results"""
+        current = {}
+        for path in paths:
+            rel = os.path.relpath(path, self.root_path).replace(os.sep, '/')
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            current[rel] = (path, st.st_mtime_ns, st.st_size)
+            
+        changed = []
+        files = {}
+        for rel, (path, mtime, size) in current.items():
+            cached = self.files.get(rel)
+            if cached and cached['mtime'] == mtime and cached['size'] == size:
+                files[rel] = cached
+            else:
+                changed.append(rel)
+        self.reused = len(files)
+        self.parsed = len(changed)
+        
+        jobs = [(current[rel][0], self.module_name(rel), rel.endswith('__init__.py'))
+                for rel in changed]
+        workers = min(len(jobs), os.cpu_count() or 1)
+        if len(jobs) < self.POOL_MIN_FILES or workers < 2:
+            summaries = (self.summarize(*job) for job in jobs)
+            self.collect(files, changed, current, summaries, progress)
         else:
-            # Replace the code in the editor
-            current_editor.setPlainText(fixed_code)
-            self.terminal.terminal_output.append("✅ Code has been fixed by AI!")
-            QMessageBox.information(self, "Success", "Code has been fixed by AI!")
+            # Spawned workers don't inherit the GUI's threads and locks
+            context = multiprocessing.get_context('spawn')
+            with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context) as pool:
+                summaries = pool.map(self.summarize, *zip(*jobs),
+                                     chunksize=max(1, len(jobs) // (workers * 4)))
+                self.collect(files, changed, current, summaries, progress)
                 
-    def toggle_terminal(self):
-        """Toggle terminal visibility"""
-        if self.terminal_dock.isVisible():
-            self.terminal_dock.hide()
-        else:
-            self.terminal_dock.show()
-            self.terminal.command_input.setFocus()
+        self.files = files
+        self.build()
+        
+    def collect(self, files, changed, current, summaries, progress):
+        """Store summaries as they arrive"""
+        for done, (rel, summary) in enumerate(zip(changed, summaries), 1):
+            _, mtime, size = current[rel]
+            files[rel] = {'mtime': mtime, 'size': size, 'summary': summary}
+            if progress:
+                progress(done, len(changed))
+                
+    @abstractmethod
+    def build(self):
+        """Combine the per-file summaries"""
+        
+class VSCodeProjectGraph(VSCodeProjectSummaries):
+    """Cross-module call and import graph of every Python file in a project"""
+    
+    CACHE_PREFIX = 'flow'
+    
+    def __init__(self, root_path):
+        super().__init__(root_path)
+        # (name, kind, detail) per node, edges are (source, target) node indexes
+        self.nodes = []
+        self.edges = []
+        self.positions = []
+        self.node_index = {}
+        self.adjacency = None
+        
+    @staticmethod
+    def summarize(path, module, is_package):
+        """Parse one file into what the graph needs, runs in worker processes"""
+        summary = {'module': module, 'functions': {}, 'calls': [], 'external': [],
+                   'imports': {}, 'error': None}
+        try:
+            with open(path, 'rb') as f:
+                analyzer = VSCodeFlowAnalyzer().visit(ast.parse(f.read()))
+        except Exception as e:
+            summary['error'] = str(e)
+            return summary
             
-    def create_virtual_environment(self):
-        """Create a new virtual environment"""
-        if self.sidebar.root_path:
-            self.terminal.venv_manager.create_venv(self.sidebar.root_path)
-        else:
-            QMessageBox.warning(self, "Warning", "Please open a folder first")
+        package = module.split('.') if is_package else module.split('.')[:-1]
+        imports = {}
+        for local, target, name, level in analyzer.imports:
+            if level:
+                # from ..x import y is relative to the package of this module
+                base = package[:len(package) - (level - 1)] if level > 1 else package
+                target = '.'.join(base + ([target] if target else []))
+            imports[local] = f"{target}.{name}" if name else target
             
-    def activate_virtual_environment(self):
-        """Activate a virtual environment"""
-        if self.sidebar.root_path:
-            venv_path = os.path.join(self.sidebar.root_path, '.venv')
-            if os.path.exists(venv_path):
-                self.terminal.venv_manager.activate_venv(venv_path)
-            else:
-                QMessageBox.warning(self, "Warning", "No virtual environment found. Create one first.")
-        else:
-            QMessageBox.warning(self, "Warning", "Please open a folder first")
+        summary['functions'] = {name: info['lineno'] for name, info in analyzer.functions.items()}
+        summary['calls'] = [[caller, callee] for caller, callees in analyzer.call_graph.items()
+                            for callee in sorted(callees)]
+        for caller, dotted in analyzer.external_calls:
+            head, _, rest = dotted.partition('.')
+            if head in imports:
+                summary['external'].append([caller, f"{imports[head]}.{rest}" if rest else imports[head]])
+        summary['imports'] = imports
+        return summary
+        
+    def build(self):
+        """Resolve calls and imports between modules into nodes and edges"""
+        modules = {entry['summary']['module']: entry['summary'] for entry in self.files.values()}
+        self.nodes = []
+        self.node_index = {}
+        self.adjacency = None
+        
+        def add_node(name, kind, detail=None):
+            self.node_index[name] = len(self.nodes)
+            self.nodes.append((name, kind, detail))
             
-    def deactivate_virtual_environment(self):
-        """Deactivate current virtual environment"""
-        self.terminal.venv_manager.deactivate_venv()
-        
-    def install_package(self):
-        """Install a package in the current virtual environment"""
-        package_name, ok = QInputDialog.getText(self, "Install Package", "Package name:")
-        if ok and package_name:
-            self.terminal.venv_manager.install_package(package_name)
+        for module in sorted(modules):
+            summary = modules[module]
+            add_node(module, 'module', summary['error'] or f"{len(summary['functions'])} functions")
+            for function in summary['functions']:
+                add_node(f"{module}:{function}", 'function')
+                
+        def caller_node(module, caller):
+            if caller in modules[module]['functions']:
+                return self.node_index[f"{module}:{caller}"]
+            # Module level code and class bodies belong to the module
+            return self.node_index[module]
             
-    def create_new_project(self):
-        """Create a new project from template"""
-        templates = list(self.project_templates.templates.keys())
-        template_name, ok = QInputDialog.getItem(self, "New Project", 
-                                               "Choose template:", templates, 0, False)
-        if ok and template_name:
-            project_path, _ = QFileDialog.getExistingDirectory(self, "Choose Project Location")
-            if project_path:
-                success, message = self.project_templates.create_project(template_name, project_path)
-                if success:
-                    QMessageBox.information(self, "Success", message)
-                    # Open the new project
-                    self.sidebar.load_folder(project_path)
-                else:
-                    QMessageBox.critical(self, "Error", message)
-                    
-    def analyze_code_flow(self):
-        """Analyze current code and show visual flow"""
-        current_editor = self.editor_area.currentWidget()
-        if current_editor:
-            code = current_editor.toPlainText()
-            if code.strip():
-                self.visual_flow.analyze_code(code)
-                self.flow_dock.show()
-            else:
-                # Show sample flow if no code
-                self.visual_flow.show_sample_flow()
-                self.flow_dock.show()
-        else:
-            # Show sample flow if no editor
-            self.visual_flow.show_sample_flow()
-            self.flow_dock.show()
+        def resolve(dotted):
+            """Split a dotted name into a project module and the rest"""
+            parts = dotted.split('.')
+            for i in range(len(parts), 0, -1):
+                module = '.'.join(parts[:i])
+                if module in modules:
+                    return module, '.'.join(parts[i:])
+            return None, None
             
-    def check_code_health(self):
-        """Check code health of current file"""
-        current_editor = self.editor_area.currentWidget()
-        if current_editor:
-            code = current_editor.toPlainText()
-            if code.strip():
-                self.health_dashboard.update_metrics(code)
-                self.health_dock.show()
-            else:
-                QMessageBox.warning(self, "Warning", "No code to analyze")
-        else:
-            QMessageBox.warning(self, "Warning", "No active editor")
+        def resolve_function(dotted, depth=0):
+            """Find the function node a dotted call refers to"""
+            target, rest = resolve(dotted)
+            if target is None or not rest:
+                return None
+            functions = modules[target]['functions']
+            # Calling a class runs its __init__
+            for name in (rest, f"{rest}.__init__"):
+                if name in functions:
+                    return self.node_index[f"{target}:{name}"]
+            # Follow names a module re-exports from its own imports
+            head, _, tail = rest.partition('.')
+            imported = modules[target]['imports'].get(head)
+            if imported is None or depth >= 5:
+                return None
+            return resolve_function(f"{imported}.{tail}" if tail else imported, depth + 1)
+            
+        edges = set()
+        for module, summary in modules.items():
+            for caller, callee in summary['calls']:
+                edges.add((caller_node(module, caller), self.node_index[f"{module}:{callee}"]))
+            for caller, dotted in summary['external']:
+                callee = resolve_function(dotted)
+                if callee is not None:
+                    edges.add((caller_node(module, caller), callee))
+            for dotted in set(summary['imports'].values()):
+                target, _ = resolve(dotted)
+                if target is not None and target != module:
+                    edges.add((self.node_index[module], self.node_index[target]))
+                    
+        self.edges = sorted(edges)
+        self.positions = VSCodeFlowLayout.compute(len(self.nodes), self.edges)
+        
+    def find(self, symbol):
+        """Node indexes matching a module, class, qualified or bare function name"""
+        if symbol in self.node_index:
+            return [self.node_index[symbol]]
+        matches = []
+        for i, (name, kind, _) in enumerate(self.nodes):
+            qualname = name if kind == 'module' else name.partition(':')[2]
+            # A class matches all of its methods
+            if (qualname == symbol or qualname.endswith(f".{symbol}") or
+                    qualname.startswith(f"{symbol}.")):
+                matches.append(i)
+        return matches
+        
+    def neighbourhood(self, symbol, hops):
+        """Nodes within some hops of a symbol, as (nodes, edges, positions)"""
+        if self.adjacency is None:
+            self.adjacency = [[] for _ in self.nodes]
+            for source, target in self.edges:
+                self.adjacency[source].append(target)
+                self.adjacency[target].append(source)
                 
-    def show_about(self):
-        """Show about dialog"""
-        QMessageBox.about(self, "About", 
-                         "VS Code Clone\n\nA Python implementation of Visual Studio Code\nBuilt with PyQt6")
-
-class VSCodeStatusBar(QStatusBar):
-    """VS Code-like status bar"""
+        roots = set(self.find(symbol))
+        seen = set(roots)
+        frontier = roots
+        for _ in range(hops):
+            frontier = [other for node in frontier for other in self.adjacency[node] if other not in seen]
+            seen.update(frontier)
+            
+        kept = sorted(seen)
+        remap = {node: i for i, node in enumerate(kept)}
+        nodes = []
+        for node in kept:
+            name, kind, detail = self.nodes[node]
+            nodes.append((name, 'focus' if node in roots else kind, detail))
+        edges = [(remap[source], remap[target]) for source, target in self.edges
+                 if source in remap and target in remap]
+        return nodes, edges, VSCodeFlowLayout.compute(len(nodes), edges)
+        
+class VSCodeProjectMetrics(VSCodeProjectSummaries):
+    """Function metrics of every Python file in a project"""
     
-    def __init__(self, parent=None):
+    CACHE_PREFIX = 'metrics'
+    MAX_REPORTED_FUNCTIONS = 50
+    
+    @staticmethod
+    def summarize(path, module, is_package):
+        """Measure one file, runs in worker processes"""
+        try:
+            with open(path, 'rb') as f:
+                code = f.read().decode('utf-8', errors='replace')
+        except OSError as e:
+            return {'functions': [], 'todos': [], 'lines': 0, 'error': str(e)}
+        return VSCodeMetricsEngine().measure_module(code)
+        
+    def build(self):
+        """Nothing to combine, results are computed from the summaries on demand"""
+        
+    def worst_functions(self):
+        """(path, function metrics) of the most complex functions"""
+        functions = [(path, function) for path, entry in self.files.items()
+                     for function in entry['summary']['functions']]
+        functions.sort(key=lambda item: (-item[1]['complexity'], -item[1]['nesting'], item[0]))
+        return functions[:self.MAX_REPORTED_FUNCTIONS]
+        
+    def errors(self):
+        """(path, error) of files that couldn't be measured"""
+        return sorted((path, entry['summary']['error']) for path, entry in self.files.items()
+                      if entry['summary']['error'])
+        
+    def quality_score(self):
+        """Mean file score, weighted by how many functions each file has"""
+        total = weight = 0
+        for entry in self.files.values():
+            summary = entry['summary']
+            functions = max(1, len(summary['functions']))
+            total += VSCodeMetricsEngine.quality_score(summary) * functions
+            weight += functions
+        return round(total / weight) if weight else 100
+        
+    def complexity_percent(self):
+        """Worst function complexity in the project as a percentage"""
+        worst = self.worst_functions()
+        return VSCodeMetricsEngine.complexity_percent({'functions': [worst[0][1]] if worst else []})
+        
+class VSCodeProjectBuilder(QThread):
+    """Builds or refreshes project wide summaries in the background"""
+    
+    # files parsed, files to parse
+    progress = pyqtSignal(int, int)
+    built = pyqtSignal(object)
+    
+    def __init__(self, summaries_class, root_path, paths, parent=None):
         super().__init__(parent)
-        self.setup_status_bar()
-        
-    def setup_status_bar(self):
-        """Setup the status bar with VS Code styling"""
-        self.setStyleSheet("""
-            QStatusBar {
-                background-color: #007acc;
-                color: white;
-                border: none;
-            }
-        """)
+        self.summaries_class = summaries_class
+        self.root_path = root_path
+        self.paths = paths
+        
+    def run(self):
+        """Summarize changed files, combine the results and persist the summaries"""
+        summaries = self.summaries_class(self.root_path)
+        summaries.load_cache()
+        summaries.update(self.paths, self.progress.emit)
+        summaries.save_cache()
+        self.built.emit(summaries)
         
-        # Add status items like VS Code
-        self.addPermanentWidget(QLabel("Ln 1, Col 1"))
-        self.addPermanentWidget(QLabel("UTF-8"))
-        self.addPermanentWidget(QLabel("Python"))
-        self.showMessage("Ready")
-
 class VSCodeVisualFlow(QGraphicsView):
     """Visual Code Flow - Shows data flow and execution paths"""
     
+    # generation, image
+    overview_rendered = pyqtSignal(int, object)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.scene = QGraphicsScene()
         self.setScene(self.scene)
         self.setRenderHint(QPainter.RenderHint.Antialiasing)
-        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        # Only repaint what changed, items are indexed in a BSP tree for fast lookups
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing)
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
         
         # Flow tracking
         self.variables = {}
         self.functions = {}
         self.connections = []
         self.execution_path = []
+        self.analysis = None
+        # Items of the drawn graph, for level-of-detail switching
+        self.node_items = []
+        self.graph_item = None
+        # Incremented per drawn graph so stale overview images are dropped
+        self.overview_generation = 0
+        self.overview_rendered.connect(self.on_overview_rendered)
         
         # Visual settings
         self.setStyleSheet("""
@@ -1561,24 +7287,40 @@ class VSCodeVisualFlow(QGraphicsView):
         
     def analyze_code(self, code):
         """Analyze code and create visual flow"""
-        self.scene.clear()
-        self.variables.clear()
-        self.functions.clear()
-        self.connections.clear()
-        
-        try:
-            tree = ast.parse(code)
-            self.process_ast(tree)
-            
-            # If no elements found, show sample data
-            if not self.variables and not self.functions:
-                self.show_sample_flow()
-            else:
-                self.draw_flow()
-                
-        except Exception as e:
+        self.show_analysis(VSCodeCodeAnalysis(None, code))
+        
+    def show_analysis(self, analysis):
+        """Draw the flow of an analyzed document"""
+        self.clear_flow()
+        self.analysis = analysis
+        self.variables = analysis.variables
+        self.functions = analysis.functions
+        self.connections = [(caller, callee) for caller, callees in analysis.call_graph.items()
+                            for callee in sorted(callees)]
+        
+        # If nothing was found or the code doesn't parse, show sample data
+        if analysis.error or (not self.variables and not self.functions):
             self.show_sample_flow()
+        else:
+            self.draw_flow()
+            
+    def show_graph(self, title_text, nodes, edges, positions):
+        """Draw a graph that was laid out elsewhere"""
+        self.clear_flow()
+        if nodes:
+            self.draw_graph(title_text, nodes, edges, positions)
+        else:
+            message = QGraphicsTextItem(f"{title_text}: nothing found")
+            message.setDefaultTextColor(QColor("#d4d4d4"))
+            self.scene.addItem(message)
             
+    def clear_flow(self):
+        """Remove the current diagram"""
+        self.scene.clear()
+        self.resetTransform()
+        self.node_items = []
+        self.graph_item = None
+        
     def show_sample_flow(self):
         """Show sample flow diagram when no code is available"""
         # Add title
@@ -1672,113 +7414,154 @@ class VSCodeVisualFlow(QGraphicsView):
         self.scene.setSceneRect(self.scene.itemsBoundingRect())
         self.fitInView(self.scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
             
-    def process_ast(self, node, x=0, y=0):
-        """Process AST nodes and track variables/functions"""
-        if isinstance(node, ast.FunctionDef):
-            func_name = node.name
-            self.functions[func_name] = {
-                'node': node,
-                'pos': (x, y),
-                'variables': set(),
-                'calls': []
-            }
-            
-            # Process function body
-            for i, stmt in enumerate(node.body):
-                self.process_ast(stmt, x + 150, y + 80 + (i * 30))
-                
-        elif isinstance(node, ast.Assign):
-            for target in node.targets:
-                if isinstance(target, ast.Name):
-                    var_name = target.id
-                    self.variables[var_name] = {
-                        'value': 'assigned',
-                        'pos': (x, y),
-                        'type': 'variable'
-                    }
-                    
-        elif isinstance(node, ast.Call):
-            if isinstance(node.func, ast.Name):
-                func_name = node.func.id
-                if func_name in self.functions:
-                    self.functions[func_name]['calls'].append(node)
-                    
-        # Recursively process child nodes
-        for child in ast.iter_child_nodes(node):
-            self.process_ast(child, x + 50, y + 30)
-                
     def draw_flow(self):
         """Draw the visual flow diagram"""
+        analysis = self.analysis
+        self.draw_graph("Code Flow Analysis", analysis.nodes, analysis.edges, analysis.positions)
+        
+    def draw_graph(self, title_text, nodes, edges, positions):
+        """Draw laid out nodes and the edges between them"""
         # Add title
-        title = QGraphicsTextItem("Code Flow Analysis")
+        title = QGraphicsTextItem(title_text)
         title.setDefaultTextColor(QColor("#d4d4d4"))
-        title.setPos(10, 10)
+        title.setPos(0, -40)
         self.scene.addItem(title)
         
-        # Draw variables
-        y_offset = 50
-        for i, (var_name, var_info) in enumerate(self.variables.items()):
-            x = 20 + (i * 120)
-            y = y_offset
-            
-            ellipse = QGraphicsEllipseItem(x, y, 100, 50)
-            ellipse.setBrush(QBrush(QColor("#4ec9b0")))
-            ellipse.setPen(QPen(QColor("#d4d4d4"), 2))
-            self.scene.addItem(ellipse)
-            
-            text = QGraphicsTextItem(var_name)
-            text.setDefaultTextColor(QColor("#1e1e1e"))
-            text.setPos(x + 10, y + 15)
-            self.scene.addItem(text)
-            
-        # Draw functions
-        y_offset = 150
-        for i, (func_name, func_info) in enumerate(self.functions.items()):
-            x = 20 + (i * 150)
-            y = y_offset
-            
-            rect = QGraphicsEllipseItem(x, y, 120, 60)
-            rect.setBrush(QBrush(QColor("#569cd6")))
-            rect.setPen(QPen(QColor("#d4d4d4"), 2))
-            self.scene.addItem(rect)
+        colors = {'function': "#569cd6", 'variable': "#4ec9b0", 'module': "#c586c0", 'focus': "#dcdcaa"}
+        self.node_items = []
+        boxes = []
+        for (name, kind, detail), (x, y) in zip(nodes, positions):
+            item = VSCodeFlowNodeItem(name, colors.get(kind, "#569cd6"), detail)
+            item.setPos(x, y)
+            self.scene.addItem(item)
+            self.node_items.append(item)
+            boxes.append((item.rect.translated(x, y), item.color))
             
-            text = QGraphicsTextItem(func_name)
-            text.setDefaultTextColor(QColor("#1e1e1e"))
-            text.setPos(x + 10, y + 20)
-            self.scene.addItem(text)
-            
-            # Show function calls
-            if func_info['calls']:
-                calls_text = QGraphicsTextItem(f"Calls: {len(func_info['calls'])}")
-                calls_text.setDefaultTextColor(QColor("#ce9178"))
-                calls_text.setPos(x + 10, y + 40)
-                self.scene.addItem(calls_text)
-        
-        # Draw connections between functions and variables
-        y_offset = 250
-        for i, (var_name, var_info) in enumerate(self.variables.items()):
-            for j, (func_name, func_info) in enumerate(self.functions.items()):
-                # Simple connection logic
-                if i == j:  # Connect variables to functions with same index
-                    from_x = 70 + (i * 120)
-                    from_y = 75
-                    to_x = 80 + (j * 150)
-                    to_y = 180
-                    
-                    line = QGraphicsLineItem(from_x, from_y, to_x, to_y)
-                    line.setPen(QPen(QColor("#ce9178"), 2))
-                    self.scene.addItem(line)
-                    
-                    # Add arrow
-                    arrow = QGraphicsTextItem("→")
-                    arrow.setDefaultTextColor(QColor("#ce9178"))
-                    arrow.setPos((from_x + to_x) / 2, (from_y + to_y) / 2)
-                    self.scene.addItem(arrow)
-        
-        # Set scene rect to include all items
-        self.scene.setSceneRect(self.scene.itemsBoundingRect())
+        # Edges leave the bottom of the source and enter the top of the target
+        width = VSCodeFlowNodeItem.WIDTH / 2
+        height = VSCodeFlowNodeItem.HEIGHT
+        lines = []
+        for source, target in edges:
+            x1, y1 = positions[source]
+            x2, y2 = positions[target]
+            lines.append(QLineF(x1 + width, y1 + height, x2 + width, y2))
+        self.graph_item = VSCodeFlowGraphItem(lines, boxes, "#ce9178")
+        self.scene.addItem(self.graph_item)
+        if self.graph_item.overview_limit:
+            self.overview_generation += 1
+            threading.Thread(target=self.render_overview,
+                             args=(self.overview_generation, self.graph_item), daemon=True).start()
+        
+        # Set scene rect to include all items, the graph item already covers every node
+        self.scene.setSceneRect(self.graph_item.boundingRect().united(title.sceneBoundingRect()))
         self.fitInView(self.scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
+        self.update_level_of_detail()
+        
+    def wheelEvent(self, event):
+        """Zoom in and out around the cursor"""
+        factor = 1.25 if event.angleDelta().y() > 0 else 0.8
+        self.scale(factor, factor)
+        self.update_level_of_detail()
+        
+    def render_overview(self, generation, graph_item):
+        """Render the zoomed out image of a graph on a worker thread"""
+        self.overview_rendered.emit(generation, graph_item.render_overview())
+        
+    def on_overview_rendered(self, generation, image):
+        """Show the overview unless another graph was drawn meanwhile"""
+        if generation == self.overview_generation and self.graph_item is not None:
+            self.graph_item.set_overview(image)
+            self.update_level_of_detail()
+            
+    def update_level_of_detail(self):
+        """Hide the node items while the overview image is drawn in their place"""
+        if self.graph_item is None:
+            return
+        visible = self.transform().m11() > self.graph_item.overview_limit
+        if self.node_items and self.node_items[0].isVisible() != visible:
+            for item in self.node_items:
+                item.setVisible(visible)
 
+class VSCodeFlowPanel(QWidget):
+    """Visual Code Flow dock contents, the diagram plus focus controls for project graphs"""
+    
+    MAX_HOPS = 6
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.project_graph = None
+        self.view = VSCodeVisualFlow()
+        self.setup_panel()
+        
+    def setup_panel(self):
+        """Setup the header controls above the diagram"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        # Header
+        header = QWidget()
+        header_layout = QHBoxLayout(header)
+        header_layout.setContentsMargins(8, 4, 8, 4)
+        
+        self.title_label = QLabel("CURRENT FILE")
+        self.title_label.setStyleSheet("""
+            QLabel {
+                color: #cccccc;
+                font-weight: bold;
+                font-size: 11px;
+            }
+        """)
+        header_layout.addWidget(self.title_label)
+        
+        self.focus_input = QLineEdit()
+        self.focus_input.setPlaceholderText("Focus on a symbol (empty for the whole project)")
+        self.focus_input.returnPressed.connect(self.show_focus)
+        header_layout.addWidget(self.focus_input)
+        
+        self.hops_spin = QSpinBox()
+        self.hops_spin.setRange(1, self.MAX_HOPS)
+        self.hops_spin.setValue(2)
+        self.hops_spin.setPrefix("Hops: ")
+        self.hops_spin.valueChanged.connect(self.show_focus)
+        header_layout.addWidget(self.hops_spin)
+        
+        # Focusing only applies to a project graph
+        self.focus_input.setEnabled(False)
+        self.hops_spin.setEnabled(False)
+        
+        layout.addWidget(header)
+        layout.addWidget(self.view)
+        
+    def show_analysis(self, analysis):
+        """Show the flow of the current file"""
+        self.title_label.setText("CURRENT FILE")
+        self.view.show_analysis(analysis)
+        
+    def show_project_graph(self, graph):
+        """Show a freshly built project graph and offer its symbols for focusing"""
+        self.project_graph = graph
+        completer = QCompleter([name for name, _, _ in graph.nodes], self.focus_input)
+        completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        completer.setFilterMode(Qt.MatchFlag.MatchContains)
+        self.focus_input.setCompleter(completer)
+        self.focus_input.setEnabled(True)
+        self.hops_spin.setEnabled(True)
+        self.show_focus()
+        
+    def show_focus(self):
+        """Draw the project graph, or only the neighbourhood of the focused symbol"""
+        graph = self.project_graph
+        if graph is None:
+            return
+        self.title_label.setText("PROJECT")
+        symbol = self.focus_input.text().strip()
+        if not symbol:
+            self.view.show_graph("Project Call Graph", graph.nodes, graph.edges, graph.positions)
+            return
+        hops = self.hops_spin.value()
+        nodes, edges, positions = graph.neighbourhood(symbol, hops)
+        self.view.show_graph(f"{symbol} within {hops} hops", nodes, edges, positions)
+        
 class VSCodeProjectTemplates:
     """Smart Project Templates with AI-generated scaffolding"""
     
@@ -1854,6 +7637,8 @@ class VSCodeHealthDashboard(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Lines currently in the issue list
+        self.shown_issues = []
         self.setup_dashboard()
         
     def setup_dashboard(self):
@@ -1947,56 +7732,79 @@ class VSCodeHealthDashboard(QWidget):
     def update_metrics(self, code=None):
         """Update dashboard metrics"""
         if code:
-            # Analyze code and update metrics
-            issues = self.analyze_code(code)
+            self.show_metrics(VSCodeMetricsEngine().measure_module(code))
+            
+    def show_analysis(self, analysis):
+        """Show the metrics of an analyzed document"""
+        self.show_metrics(analysis.metrics)
+        
+    def show_metrics(self, metrics):
+        """Show a module's issues, quality score and worst complexity"""
+        self.set_issues(VSCodeMetricsEngine.issues(metrics))
+        self.quality_score.setText(f"Code Quality: {VSCodeMetricsEngine.quality_score(metrics)}/100")
+        self.complexity_bar.setValue(VSCodeMetricsEngine.complexity_percent(metrics))
+        
+    def show_project_metrics(self, project):
+        """Show the most complex functions of a whole project"""
+        lines = [f"{path}:{function['lineno']} {function['name']} - complexity {function['complexity']}, "
+                 f"nesting {function['nesting']}, {function['length']} lines"
+                 for path, function in project.worst_functions()]
+        lines.extend(f"❌ {path}: {error}" for path, error in project.errors())
+        self.set_issues(lines or ["✅ No functions found"])
+        self.quality_score.setText(f"Project Quality: {project.quality_score()}/100")
+        self.complexity_bar.setValue(project.complexity_percent())
+        
+    def set_issues(self, issues):
+        """Show a new issue list, editing only the lines that changed so the view keeps its place"""
+        old = self.shown_issues
+        self.shown_issues = list(issues)
+        if not old:
             self.issues_list.setPlainText("\n".join(issues))
+            return
             
-            # Update scores based on analysis
-            quality = self.calculate_quality_score(code)
-            self.quality_score.setText(f"Code Quality: {quality}/100")
+        document = self.issues_list.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        # Back to front, so the line numbers of earlier changes stay valid
+        opcodes = difflib.SequenceMatcher(None, old, issues, autojunk=False).get_opcodes()
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag == 'equal':
+                continue
+            text = "\n".join(issues[j1:j2])
+            if i1 == i2:
+                # Insert before line i1, or after the last line
+                if i1 < len(old):
+                    cursor.setPosition(document.findBlockByNumber(i1).position())
+                    cursor.insertText(text + "\n")
+                else:
+                    cursor.setPosition(document.lastBlock().position() + document.lastBlock().length() - 1)
+                    cursor.insertText("\n" + text)
+                continue
+                
+            first = document.findBlockByNumber(i1)
+            last = document.findBlockByNumber(i2 - 1)
+            begin = first.position()
+            finish = last.position() + last.length() - 1
+            if j1 == j2:
+                # Take a line break with the removed lines
+                if i2 < len(old):
+                    finish += 1
+                elif i1 > 0:
+                    begin -= 1
+            cursor.setPosition(begin)
+            cursor.setPosition(finish, QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(text)
+        cursor.endEditBlock()
             
-    def analyze_code(self, code):
+    @staticmethod
+    def analyze_code(code):
         """Analyze code for issues"""
-        issues = []
-        
-        # Simple analysis
-        lines = code.split('\n')
+        return VSCodeMetricsEngine.issues(VSCodeMetricsEngine().measure_module(code))
         
-        # Check for long functions
-        if len(lines) > 50:
-            issues.append("⚠️ Function is too long (>50 lines)")
-            
-        # Check for complex nested structures
-        indent_levels = [len(line) - len(line.lstrip()) for line in lines if line.strip()]
-        if max(indent_levels) > 12:
-            issues.append("⚠️ Deep nesting detected")
-            
-        # Check for magic numbers
-        if re.search(r'\b\d{3,}\b', code):
-            issues.append("⚠️ Magic numbers detected")
-            
-        # Check for TODO comments
-        if 'TODO' in code.upper():
-            issues.append("📝 TODO comments found")
-            
-        if not issues:
-            issues.append("✅ No major issues detected")
-            
-        return issues
-        
-    def calculate_quality_score(self, code):
+    @staticmethod
+    def calculate_quality_score(code):
         """Calculate code quality score"""
-        score = 100
-        
-        # Deduct points for issues
-        if len(code.split('\n')) > 50:
-            score -= 10
-        if 'TODO' in code.upper():
-            score -= 5
-        if re.search(r'\b\d{3,}\b', code):
-            score -= 5
-            
-        return max(0, score)
+        return VSCodeMetricsEngine.quality_score(VSCodeMetricsEngine().measure_module(code))
 
 class VSCodePackageManager(QWidget):
     """Integrated Package Manager with smart dependency resolution"""